@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la caché de factoriales y potencias enteras
+
+Compara math.factorial / ** en cada llamada con CacheEnterosGrandes en dos
+patrones de peticiones:
+    repetido:   el mismo n muchas veces (acierto directo en la caché)
+    ascendente: n creciente (cada factorial parte del anterior ya cacheado)
+
+Uso:
+    python scripts/benchmark_factorial.py
+    python scripts/benchmark_factorial.py --n 20000 --pasos 200 --presupuesto-mb 64
+"""
+
+import argparse
+import math
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.calculadora import CacheEnterosGrandes
+
+def patrones(n: int, pasos: int) -> dict:
+    paso = max(1, n // pasos)
+    return {
+        'factorial repetido': ('!', [n] * pasos),
+        'factorial ascendente': ('!', list(range(paso, n + 1, paso))),
+        'potencia repetida': ('^', [(3, n * 10)] * pasos),
+    }
+
+def medir(funcion, peticiones) -> float:
+    inicio = time.perf_counter()
+    for peticion in peticiones:
+        funcion(*peticion) if isinstance(peticion, tuple) else funcion(peticion)
+    return time.perf_counter() - inicio
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de la caché de enteros grandes')
+    parser.add_argument('--n', type=int, default=10_000, help='Mayor n pedido')
+    parser.add_argument('--pasos', type=int, default=100, help='Peticiones por patrón')
+    parser.add_argument('--presupuesto-mb', type=float, default=16, help='Presupuesto de la caché')
+    args = parser.parse_args()
+
+    print(f"{'patrón':<24}{'sin caché (s)':>15}{'con caché (s)':>15}{'speedup':>9}"
+          f"{'aciertos':>10}{'incrementales':>15}{'KB':>8}")
+    for nombre, (operacion, peticiones) in patrones(args.n, args.pasos).items():
+        cache = CacheEnterosGrandes(presupuesto_bytes=int(args.presupuesto_mb * 1024 * 1024))
+        if operacion == '!':
+            sin_cache = medir(math.factorial, peticiones)
+            con_cache = medir(cache.factorial, peticiones)
+        else:
+            sin_cache = medir(pow, peticiones)
+            con_cache = medir(cache.potencia, peticiones)
+        print(f"{nombre:<24}{sin_cache:>15.4f}{con_cache:>15.4f}{sin_cache / con_cache:>8.1f}x"
+              f"{cache.aciertos:>10}{cache.incrementales:>15}{cache.bytes_usados / 1024:>8.0f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark del coste del historial por operación
+
+Compara el historial anterior (una cadena formateada por operación en una
+lista sin límite) con el historial circular de registros compactos.
+Mide ns/op en operaciones baratas y la memoria retenida tras N operaciones.
+
+Uso:
+    python scripts/benchmark_historial.py
+    python scripts/benchmark_historial.py --ops 500000 --capacidad 1000
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.calculadora import Calculadora
+
+class CalculadoraHistorialLista(Calculadora):
+    """Comportamiento anterior: f-string en cada operación y lista que crece sin límite"""
+
+    def __init__(self):
+        super().__init__()
+        self.historial = []
+
+    def sumar(self, a, b):
+        self._validar_numeros(a, b)
+        resultado = a + b
+        self.historial.append(f"{a} + {b} = {resultado}")
+        return resultado
+
+    def dividir(self, a, b):
+        self._validar_numeros(a, b)
+        if b == 0:
+            raise ZeroDivisionError("No se puede dividir entre cero")
+        resultado = a / b
+        self.historial.append(f"{a} ÷ {b} = {resultado}")
+        return resultado
+
+def ns_por_operacion(calc, operacion: str, ops: int) -> float:
+    metodo = getattr(calc, operacion)
+    inicio = time.perf_counter_ns()
+    for i in range(ops):
+        metodo(i, 3)
+    return (time.perf_counter_ns() - inicio) / ops
+
+def memoria_retenida(fabrica, ops: int) -> int:
+    """Bytes que siguen asignados tras ops sumas (historial incluido)"""
+    tracemalloc.start()
+    calc = fabrica()
+    for i in range(ops):
+        calc.sumar(i, 1)
+    actual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return actual
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del historial de Calculadora')
+    parser.add_argument('--ops', type=int, default=200_000, help='Operaciones por medición')
+    parser.add_argument('--capacidad', type=int, default=1000, help='Capacidad del historial circular')
+    parser.add_argument('--repeat', type=int, default=5, help='Repeticiones (se toma la mejor)')
+    args = parser.parse_args()
+
+    variantes = {
+        'lista + f-string': CalculadoraHistorialLista,
+        'circular compacto': lambda: Calculadora(capacidad_historial=args.capacidad),
+    }
+
+    print(f"{'variante':<20}{'sumar ns/op':>14}{'dividir ns/op':>16}{'memoria':>12}")
+    for nombre, fabrica in variantes.items():
+        sumar = min(ns_por_operacion(fabrica(), 'sumar', args.ops) for _ in range(args.repeat))
+        dividir = min(ns_por_operacion(fabrica(), 'dividir', args.ops) for _ in range(args.repeat))
+        memoria = memoria_retenida(fabrica, args.ops)
+        print(f"{nombre:<20}{sumar:>14.0f}{dividir:>16.0f}{memoria / 1024:>10.0f}KB")
+
+    # El formateo se paga solo al consultar el historial
+    calc = Calculadora(capacidad_historial=args.capacidad)
+    for i in range(args.ops):
+        calc.sumar(i, 1)
+    inicio = time.perf_counter()
+    calc.obtener_historial()
+    print(f"obtener_historial() con {len(calc.historial)} entradas: "
+          f"{(time.perf_counter() - inicio) * 1000:.2f}ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,8 +7,296 @@ Clase Calculadora para demostrar pruebas con Pytest
 Incluye operaciones básicas y avanzadas, manejo de errores
 """
 
+import bisect
 import math
-from typing import List, Union
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Secuencia de números o array de NumPy para las operaciones en lote
+Lote = Union[Sequence[Union[int, float]], np.ndarray]
+
+# Códigos de operación del historial; el texto se genera solo al consultarlo
+(OP_SUMA, OP_RESTA, OP_MULTIPLICACION, OP_DIVISION, OP_POTENCIA, OP_RAIZ, OP_FACTORIAL, OP_PROMEDIO,
+ OP_SUMA_LOTE, OP_DIVISION_LOTE, OP_POTENCIA_LOTE) = range(11)
+
+# Valores de un lote que se muestran en su entrada del historial
+MUESTRA_LOTE = 10
+
+# Posiciones con error que se citan en el mensaje de una operación en lote
+POSICIONES_EN_ERROR = 10
+
+# Enteros con más bits que esto (≈ 50 dígitos) se guardan resumidos en el historial
+BITS_ENTERO_RESUMIDO = 166
+
+# Por debajo de estos tamaños calcular es más barato que consultar la caché
+FACTORIAL_MINIMO_CACHE = 128
+BITS_MINIMOS_CACHE = 1024
+
+# Tramos que se multiplican directamente en el producto por bisección
+_TRAMO_PRODUCTO = 16
+
+_FORMATOS = {
+    OP_SUMA: "{a} + {b} = {r}",
+    OP_RESTA: "{a} - {b} = {r}",
+    OP_MULTIPLICACION: "{a} × {b} = {r}",
+    OP_DIVISION: "{a} ÷ {b} = {r}",
+    OP_POTENCIA: "{a}^{b} = {r}",
+    OP_RAIZ: "√{a} = {r}",
+    OP_FACTORIAL: "{a}! = {r}",
+    OP_PROMEDIO: "Promedio de {a} = {r}",
+    OP_SUMA_LOTE: "Suma en lote de {a} elementos = {r}",
+    OP_DIVISION_LOTE: "División en lote de {a} elementos = {r}",
+    OP_POTENCIA_LOTE: "Potencia en lote de {a} elementos = {r}",
+}
+
+class MuestraLote:
+    """
+    Primeros valores de un lote; se formatea como una lista, con '...' si hay más
+    Los enteros grandes de lotes con dtype object se guardan resumidos
+    """
+    
+    __slots__ = ('valores', 'total')
+    
+    def __init__(self, valores: np.ndarray):
+        plano = valores.ravel()
+        self.valores = [_para_historial(valor) for valor in plano[:MUESTRA_LOTE].tolist()]
+        self.total = plano.size
+    
+    def __format__(self, especificacion: str) -> str:
+        texto = ", ".join(map(format, self.valores))
+        return f"[{texto}, ...]" if self.total > len(self.valores) else f"[{texto}]"
+
+class EnteroResumido:
+    """
+    Entero grande resumido para el historial: ≈ mantisa·10^exponente y nº de dígitos
+    No retiene el entero ni lo convierte a texto (str() de enteros de más de 4300
+    dígitos está limitado y su coste es cuadrático)
+    """
+    
+    __slots__ = ('negativo', 'mantisa', 'exponente', 'digitos')
+    
+    def __init__(self, valor: int):
+        self.negativo = valor < 0
+        valor = abs(valor)
+        desplazamiento = max(0, valor.bit_length() - 64)
+        log10 = math.log10(valor >> desplazamiento) + desplazamiento * math.log10(2)
+        self.exponente = int(log10)
+        self.mantisa = 10 ** (log10 - self.exponente)
+        if round(self.mantisa, 6) >= 10:
+            self.mantisa /= 10
+            self.exponente += 1
+        
+        # Junto a una potencia de diez el log10 en float no distingue 10**k - 1 de 10**k:
+        # el nº de dígitos se decide comparando con la potencia exacta
+        potencia = round(log10)
+        if abs(log10 - potencia) < 1e-6:
+            self.digitos = potencia + 1 if valor >= 10 ** potencia else potencia
+        else:
+            self.digitos = int(log10) + 1
+    
+    def __format__(self, especificacion: str) -> str:
+        signo = "-" if self.negativo else ""
+        return f"≈{signo}{self.mantisa:.6f}e+{self.exponente} ({self.digitos} dígitos)"
+
+def _para_historial(valor: Any) -> Any:
+    """Los enteros grandes se guardan resumidos; el resto tal cual"""
+    if type(valor) is int and valor.bit_length() > BITS_ENTERO_RESUMIDO:
+        return EnteroResumido(valor)
+    return valor
+
+def _producto_rango(inicio: int, fin: int) -> int:
+    """Producto inicio·(inicio+1)···fin por bisección (multiplica enteros de tamaño parecido)"""
+    if fin - inicio < _TRAMO_PRODUCTO:
+        return math.prod(range(inicio, fin + 1))
+    medio = (inicio + fin) // 2
+    return _producto_rango(inicio, medio) * _producto_rango(medio + 1, fin)
+
+class CacheEnterosGrandes:
+    """
+    Memoización LRU de factoriales y potencias enteras, compartida entre calculadoras
+    El límite es un presupuesto en bytes (sys.getsizeof de cada entero), no un nº de
+    entradas: al superarlo se descartan las menos usadas. Un factorial no cacheado
+    se obtiene multiplicando el mayor factorial cacheado por debajo de n por el
+    producto del tramo que falta, si ese factorial cubre al menos la mitad de n
+    """
+    
+    def __init__(self, presupuesto_bytes: int = 16 * 1024 * 1024):
+        self.presupuesto_bytes = presupuesto_bytes
+        self.bytes_usados = 0
+        self._entradas: OrderedDict = OrderedDict()  # clave -> (valor, bytes)
+        self._factoriales: List[int] = []             # n con factorial cacheado, ordenados
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.incrementales = 0
+    
+    def __len__(self) -> int:
+        return len(self._entradas)
+    
+    def factorial(self, n: int) -> int:
+        """n! (n >= 0 ya validado)"""
+        if n < FACTORIAL_MINIMO_CACHE:
+            return math.factorial(n)
+        clave = ('!', n)
+        with self._lock:
+            valor = self._obtener(clave)
+            base = self._factorial_anterior(n) if valor is None else None
+            if base is not None:
+                self.incrementales += 1
+        if valor is not None:
+            return valor
+        
+        if base is not None:
+            valor = base[1] * _producto_rango(base[0] + 1, n)
+        else:
+            valor = math.factorial(n)
+        self._guardar(clave, valor)
+        return valor
+    
+    def potencia(self, base: int, exponente: int) -> int:
+        """base ** exponente para enteros con exponente >= 0"""
+        if exponente * base.bit_length() < BITS_MINIMOS_CACHE:
+            return base ** exponente
+        clave = ('^', base, exponente)
+        with self._lock:
+            valor = self._obtener(clave)
+        if valor is None:
+            valor = base ** exponente
+            self._guardar(clave, valor)
+        return valor
+    
+    def limpiar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+            self._factoriales.clear()
+            self.bytes_usados = 0
+    
+    def _obtener(self, clave: Tuple) -> Optional[int]:
+        entrada = self._entradas.get(clave)
+        if entrada is None:
+            self.fallos += 1
+            return None
+        self._entradas.move_to_end(clave)
+        self.aciertos += 1
+        return entrada[0]
+    
+    def _factorial_anterior(self, n: int) -> Optional[Tuple[int, int]]:
+        """
+        (k, k!) con el mayor k < n cacheado si cubre al menos la mitad de n, o None
+        k! pasa a ser el más reciente: es la entrada de la que se acaba de partir
+        """
+        i = bisect.bisect_left(self._factoriales, n)
+        if i == 0:
+            return None
+        k = self._factoriales[i - 1]
+        if k < n // 2:
+            return None
+        clave = ('!', k)
+        self._entradas.move_to_end(clave)
+        return k, self._entradas[clave][0]
+    
+    def _guardar(self, clave: Tuple, valor: int) -> None:
+        tamano = sys.getsizeof(valor)
+        if tamano > self.presupuesto_bytes:
+            return
+        with self._lock:
+            if clave in self._entradas:
+                return
+            self._entradas[clave] = (valor, tamano)
+            self.bytes_usados += tamano
+            if clave[0] == '!':
+                bisect.insort(self._factoriales, clave[1])
+            while self.bytes_usados > self.presupuesto_bytes:
+                antigua, (_, liberados) = self._entradas.popitem(last=False)
+                self.bytes_usados -= liberados
+                if antigua[0] == '!':
+                    del self._factoriales[bisect.bisect_left(self._factoriales, antigua[1])]
+
+# Caché por defecto de todas las calculadoras
+CACHE_COMPARTIDO = CacheEnterosGrandes()
+
+def _posiciones(mascara: np.ndarray) -> str:
+    """Índices (hasta POSICIONES_EN_ERROR) donde la máscara es cierta, para los mensajes"""
+    indices = [indice if len(indice) > 1 else indice[0] for indice in
+               map(tuple, np.argwhere(mascara)[:POSICIONES_EN_ERROR].tolist())]
+    total = int(np.count_nonzero(mascara))
+    sufijo = f" y {total - len(indices)} más" if total > len(indices) else ""
+    return f"posiciones {indices}{sufijo}"
+
+def _es_tipo_numerico(tipo: type) -> bool:
+    return (issubclass(tipo, (int, float, np.integer, np.floating))
+            and not issubclass(tipo, (bool, np.bool_)))
+
+class HistorialOperaciones:
+    """
+    Historial circular de capacidad fija con registros compactos
+    Guarda código de operación, operandos y resultado en arrays preasignados;
+    al llenarse sobrescribe las operaciones más antiguas. Las cadenas
+    "5 + 3 = 8" se construyen solo al leer el historial
+    """
+    
+    def __init__(self, capacidad: int = 1000):
+        if capacidad < 1:
+            raise ValueError("La capacidad del historial debe ser al menos 1")
+        self.capacidad = capacidad
+        self._codigos = array('B', bytes(capacidad))
+        self._a: List[Any] = [None] * capacidad
+        self._b: List[Any] = [None] * capacidad
+        self._resultados: List[Any] = [None] * capacidad
+        self._siguiente = 0
+        self._tamano = 0
+        self.descartadas = 0  # Operaciones sobrescritas por falta de capacidad
+    
+    def registrar(self, codigo: int, a: Any, b: Any, resultado: Any) -> None:
+        """
+        Registra una operación sin formatearla
+        Los enteros grandes (operandos y resultado) se resumen ya aquí: guardados
+        enteros, str() fallaría más allá de 4300 dígitos en cada lectura posterior
+        """
+        # Igual que _para_historial, en línea: registrar está en el camino de cada operación
+        i = self._siguiente
+        self._codigos[i] = codigo
+        self._a[i] = EnteroResumido(a) if type(a) is int and a.bit_length() > BITS_ENTERO_RESUMIDO else a
+        self._b[i] = EnteroResumido(b) if type(b) is int and b.bit_length() > BITS_ENTERO_RESUMIDO else b
+        self._resultados[i] = (EnteroResumido(resultado) if type(resultado) is int
+                               and resultado.bit_length() > BITS_ENTERO_RESUMIDO else resultado)
+        self._siguiente = i + 1 if i + 1 < self.capacidad else 0
+        if self._tamano < self.capacidad:
+            self._tamano += 1
+        else:
+            self.descartadas += 1
+    
+    def limpiar(self) -> None:
+        """Vacía el historial y libera las referencias a operandos y resultados"""
+        self._a = [None] * self.capacidad
+        self._b = [None] * self.capacidad
+        self._resultados = [None] * self.capacidad
+        self._siguiente = 0
+        self._tamano = 0
+    
+    def __len__(self) -> int:
+        return self._tamano
+    
+    def __getitem__(self, indice: int) -> str:
+        """Operación formateada; 0 es la más antigua conservada y -1 la última"""
+        if indice < 0:
+            indice += self._tamano
+        if not 0 <= indice < self._tamano:
+            raise IndexError("Índice fuera del historial")
+        return self._formatear((self._siguiente - self._tamano + indice) % self.capacidad)
+    
+    def __iter__(self) -> Iterator[str]:
+        inicio = self._siguiente - self._tamano
+        for desplazamiento in range(self._tamano):
+            yield self._formatear((inicio + desplazamiento) % self.capacidad)
+    
+    def _formatear(self, i: int) -> str:
+        return _FORMATOS[self._codigos[i]].format(a=self._a[i], b=self._b[i], r=self._resultados[i])
 
 class Calculadora:
     """
@@ -16,9 +304,18 @@ class Calculadora:
     Incluye historial de operaciones y validación de entrada
     """
     
-    def __init__(self):
-        """Inicializa la calculadora con historial vacío"""
-        self.historial: List[str] = []
+    def __init__(self, capacidad_historial: int = 1000,
+                 cache: Optional[CacheEnterosGrandes] = None):
+        """
+        Inicializa la calculadora con historial vacío
+        
+        Args:
+            capacidad_historial: Operaciones que conserva el historial; al superarla
+                se descartan las más antiguas
+            cache: Caché de factoriales y potencias enteras (por defecto la compartida)
+        """
+        self.historial = HistorialOperaciones(capacidad_historial)
+        self.cache = CACHE_COMPARTIDO if cache is None else cache
         self._precision = 10  # Precisión para operaciones decimales
     
     def sumar(self, a: Union[int, float], b: Union[int, float]) -> Union[int, float]:
@@ -37,21 +334,21 @@ class Calculadora:
         """
         self._validar_numeros(a, b)
         resultado = a + b
-        self.historial.append(f"{a} + {b} = {resultado}")
+        self.historial.registrar(OP_SUMA, a, b, resultado)
         return resultado
     
     def restar(self, a: Union[int, float], b: Union[int, float]) -> Union[int, float]:
         """Resta dos números"""
         self._validar_numeros(a, b)
         resultado = a - b
-        self.historial.append(f"{a} - {b} = {resultado}")
+        self.historial.registrar(OP_RESTA, a, b, resultado)
         return resultado
     
     def multiplicar(self, a: Union[int, float], b: Union[int, float]) -> Union[int, float]:
         """Multiplica dos números"""
         self._validar_numeros(a, b)
         resultado = a * b
-        self.historial.append(f"{a} × {b} = {resultado}")
+        self.historial.registrar(OP_MULTIPLICACION, a, b, resultado)
         return resultado
     
     def dividir(self, a: Union[int, float], b: Union[int, float]) -> float:
@@ -66,14 +363,17 @@ class Calculadora:
             raise ZeroDivisionError("No se puede dividir entre cero")
         
         resultado = a / b
-        self.historial.append(f"{a} ÷ {b} = {resultado}")
+        self.historial.registrar(OP_DIVISION, a, b, resultado)
         return resultado
     
     def potencia(self, base: Union[int, float], exponente: Union[int, float]) -> Union[int, float]:
         """Calcula base elevado a exponente"""
         self._validar_numeros(base, exponente)
-        resultado = base ** exponente
-        self.historial.append(f"{base}^{exponente} = {resultado}")
+        if type(base) is int and type(exponente) is int and exponente >= 0:
+            resultado = self.cache.potencia(base, exponente)
+        else:
+            resultado = base ** exponente
+        self.historial.registrar(OP_POTENCIA, base, exponente, resultado)
         return resultado
     
     def raiz_cuadrada(self, numero: Union[int, float]) -> float:
@@ -88,7 +388,7 @@ class Calculadora:
             raise ValueError("No se puede calcular la raíz cuadrada de un número negativo")
         
         resultado = math.sqrt(numero)
-        self.historial.append(f"√{numero} = {resultado}")
+        self.historial.registrar(OP_RAIZ, numero, None, resultado)
         return resultado
     
     def factorial(self, n: int) -> int:
@@ -106,35 +406,108 @@ class Calculadora:
         if n <= 1:
             resultado = 1
         else:
-            resultado = math.factorial(n)
+            resultado = self.cache.factorial(n)
         
-        self.historial.append(f"{n}! = {resultado}")
+        self.historial.registrar(OP_FACTORIAL, n, None, resultado)
         return resultado
     
-    def promedio(self, numeros: List[Union[int, float]]) -> float:
+    def promedio(self, numeros: Lote) -> float:
         """
-        Calcula el promedio de una lista de números
+        Calcula el promedio de una lista de números o de un array de NumPy
+        Los tipos se validan una vez para todo el lote y la suma es vectorizada
         
         Raises:
             ValueError: Si la lista está vacía
+            TypeError: Si algún elemento no es un número (indica su posición)
         """
-        if not numeros:
+        if len(numeros) == 0:
             raise ValueError("No se puede calcular el promedio de una lista vacía")
         
-        for num in numeros:
-            self._validar_numero(num)
+        valores = self._a_lote(numeros)
+        if valores.dtype.kind in 'iu' and self._cabe_suma_int64(valores):
+            # Suma entera exacta y división correctamente redondeada, como sum(numeros) / len
+            resultado = int(valores.sum()) / valores.size
+        elif valores.dtype.kind in 'iuO':
+            resultado = sum(valores.ravel().tolist()) / valores.size
+        else:
+            resultado = float(valores.sum()) / valores.size
+        
+        self.historial.registrar(OP_PROMEDIO, MuestraLote(valores), None, resultado)
+        return resultado
+    
+    def sumar_lote(self, a: Lote, b: Lote) -> np.ndarray:
+        """
+        Suma elemento a elemento dos lotes (o un lote y un escalar)
+        Registra una sola entrada resumida en el historial
         
-        resultado = sum(numeros) / len(numeros)
-        self.historial.append(f"Promedio de {numeros} = {resultado}")
+        Raises:
+            TypeError: Si algún elemento no es un número
+            ValueError: Si las formas de los lotes no son compatibles
+        """
+        x, y = self._a_lotes(a, b)
+        if x.dtype.kind in 'iu' and y.dtype.kind in 'iu' and not (
+                self._cabe_suma_int64(x, 1) and self._cabe_suma_int64(y, 1)):
+            # Enteros grandes: aritmética de Python para no desbordar int64
+            x, y = x.astype(object), y.astype(object)
+        resultado = np.add(x, y)
+        self.historial.registrar(OP_SUMA_LOTE, resultado.size, None, MuestraLote(resultado))
+        return resultado
+    
+    def dividir_lote(self, a: Lote, b: Lote) -> np.ndarray:
+        """
+        Divide elemento a elemento dos lotes (o un lote y un escalar)
+        
+        Raises:
+            ZeroDivisionError: Si algún divisor es cero (indica las posiciones)
+            TypeError: Si algún elemento no es un número
+        """
+        x, y = self._a_lotes(a, b)
+        ceros = y == 0
+        if ceros.any():
+            raise ZeroDivisionError(f"No se puede dividir entre cero ({_posiciones(ceros)})")
+        resultado = np.true_divide(x, y)
+        self.historial.registrar(OP_DIVISION_LOTE, resultado.size, None, MuestraLote(resultado))
+        return resultado
+    
+    def potencia_lote(self, base: Lote, exponente: Lote) -> np.ndarray:
+        """
+        Eleva cada base a su exponente, con la semántica de base ** exponente:
+        exponentes enteros negativos dan float y los enteros grandes no desbordan
+        
+        Raises:
+            ZeroDivisionError: Si se eleva cero a un exponente negativo
+            ValueError: Si una base negativa tiene exponente no entero (resultado complejo)
+            TypeError: Si algún elemento no es un número
+        """
+        x, y = self._a_lotes(base, exponente)
+        negativos = y < 0
+        ceros = (x == 0) & negativos
+        if ceros.any():
+            raise ZeroDivisionError(f"No se puede elevar cero a un exponente negativo ({_posiciones(ceros)})")
+        if y.dtype.kind == 'f':
+            complejos = (x < 0) & (y != np.floor(y))
+            if complejos.any():
+                raise ValueError(f"Base negativa con exponente no entero ({_posiciones(complejos)})")
+        
+        if x.dtype.kind in 'iu' and y.dtype.kind in 'iu':
+            if negativos.any():
+                x = x.astype(float)
+            else:
+                with np.errstate(over='ignore'):
+                    magnitud = np.abs(x.astype(float)) ** y.astype(float)
+                if magnitud.size and magnitud.max() >= 2 ** 63:
+                    x, y = x.astype(object), y.astype(object)
+        resultado = np.power(x, y)
+        self.historial.registrar(OP_POTENCIA_LOTE, resultado.size, None, MuestraLote(resultado))
         return resultado
     
     def limpiar_historial(self) -> None:
         """Limpia el historial de operaciones"""
-        self.historial.clear()
+        self.historial.limpiar()
     
     def obtener_historial(self) -> List[str]:
-        """Retorna una copia del historial"""
-        return self.historial.copy()
+        """Retorna el historial formateado (lista nueva, de la operación más antigua a la última)"""
+        return list(self.historial)
     
     def _validar_numero(self, numero: Union[int, float]) -> None:
         """Valida que el input sea un número"""
@@ -144,4 +517,65 @@ class Calculadora:
     def _validar_numeros(self, *numeros) -> None:
         """Valida que todos los inputs sean números"""
         for numero in numeros:
-            self._validar_numero(numero)
\ No newline at end of file
+            self._validar_numero(numero)
+    
+    def _a_lote(self, valores: Lote) -> np.ndarray:
+        """
+        Convierte a array validando los tipos una sola vez para todo el lote
+        Un array numérico se acepta por su dtype; en secuencias se comprueba el conjunto
+        de tipos presentes (sin recorrer en Python cada elemento) y solo si hay uno
+        inválido se busca su posición para el mensaje
+        """
+        if isinstance(valores, np.ndarray):
+            if valores.dtype.kind in 'iuf':
+                return self._ampliar_dtype(valores)
+            if valores.dtype.kind != 'O':
+                raise TypeError(f"Se esperaba un lote numérico, se recibió dtype {valores.dtype} (posición 0)")
+            elementos = valores.ravel().tolist()
+        else:
+            elementos = valores if isinstance(valores, (list, tuple)) else list(valores)
+        
+        invalidos = {tipo for tipo in set(map(type, elementos)) if not _es_tipo_numerico(tipo)}
+        if invalidos:
+            posicion, elemento = next((i, x) for i, x in enumerate(elementos) if type(x) in invalidos)
+            raise TypeError(f"Se esperaba un número, se recibió {type(elemento).__name__} (posición {posicion})")
+        
+        lote = np.asarray(valores)
+        if lote.dtype.kind == 'O' and all(issubclass(tipo, float) for tipo in set(map(type, elementos))):
+            lote = lote.astype(float)
+        return self._ampliar_dtype(lote)
+    
+    @staticmethod
+    def _ampliar_dtype(lote: np.ndarray) -> np.ndarray:
+        """
+        Enteros a int64 y floats a float64, como int y float de Python
+        En dtypes estrechos (uint8, int16, float32...) NumPy desborda o redondea en
+        silencio; los uint64 que no caben en int64 pasan a object (int de Python)
+        """
+        tipo = lote.dtype
+        if tipo.kind == 'u' and tipo.itemsize == 8 and lote.size and int(lote.max()) >= 2 ** 63:
+            return lote.astype(object)
+        if tipo.kind in 'iu':
+            return lote.astype(np.int64, copy=False)
+        if tipo.kind == 'f' and tipo.itemsize < 8:
+            return lote.astype(np.float64)
+        return lote
+    
+    def _a_lotes(self, a: Lote, b: Lote) -> tuple:
+        """Dos operandos como arrays con la misma forma (un escalar se difunde)"""
+        x = self._a_lote(a) if np.ndim(a) else self._a_lote([a]).reshape(())
+        y = self._a_lote(b) if np.ndim(b) else self._a_lote([b]).reshape(())
+        try:
+            return np.broadcast_arrays(x, y)
+        except ValueError:
+            raise ValueError(f"Los lotes tienen formas incompatibles: {x.shape} y {y.shape}")
+    
+    @staticmethod
+    def _cabe_suma_int64(valores: np.ndarray, sumandos: int = None) -> bool:
+        """True si sumar los valores (o sumandos+1 de ellos) no puede desbordar int64"""
+        if valores.size == 0:
+            return True
+        maximo = max(abs(int(valores.min())), abs(int(valores.max())))
+        sumandos = valores.size if sumandos is None else sumandos
+        return maximo * (sumandos + 1) < 2 ** 63
+
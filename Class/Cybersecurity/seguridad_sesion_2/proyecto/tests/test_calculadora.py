@@ -9,7 +9,9 @@ Demuestra diferentes tipos de pruebas y técnicas con Pytest
 
 import pytest
 import math
-from src.calculadora import Calculadora
+import sys
+import numpy as np
+from src.calculadora import CACHE_COMPARTIDO, CacheEnterosGrandes, Calculadora, EnteroResumido
 
 class TestOperacionesBasicas:
     """
@@ -194,6 +196,57 @@ class TestHistorial:
         # Verificar que el historial interno no cambió
         historial_actual = calculadora_con_historial.obtener_historial()
         assert "Operación falsa" not in historial_actual
+    
+    def test_historial_circular_descarta_las_mas_antiguas(self):
+        """Con capacidad limitada solo se conservan las últimas operaciones"""
+        calc = Calculadora(capacidad_historial=3)
+        for i in range(5):
+            calc.sumar(i, 1)
+        
+        assert calc.obtener_historial() == ["2 + 1 = 3", "3 + 1 = 4", "4 + 1 = 5"]
+        assert calc.historial[-1] == "4 + 1 = 5"
+        assert calc.historial.descartadas == 2
+        with pytest.raises(IndexError):
+            calc.historial[3]
+    
+    def test_historial_formatea_todas_las_operaciones(self, calculadora_limpia):
+        """El formato diferido coincide con el de cada operación"""
+        numeros = [1, 2, 3]
+        calc = calculadora_limpia
+        calc.restar(5, 3)
+        calc.dividir(9, 3)
+        calc.potencia(2, 3)
+        calc.raiz_cuadrada(16)
+        calc.factorial(5)
+        calc.promedio(numeros)
+        numeros.append(100)  # modificar la lista después no altera el historial
+        
+        assert calc.obtener_historial() == [
+            "5 - 3 = 2", "9 ÷ 3 = 3.0", "2^3 = 8", "√16 = 4.0", "5! = 120",
+            "Promedio de [1, 2, 3] = 2.0"
+        ]
+    
+    def test_enteros_grandes_no_rompen_el_historial(self, calculadora_limpia):
+        """Operandos y resultados enormes se guardan resumidos en todas las operaciones"""
+        calc = calculadora_limpia
+        calc.multiplicar(10 ** 3000, 10 ** 3000)
+        calc.sumar(10 ** 5000, 1)
+        calc.restar(1, 10 ** 5000)
+        calc.dividir(10 ** 5000, 10 ** 4999)
+        calc.sumar(2, 3)
+        
+        assert calc.obtener_historial() == [
+            "≈1.000000e+3000 (3001 dígitos) × ≈1.000000e+3000 (3001 dígitos) = ≈1.000000e+6000 (6001 dígitos)",
+            "≈1.000000e+5000 (5001 dígitos) + 1 = ≈1.000000e+5000 (5001 dígitos)",
+            "1 - ≈1.000000e+5000 (5001 dígitos) = ≈-1.000000e+5000 (5000 dígitos)",
+            "≈1.000000e+5000 (5001 dígitos) ÷ ≈1.000000e+4999 (5000 dígitos) = 10.0",
+            "2 + 3 = 5"
+        ]
+    
+    def test_capacidad_invalida(self):
+        """La capacidad debe ser positiva"""
+        with pytest.raises(ValueError):
+            Calculadora(capacidad_historial=0)
 
 class TestValidacionEntrada:
     """Pruebas para validación de tipos de entrada"""
@@ -230,4 +283,202 @@ class TestValidacionEntrada:
             calculadora_limpia.potencia(entrada_invalida, 2)
         
         with pytest.raises(TypeError):
-            calculadora_limpia.raiz_cuadrada(entrada_invalida)
\ No newline at end of file
+            calculadora_limpia.raiz_cuadrada(entrada_invalida)
+
+class TestOperacionesLote:
+    """Pruebas de las operaciones vectorizadas sobre lotes (listas o arrays de NumPy)"""
+    
+    @pytest.mark.parametrize("convertir", [list, np.array], ids=["lista", "numpy"])
+    def test_operaciones_coinciden_con_escalares(self, calculadora_limpia, convertir):
+        """Cada elemento del lote da lo mismo que la operación escalar"""
+        a = [2, 7, -4, 1.5, 0]
+        b = [3, 2, 2, 0.5, 5]
+        calc = calculadora_limpia
+        
+        esperado_suma = [x + y for x, y in zip(a, b)]
+        esperado_div = [x / y for x, y in zip(a, b)]
+        esperado_pot = [x ** y for x, y in zip(a, b)]
+        
+        assert calc.sumar_lote(convertir(a), convertir(b)).tolist() == esperado_suma
+        assert calc.dividir_lote(convertir(a), convertir(b)).tolist() == pytest.approx(esperado_div)
+        assert calc.potencia_lote(convertir(a), convertir(b)).tolist() == pytest.approx(esperado_pot)
+    
+    def test_escalar_se_difunde(self, calculadora_limpia):
+        """Un operando escalar se aplica a todo el lote"""
+        assert calculadora_limpia.dividir_lote([2, 4, 6], 2).tolist() == [1.0, 2.0, 3.0]
+        assert calculadora_limpia.potencia_lote(2, [0, 1, 10]).tolist() == [1, 2, 1024]
+    
+    def test_division_por_cero_indica_posiciones(self, calculadora_limpia):
+        """Misma excepción que dividir(), con los índices de los divisores nulos"""
+        divisores = np.ones(100)
+        divisores[[3, 42]] = 0
+        
+        with pytest.raises(ZeroDivisionError, match=r"No se puede dividir entre cero \(posiciones \[3, 42\]\)"):
+            calculadora_limpia.dividir_lote(np.arange(100), divisores)
+        assert len(calculadora_limpia.historial) == 0
+    
+    @pytest.mark.parametrize("lote,tipo,posicion", [
+        ([1, 2, "3"], "str", 2),
+        ([1, None, 3], "NoneType", 1),
+        ([1.0, True], "bool", 1),
+    ])
+    def test_tipos_invalidos_indican_posicion(self, calculadora_limpia, lote, tipo, posicion):
+        """Mismo TypeError que las operaciones escalares, con la posición del elemento"""
+        with pytest.raises(TypeError, match=f"se recibió {tipo} \\(posición {posicion}\\)"):
+            calculadora_limpia.sumar_lote(lote, 1)
+        with pytest.raises(TypeError, match=f"posición {posicion}"):
+            calculadora_limpia.promedio(lote)
+    
+    def test_array_no_numerico_rechazado(self, calculadora_limpia):
+        with pytest.raises(TypeError, match="dtype bool"):
+            calculadora_limpia.sumar_lote(np.array([True, False]), 1)
+    
+    def test_enteros_grandes_no_desbordan(self, calculadora_limpia):
+        """Como con int de Python: sin desbordamiento silencioso de int64"""
+        grande = 2 ** 62
+        assert calculadora_limpia.sumar_lote(np.array([grande, 1]), np.array([grande, 1])).tolist() == [2 ** 63, 2]
+        assert calculadora_limpia.potencia_lote([3, 10], [50, 2]).tolist() == [3 ** 50, 100]
+        assert calculadora_limpia.potencia_lote([2, 4], [-1, 2]).tolist() == [0.5, 16.0]
+        assert calculadora_limpia.promedio([2 ** 70, 2 ** 70]) == float(2 ** 70)
+    
+    def test_dtypes_estrechos_no_desbordan(self, calculadora_limpia):
+        """uint8, int16, float32... dan lo mismo que la aritmética de Python"""
+        calc = calculadora_limpia
+        assert calc.sumar_lote(np.array([200], np.uint8), np.array([100], np.uint8)).tolist() == [300]
+        assert calc.potencia_lote(np.array([2], np.uint8), np.array([10], np.uint8)).tolist() == [1024]
+        assert calc.sumar_lote(np.array([-30000], np.int16), np.array([-30000], np.int16)).tolist() == [-60000]
+        assert calc.promedio(np.array([100, 100], np.int8)) == 100.0
+        assert calc.sumar_lote(np.array([0.1], np.float32), 0.2).dtype == np.float64
+        
+        grande = np.array([2 ** 64 - 1, 2 ** 63], np.uint64)
+        assert calc.sumar_lote(grande, 1).tolist() == [2 ** 64, 2 ** 63 + 1]
+        assert calc.potencia_lote(grande, 2).tolist() == [(2 ** 64 - 1) ** 2, 2 ** 126]
+        assert calc.promedio(grande) == (2 ** 64 - 1 + 2 ** 63) / 2
+    
+    def test_potencia_errores_con_posiciones(self, calculadora_limpia):
+        with pytest.raises(ZeroDivisionError, match=r"posiciones \[1\]"):
+            calculadora_limpia.potencia_lote([2, 0], [-1, -1])
+        with pytest.raises(ValueError, match=r"posiciones \[0\]"):
+            calculadora_limpia.potencia_lote([-8, 8], [0.5, 0.5])
+    
+    def test_promedio_de_array(self, calculadora_limpia):
+        """promedio acepta arrays y coincide con sum / len"""
+        valores = np.arange(1, 1_000_001)
+        assert calculadora_limpia.promedio(valores) == 500000.5
+        assert calculadora_limpia.promedio(np.array([1.5, 2.5, 3.0])) == pytest.approx(2.333333, abs=1e-5)
+        with pytest.raises(ValueError, match="lista vacía"):
+            calculadora_limpia.promedio(np.array([]))
+    
+    def test_una_entrada_resumida_en_historial(self, calculadora_limpia):
+        """Un lote entero ocupa una sola entrada, con una muestra del resultado"""
+        calc = calculadora_limpia
+        calc.sumar_lote(np.arange(1000), 1)
+        calc.dividir_lote([1, 2], [4, 4])
+        calc.promedio(list(range(20)))
+        
+        assert calc.obtener_historial() == [
+            "Suma en lote de 1000 elementos = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, ...]",
+            "División en lote de 2 elementos = [0.25, 0.5]",
+            "Promedio de [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, ...] = 9.5"
+        ]
+
+    def test_muestra_resume_enteros_grandes(self, calculadora_limpia):
+        """Un lote con enteros enormes (dtype object) no impide leer el historial"""
+        calc = calculadora_limpia
+        calc.sumar_lote([10 ** 5000], [1])
+        calc.potencia_lote([10, 2], [5000, 3])
+        
+        assert calc.obtener_historial() == [
+            "Suma en lote de 1 elementos = [≈1.000000e+5000 (5001 dígitos)]",
+            "Potencia en lote de 2 elementos = [≈1.000000e+5000 (5001 dígitos), 8]"
+        ]
+
+class TestCacheEnterosGrandes:
+    """Pruebas de la memoización de factoriales y potencias enteras"""
+    
+    def test_factoriales_correctos_en_cualquier_orden(self):
+        """Incremental o directo, el resultado es exactamente math.factorial"""
+        calc = Calculadora(cache=CacheEnterosGrandes())
+        for n in [500, 300, 900, 901, 2000, 150, 1999, 500]:
+            assert calc.factorial(n) == math.factorial(n)
+        assert calc.cache.aciertos == 1
+        assert calc.cache.incrementales == 2  # 900! y 901! parten de 500! y 900!
+    
+    def test_parte_del_factorial_cacheado_mas_cercano(self):
+        cache = CacheEnterosGrandes()
+        cache.factorial(1000)
+        cache.factorial(400)   # sin base inferior: cálculo directo
+        cache.factorial(1200)  # parte de 1000!
+        
+        assert cache.incrementales == 1
+        assert cache.factorial(1200) == math.factorial(1200)
+        assert cache.aciertos == 1
+    
+    def test_presupuesto_en_bytes_descarta_lru(self):
+        """Se respeta el presupuesto descartando primero lo menos usado"""
+        tamano = sys.getsizeof(3 ** 5000)
+        cache = CacheEnterosGrandes(presupuesto_bytes=int(tamano * 2.5))
+        cache.potencia(3, 5000)
+        cache.potencia(3, 5001)
+        cache.potencia(3, 5000)        # 3^5000 pasa a ser la más reciente
+        cache.potencia(3, 5002)        # expulsa 3^5001
+        
+        assert cache.bytes_usados <= cache.presupuesto_bytes
+        assert len(cache) == 2
+        aciertos = cache.aciertos
+        cache.potencia(3, 5000)
+        assert cache.aciertos == aciertos + 1
+        cache.potencia(3, 5001)
+        assert cache.aciertos == aciertos + 1
+    
+    def test_base_incremental_pasa_a_mas_reciente(self):
+        """El k! del que parte un factorial incremental no es el siguiente en descartarse"""
+        tamanos = {n: sys.getsizeof(math.factorial(n)) for n in (1000, 1100, 1500)}
+        cache = CacheEnterosGrandes(presupuesto_bytes=sum(tamanos.values()) - 1)
+        cache.factorial(1000)
+        cache.factorial(1500)
+        cache.factorial(1100)          # parte de 1000!; al guardarse expulsa una entrada
+        
+        assert cache.incrementales == 2
+        aciertos = cache.aciertos
+        cache.factorial(1000)
+        assert cache.aciertos == aciertos + 1
+        assert len(cache) == 2         # se descartó 1500!, la menos usada
+    
+    def test_valores_que_no_caben_no_se_cachean(self):
+        cache = CacheEnterosGrandes(presupuesto_bytes=100)
+        assert cache.factorial(1000) == math.factorial(1000)
+        assert len(cache) == 0 and cache.bytes_usados == 0
+    
+    def test_potencias_enteras_memoizadas(self):
+        cache = CacheEnterosGrandes()
+        calc = Calculadora(cache=cache)
+        
+        assert calc.potencia(3, 5000) == 3 ** 5000
+        assert calc.potencia(3, 5000) == 3 ** 5000
+        assert calc.potencia(2, 10) == 1024        # pequeña: no pasa por la caché
+        assert calc.potencia(2.0, 100) == 2.0 ** 100
+        assert (cache.aciertos, len(cache)) == (1, 1)
+    
+    def test_cache_compartida_por_defecto(self):
+        assert Calculadora().cache is CACHE_COMPARTIDO
+        assert Calculadora().cache is Calculadora().cache
+    
+    def test_historial_resume_enteros_grandes(self, calculadora_limpia):
+        """El historial no guarda el entero completo y se puede leer con n! enorme"""
+        calculadora_limpia.factorial(5000)
+        calculadora_limpia.potencia(2, 100)
+        
+        assert calculadora_limpia.obtener_historial() == [
+            "5000! = ≈4.228578e+16325 (16326 dígitos)",
+            "2^100 = 1267650600228229401496703205376"
+        ]
+    
+    @pytest.mark.parametrize("valor,digitos", [
+        (10 ** 60 - 1, 60), (10 ** 60, 61), (10 ** 200 - 1, 200), (-(10 ** 200), 201),
+        (10 ** 5000 - 1, 5000), (10 ** 5000, 5001), (2 ** 1000, 302),
+    ], ids=["10^60-1", "10^60", "10^200-1", "-10^200", "10^5000-1", "10^5000", "2^1000"])
+    def test_resumen_cuenta_digitos_exactos(self, valor, digitos):
+        """El nº de dígitos es exacto también justo por debajo de una potencia de diez"""
+        assert format(EnteroResumido(valor)).endswith(f"({digitos} dígitos)")
+
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark de UserService.get_user_statistics sobre SQLite
+
+Compara el cálculo anterior (cargar todos los User activos y agrupar en Python)
+con la consulta GROUP BY actual, sobre una tabla de N usuarios (1M por defecto).
+
+Uso:
+    python scripts/benchmark_user_statistics.py
+    python scripts/benchmark_user_statistics.py --rows 200000 --repeat 5
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.models import Base, User
+from src.repositories import UserRepository
+from src.services import RECENT_REGISTRATION_DAYS, UserService
+
+DOMAINS = 50
+INSERT_CHUNK = 50_000
+
+def populate(session, rows: int):
+    """Inserta rows usuarios repartidos en DOMAINS dominios y 180 días de antigüedad"""
+    now = datetime.utcnow()
+    for start in range(0, rows, INSERT_CHUNK):
+        session.execute(insert(User), [{
+            'username': f"user{i}",
+            'email': f"user{i}@domain{i % DOMAINS}.com",
+            'full_name': f"User {i}",
+            'is_active': i % 10 != 0,
+            'created_at': now - timedelta(days=i % 180),
+            'updated_at': now
+        } for i in range(start, min(start + INSERT_CHUNK, rows))])
+    session.commit()
+
+def legacy_statistics(repository: UserRepository):
+    """Cálculo anterior: hidrata todos los usuarios activos y agrupa en Python"""
+    active_count = repository.count_active_users()
+    all_users = repository.get_all_active()
+    since = datetime.utcnow() - timedelta(days=RECENT_REGISTRATION_DAYS)
+    domains = {}
+    for user in all_users:
+        domain = user.email.split('@')[1] if '@' in user.email else 'unknown'
+        domains[domain] = domains.get(domain, 0) + 1
+    return {
+        'total_active_users': active_count,
+        'total_users': len(all_users),
+        'users_by_domain': domains,
+        'recent_registrations': len([u for u in all_users if u.created_at and u.created_at > since])
+    }
+
+def best_time(func, repeat: int):
+    """Mejor tiempo de repeat ejecuciones y el último resultado"""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de get_user_statistics')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Usuarios en la tabla')
+    parser.add_argument('--repeat', type=int, default=3, help='Repeticiones por variante')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/users.db")
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine)
+
+        print(f"📦 Populating {args.rows:,} users...")
+        with Session() as session:
+            populate(session, args.rows)
+
+        def run_legacy():
+            with Session() as session:
+                return legacy_statistics(UserRepository(session))
+
+        def run_aggregate():
+            with Session() as session:
+                return UserService(UserRepository(session)).get_user_statistics()
+
+        aggregate_time, aggregate = best_time(run_aggregate, args.repeat)
+        legacy_time, legacy = best_time(run_legacy, args.repeat)
+        engine.dispose()
+
+    print(f"{'variant':<22}{'best (s)':>10}")
+    print(f"{'ORM + Python':<22}{legacy_time:>10.3f}")
+    print(f"{'SQL GROUP BY':<22}{aggregate_time:>10.3f}")
+    print(f"⚡ Speedup: {legacy_time / aggregate_time:.1f}x")
+
+    if aggregate != legacy:
+        print("❌ Results differ between variants")
+        return 1
+    print(f"✅ Same statistics ({aggregate['total_active_users']:,} active users, "
+          f"{len(aggregate['users_by_domain'])} domains)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,18 +4,253 @@
 
 """Cliente para servicios externos - perfecto para unit testing con mocks"""
 
+import atexit
+import queue
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import requests
-from typing import Dict, Any, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+from typing import Dict, Any, Callable, Hashable, Iterable, List, Optional, Tuple
 from .exceptions import ExternalServiceError
 
+# Códigos del batch endpoint que indican que el servicio no lo ofrece
+BATCH_UNSUPPORTED_STATUS = (404, 405, 501)
+
+# Respuestas transitorias que se reintentan
+RETRY_STATUS = (502, 503, 504)
+
+class TTLCache:
+    """
+    Caché LRU con caducidad por entrada, segura entre hilos
+    maxsize=0 la desactiva; clock es inyectable para las pruebas
+    """
+    
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Valor vigente o None; un acierto lo mueve al final (más reciente)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self.clock():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+# Senders con hilo activo: al salir del intérprete se envía lo que quede en cola
+_live_senders = weakref.WeakSet()
+
+@atexit.register
+def _close_live_senders():
+    for sender in list(_live_senders):
+        sender.close()
+
+class NotificationSender:
+    """
+    Envío de notificaciones en segundo plano (fire-and-forget)
+    Un hilo agrupa hasta batch_size notificaciones o las que lleguen en
+    flush_interval segundos y las envía en una sola petición. Si la cola
+    está llena la notificación se descarta: nunca bloquea al llamante.
+    Lo pendiente se envía en close() o, si nadie lo llama, al salir del proceso
+    """
+    
+    _STOP = object()
+    
+    def __init__(self, send_batch: Callable[[List[Dict[str, Any]]], bool],
+                 batch_size: int = 50, flush_interval: float = 0.5, max_queue: int = 10000):
+        self.send_batch = send_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._stopping = None
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+    
+    def submit(self, item: Dict[str, Any]) -> bool:
+        """Encola sin esperar; False si la cola está llena y se descartó"""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+    
+    def close(self, timeout: float = 5.0) -> None:
+        """
+        Envía lo pendiente y detiene el hilo, esperando como mucho timeout segundos
+        Con la cola llena no se puede encolar la marca de parada: el hilo sale al vaciarla
+        """
+        with self._lock:
+            thread, stopping, self._thread = self._thread, self._stopping, None
+        if thread is None:
+            return
+        _live_senders.discard(self)
+        deadline = time.monotonic() + timeout
+        stopping.set()
+        try:
+            self._queue.put(self._STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        thread.join(max(0.0, deadline - time.monotonic()))
+    
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._stopping = threading.Event()
+                self._thread = threading.Thread(target=self._run, args=(self._stopping,),
+                                                name='notification-sender', daemon=True)
+                self._thread.start()
+                _live_senders.add(self)
+    
+    def _run(self, stopping: threading.Event):
+        done = False
+        while not done:
+            if stopping.is_set() and self._queue.empty():
+                return
+            item = self._queue.get()
+            if item is self._STOP:
+                if stopping.is_set():
+                    return
+                continue  # Marca de parada de un hilo anterior
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    done = stopping.is_set()
+                    if done:
+                        break
+                    continue
+                batch.append(item)
+            self._flush(batch)
+    
+    def _flush(self, batch: List[Dict[str, Any]]):
+        try:
+            ok = self.send_batch(batch)
+        except Exception:
+            ok = False
+        with self._lock:
+            if ok:
+                self.sent += len(batch)
+            else:
+                self.failed += len(batch)
+
+class CircuitBreaker:
+    """
+    Circuit breaker para el servicio de validación
+    Tras failure_threshold fallos seguidos se abre y las llamadas fallan al momento
+    durante reset_timeout segundos; después deja pasar una llamada de prueba
+    (half-open) que lo cierra si sale bien o lo vuelve a abrir si falla
+    """
+    
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+    
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+    
+    def before_call(self):
+        """Lanza ExternalServiceError si el circuito no admite la llamada"""
+        with self._lock:
+            if self.state == self.OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+        raise ExternalServiceError("Circuito abierto: servicio de validación no disponible")
+    
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = self.clock()
+
+def _is_service_failure(error: ExternalServiceError) -> bool:
+    """Un 4xx es un rechazo de la petición, no una caída del servicio"""
+    cause = error.__cause__ or error.__context__
+    response = getattr(cause, 'response', None)
+    status = getattr(response, 'status_code', None)
+    return not (isinstance(status, int) and 400 <= status < 500)
+
 class ExternalUserValidationClient:
     """
     Cliente que valida usuarios contra un servicio externo
     Ejemplo perfecto de dependencia externa que necesita mocking
     """
     
-    def __init__(self, base_url: str, api_key: str, timeout: int = 30):
-        """Inicializa cliente con configuración"""
+    def __init__(self, base_url: str, api_key: str, timeout: int = 30,
+                 email_cache_size: int = 1024, email_cache_ttl: float = 300.0,
+                 notification_batch_size: int = 50, notification_flush_interval: float = 0.5,
+                 pool_connections: int = 4, pool_maxsize: int = 16,
+                 retries: int = 2, retry_backoff: float = 0.1,
+                 breaker_threshold: int = 5, breaker_reset_timeout: float = 30.0,
+                 email_batch_size: int = 100, max_parallel: int = 8):
+        """
+        Inicializa cliente con configuración
+        Los resultados de validate_email se guardan en una caché TTL+LRU por dirección
+        (email_cache_size=0 la desactiva); las notificaciones encoladas con
+        queue_user_created se envían en lotes desde un hilo en segundo plano.
+        Las conexiones se reutilizan (keep-alive) desde un pool de pool_maxsize por host;
+        las validaciones se reintentan ante errores de conexión y 502/503/504 con backoff
+        exponencial y jitter, y pasan por un circuit breaker compartido. Un timeout de
+        lectura no se reintenta: un servicio colgado cuesta como mucho un timeout
+        """
         self.base_url = base_url.rstrip('/')
         self.api_key = api_key
         self.timeout = timeout
@@ -24,12 +259,160 @@ class ExternalUserValidationClient:
             'Authorization': f'Bearer {api_key}',
             'Content-Type': 'application/json'
         })
+        retry = Retry(
+            total=retries,
+            read=0,
+            status_forcelist=RETRY_STATUS,
+            allowed_methods=frozenset({'GET', 'POST'}),
+            backoff_factor=retry_backoff,
+            backoff_jitter=retry_backoff,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                              max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # Las notificaciones no se reintentan: un reintento podría duplicarlas
+        self.session.mount(f"{self.base_url}/notifications/",
+                           HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=0))
+        
+        self.circuit_breaker = CircuitBreaker(breaker_threshold, breaker_reset_timeout)
+        self.email_batch_size = email_batch_size
+        self.max_parallel = max_parallel
+        self.batch_supported = True
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        
+        self.email_cache = TTLCache(maxsize=email_cache_size, ttl=email_cache_ttl)
+        self.notifications = NotificationSender(
+            self._send_notification_batch,
+            batch_size=notification_batch_size,
+            flush_interval=notification_flush_interval
+        )
+    
+    def close(self):
+        """Envía las notificaciones pendientes y cierra las conexiones"""
+        self.notifications.close()
+        if self._executor:
+            self._executor.shutdown(wait=False)
+        self.session.close()
     
     def validate_email(self, email: str) -> Dict[str, Any]:
         """
         Valida email contra servicio externo
         Esta función será mockeada en unit tests
+        Solo se cachean respuestas correctas; los errores se reintentan en la siguiente llamada
         """
+        cache_key = self._email_cache_key(email)
+        cached = self.email_cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)
+        
+        result = self._guarded(self._fetch_email_validation, email)
+        self.email_cache.put(cache_key, result)
+        return dict(result)
+    
+    def validate_emails(self, emails: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Valida muchos emails de una vez (importaciones masivas)
+        Primero la caché; el resto en lotes de email_batch_size con POST /validate/emails.
+        Si el servicio no tiene ese endpoint (404/405/501) o un lote falla, esos emails se
+        validan uno a uno en paralelo, con como mucho max_parallel peticiones a la vez.
+        Devuelve {email: resultado}; los que no se pudieron validar no aparecen
+        """
+        results = {}
+        pending = []
+        for email in dict.fromkeys(emails):
+            cached = self.email_cache.get(self._email_cache_key(email))
+            if cached is not None:
+                results[email] = dict(cached)
+            else:
+                pending.append(email)
+        
+        for start in range(0, len(pending), self.email_batch_size):
+            chunk = pending[start:start + self.email_batch_size]
+            batch = None
+            if self.batch_supported:
+                try:
+                    batch = self._guarded(self._fetch_email_batch, chunk)
+                except ExternalServiceError:
+                    batch = None
+            if batch is None:
+                batch = self._validate_each(chunk)
+            for email, result in batch.items():
+                self.email_cache.put(self._email_cache_key(email), result)
+                results[email] = dict(result)
+        
+        return results
+    
+    def _email_cache_key(self, email: str) -> Tuple[str, str]:
+        # El dominio no distingue mayúsculas: misma clave para User@Example.com y User@example.com
+        local, _, domain = email.strip().rpartition('@')
+        return domain.lower(), local
+    
+    def _guarded(self, call: Callable, *args):
+        """Ejecuta una llamada al servicio de validación a través del circuit breaker"""
+        self.circuit_breaker.before_call()
+        try:
+            result = call(*args)
+        except ExternalServiceError as e:
+            if _is_service_failure(e):
+                self.circuit_breaker.record_failure()
+            else:
+                self.circuit_breaker.record_success()
+            raise
+        self.circuit_breaker.record_success()
+        return result
+    
+    def _validate_each(self, emails: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Modo por elemento: validate_email en paralelo, acotado por max_parallel"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_parallel,
+                                                    thread_name_prefix='email-validation')
+        futures = {email: self._executor.submit(self.validate_email, email) for email in emails}
+        results = {}
+        for email, future in futures.items():
+            try:
+                results[email] = future.result()
+            except ExternalServiceError:
+                pass
+        return results
+    
+    def _fetch_email_batch(self, emails: List[str]) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Un POST por lote; None si el servicio no ofrece el batch endpoint"""
+        try:
+            response = self.session.post(
+                f"{self.base_url}/validate/emails",
+                json={'emails': emails},
+                timeout=self.timeout
+            )
+            if response.status_code in BATCH_UNSUPPORTED_STATUS:
+                self.batch_supported = False
+                return None
+            response.raise_for_status()
+            
+            return {item['email']: self._email_result(item) for item in response.json()['results']}
+        
+        except requests.exceptions.Timeout:
+            raise ExternalServiceError("Timeout validando lote de emails")
+        except requests.exceptions.ConnectionError:
+            raise ExternalServiceError("Error de conexión con servicio de validación")
+        except requests.exceptions.HTTPError as e:
+            raise ExternalServiceError(f"Error HTTP {e.response.status_code}: {e.response.text}")
+        except Exception as e:
+            raise ExternalServiceError(f"Error inesperado validando lote de emails: {str(e)}")
+    
+    @staticmethod
+    def _email_result(data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'valid': data.get('valid', False),
+            'deliverable': data.get('deliverable', False),
+            'risk_score': data.get('risk_score', 1.0),
+            'provider': data.get('provider', 'unknown')
+        }
+    
+    def _fetch_email_validation(self, email: str) -> Dict[str, Any]:
         try:
             response = self.session.get(
                 f"{self.base_url}/validate/email",
@@ -38,13 +421,7 @@ class ExternalUserValidationClient:
             )
             response.raise_for_status()
             
-            data = response.json()
-            return {
-                'valid': data.get('valid', False),
-                'deliverable': data.get('deliverable', False),
-                'risk_score': data.get('risk_score', 1.0),
-                'provider': data.get('provider', 'unknown')
-            }
+            return self._email_result(response.json())
         
         except requests.exceptions.Timeout:
             raise ExternalServiceError("Timeout validando email")
@@ -60,6 +437,9 @@ class ExternalUserValidationClient:
         Verifica reputación del usuario en servicios externos
         Otra función ideal para mocking
         """
+        return self._guarded(self._fetch_reputation, username, email)
+    
+    def _fetch_reputation(self, username: str, email: str) -> Dict[str, Any]:
         try:
             payload = {
                 'username': username,
@@ -101,4 +481,24 @@ class ExternalUserValidationClient:
         
         except requests.exceptions.RequestException:
             # Notificación no crítica, no fallar el proceso principal
-            return False
\ No newline at end of file
+            return False
+    
+    def queue_user_created(self, user_data: Dict[str, Any]) -> bool:
+        """
+        Versión fire-and-forget de notify_user_created: encola y vuelve al momento
+        Retorna False si la notificación se descartó por tener la cola llena
+        """
+        return self.notifications.submit(user_data)
+    
+    def _send_notification_batch(self, users: List[Dict[str, Any]]) -> bool:
+        """Un único POST con todas las notificaciones del lote"""
+        try:
+            response = self.session.post(
+                f"{self.base_url}/notifications/user_created/batch",
+                json={'users': users},
+                timeout=self.timeout
+            )
+            return response.status_code < 300
+        except requests.exceptions.RequestException:
+            return False
+
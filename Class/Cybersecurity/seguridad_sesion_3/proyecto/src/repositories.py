@@ -4,12 +4,38 @@
 
 """Capa de acceso a datos - Repository Pattern"""
 
+from datetime import datetime
+from sqlalchemy import case, func, insert, select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from typing import List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 from .models import User
 from .exceptions import UserNotFoundError, UserAlreadyExistsError
 
+# Columnas que devuelve iter_active_rows (sin estado del ORM)
+USER_ROW_COLUMNS = (User.id, User.username, User.email, User.full_name,
+                    User.is_active, User.created_at, User.updated_at)
+
+# Máximo de valores por IN (...) para no superar el límite de parámetros de SQLite
+IN_CLAUSE_CHUNK = 900
+
+def _email_domain(dialect_name: str):
+    """
+    Expresión SQL equivalente a email.split('@')[1] (o 'unknown' sin '@')
+    PostgreSQL no tiene instr: allí se usa split_part; el resto usa instr/substr
+    """
+    if dialect_name == 'postgresql':
+        return case((func.strpos(User.email, '@') > 0, func.split_part(User.email, '@', 2)),
+                    else_='unknown')
+    at = func.instr(User.email, '@')
+    rest = func.substr(User.email, at + 1)
+    next_at = func.instr(rest, '@')
+    return case(
+        (at == 0, 'unknown'),
+        (next_at > 0, func.substr(rest, 1, next_at - 1)),
+        else_=rest
+    )
+
 class UserRepository:
     """
     Repository para operaciones de base de datos de usuarios
@@ -38,6 +64,49 @@ class UserRepository:
             else:
                 raise UserAlreadyExistsError("Usuario ya existe")
     
+    def bulk_create(self, users: List[User]) -> List[User]:
+        """
+        Inserta varios usuarios con un único INSERT ejecutado como executemany
+        Los usuarios deben venir validados y sin conflictos conocidos (ver create_users_batch).
+        Si aun así hay una violación de unicidad (p. ej. una inserción concurrente),
+        se reintenta fila a fila dentro de savepoints: las filas en conflicto se omiten
+        sin abortar el lote y no aparecen en la lista devuelta
+        """
+        if not users:
+            return []
+        
+        mappings = [{
+            'username': user.username,
+            'email': user.email,
+            'full_name': user.full_name,
+            'is_active': user.is_active,
+            'created_at': user.created_at,
+            'updated_at': user.updated_at
+        } for user in users]
+        
+        try:
+            with self.session.begin_nested():
+                # Sin sort_by_parameter_order: en SQLite obligaría a un INSERT por fila.
+                # El username es único, así que se reordena por él
+                inserted = {
+                    user.username: user
+                    for user in self.session.scalars(insert(User).returning(User), mappings)
+                }
+            return [inserted[user.username] for user in users]
+        except IntegrityError:
+            pass
+        
+        created = []
+        for user in users:
+            try:
+                with self.session.begin_nested():
+                    self.session.add(user)
+                    self.session.flush()
+                created.append(user)
+            except IntegrityError:
+                continue
+        return created
+    
     def get_by_id(self, user_id: int) -> User:
         """Obtiene usuario por ID"""
         user = self.session.query(User).filter(User.id == user_id).first()
@@ -63,6 +132,32 @@ class UserRepository:
         """Obtiene todos los usuarios activos"""
         return self.session.query(User).filter(User.is_active == True).all()
     
+    def iter_active_rows(self, batch_size: int = 1000,
+                         as_dict: bool = False) -> Iterator[Union[Tuple, Dict[str, Any]]]:
+        """
+        Recorre los usuarios activos por páginas de clave primaria (WHERE id > último LIMIT n)
+        Devuelve filas ligeras (tuplas con nombre o dicts), no objetos User, así que la
+        sesión no retiene nada y la memoria no crece con el tamaño de la tabla.
+        Cada página es una consulta nueva: las filas insertadas durante el recorrido
+        con id mayor que el último leído también aparecen
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size debe ser mayor que 0")
+        
+        last_id = 0
+        while True:
+            rows = self.session.execute(
+                select(*USER_ROW_COLUMNS)
+                .where(User.is_active == True, User.id > last_id)
+                .order_by(User.id)
+                .limit(batch_size)
+            ).all()
+            for row in rows:
+                yield row._asdict() if as_dict else row
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1].id
+    
     def update(self, user: User) -> User:
         """
         Actualiza usuario existente
@@ -95,6 +190,43 @@ class UserRepository:
         """Verifica si existe un email"""
         return self.session.query(User).filter(User.email == email.lower()).count() > 0
     
+    def existing_usernames(self, usernames: Iterable[str]) -> Set[str]:
+        """Usernames (en minúsculas) que ya existen, con una consulta IN por bloque"""
+        return self._existing(User.username, usernames)
+    
+    def existing_emails(self, emails: Iterable[str]) -> Set[str]:
+        """Emails (en minúsculas) que ya existen, con una consulta IN por bloque"""
+        return self._existing(User.email, emails)
+    
+    def _existing(self, column, values: Iterable[str]) -> Set[str]:
+        values = sorted({value.lower() for value in values})
+        found = set()
+        for start in range(0, len(values), IN_CLAUSE_CHUNK):
+            chunk = values[start:start + IN_CLAUSE_CHUNK]
+            found.update(row[0] for row in self.session.query(column).filter(column.in_(chunk)))
+        return found
+    
     def count_active_users(self) -> int:
         """Cuenta usuarios activos"""
-        return self.session.query(User).filter(User.is_active == True).count()
\ No newline at end of file
+        return self.session.query(User).filter(User.is_active == True).count()
+    
+    def active_user_statistics(self, created_since: datetime) -> Dict[str, Any]:
+        """
+        Estadísticas de usuarios activos con una sola consulta GROUP BY
+        Por dominio (como email.split('@')[1]) cuenta el total y los creados después de created_since;
+        no carga objetos User, solo una fila por dominio
+        """
+        domain = _email_domain(self.session.get_bind().dialect.name).label('domain')
+        recent = func.sum(case((User.created_at > created_since, 1), else_=0))
+        rows = (
+            self.session.query(domain, func.count(User.id), recent)
+            .filter(User.is_active == True)
+            .group_by(domain)
+            .all()
+        )
+        
+        return {
+            'total': sum(count for _, count, _ in rows),
+            'by_domain': {name: count for name, count, _ in rows},
+            'recent': sum(recent_count or 0 for _, _, recent_count in rows)
+        }
\ No newline at end of file
@@ -4,12 +4,22 @@
 
 """Capa de lógica de negocio - combina repositories y servicios externos"""
 
-from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
 from .models import User
 from .repositories import UserRepository
 from .api_client import ExternalUserValidationClient
 from .exceptions import InvalidUserDataError, UserAlreadyExistsError, ExternalServiceError
 
+# Ventana (días) para contar un registro como reciente en las estadísticas
+RECENT_REGISTRATION_DAYS = 30
+
+# Hilos compartidos para lanzar en paralelo las validaciones externas de cada alta
+EXTERNAL_VALIDATION_WORKERS = 8
+_external_calls = ThreadPoolExecutor(max_workers=EXTERNAL_VALIDATION_WORKERS,
+                                     thread_name_prefix='external-validation')
+
 class UserService:
     """
     Servicio de usuarios que combina múltiples componentes
@@ -43,33 +53,172 @@ class UserService:
             raise UserAlreadyExistsError(f"Email '{email}' ya existe")
         
         # 3. Validación externa opcional (usando API client)
-        if validate_externally and self.validation_client:
-            try:
-                email_validation = self.validation_client.validate_email(email)
-                if not email_validation.get('valid', False):
-                    raise InvalidUserDataError("Email no válido según servicio externo")
-                
-                reputation = self.validation_client.check_user_reputation(username, email)
-                if reputation.get('blocked', False):
-                    raise InvalidUserDataError("Usuario bloqueado por política de seguridad")
-                
-            except ExternalServiceError:
-                # En production, decidir si continuar o fallar
-                # Para este ejemplo, continuamos con warning
-                pass
+        if validate_externally:
+            rejection = self._external_rejection(user)
+            if rejection:
+                raise rejection
         
         # 4. Crear usuario en base de datos
         created_user = self.repository.create(user)
         
-        # 5. Notificación externa (no crítica)
-        if self.validation_client:
+        # 5. Notificación externa (no crítica, en segundo plano)
+        self._queue_notifications([created_user])
+        
+        return created_user
+    
+    def create_users_batch(self, users_data: List[Dict[str, Any]],
+                           validate_externally: bool = True) -> Dict[str, Any]:
+        """
+        Crea varios usuarios de una vez sin abortar el lote por filas inválidas
+        - Valida cada fila con el modelo
+        - Comprueba unicidad con una consulta IN por clave (username, email)
+          y detecta duplicados dentro del propio lote
+        - Valida los emails en bloque con validate_emails y la reputación de todas
+          las filas en paralelo (validación externa)
+        - Inserta las filas válidas con un único executemany
+        Devuelve {'created': [User], 'errors': [{'index', 'username', 'email', 'error'}]}
+        """
+        errors = []
+        candidates = []
+        
+        def reject(index: int, data: Dict[str, Any], error: Exception):
+            errors.append({
+                'index': index,
+                'username': data.get('username'),
+                'email': data.get('email'),
+                'error': f"{type(error).__name__}: {error}"
+            })
+        
+        # 1. Validación básica usando el modelo
+        for index, data in enumerate(users_data):
+            try:
+                user = User(username=data.get('username'), email=data.get('email'),
+                            full_name=data.get('full_name'))
+            except (ValueError, TypeError) as e:
+                reject(index, data, InvalidUserDataError(f"Datos inválidos: {str(e)}"))
+                continue
+            candidates.append((index, data, user))
+        
+        # 2. Unicidad: una consulta por clave para todo el lote
+        taken_usernames = self.repository.existing_usernames(u.username for _, _, u in candidates)
+        taken_emails = self.repository.existing_emails(u.email for _, _, u in candidates)
+        
+        # 3. Validación externa de todo el lote antes de decidir fila a fila: emails en
+        #    bloque y reputación en paralelo (como mucho max_parallel filas a la vez).
+        #    Solo se consulta la primera aparición de cada clave; un duplicado del lote
+        #    se comprueba después solo si la fila anterior fue rechazada
+        external = {}
+        check_externally = validate_externally and self.validation_client is not None
+        if check_externally:
+            seen_usernames, seen_emails = set(taken_usernames), set(taken_emails)
+            fresh = []
+            for index, _, user in candidates:
+                if user.username not in seen_usernames and user.email not in seen_emails:
+                    seen_usernames.add(user.username)
+                    seen_emails.add(user.email)
+                    fresh.append((index, user))
+            try:
+                email_results = self.validation_client.validate_emails([u.email for _, u in fresh])
+            except ExternalServiceError:
+                email_results = {}
+            external = self._external_rejections(fresh, email_results)
+        
+        pending = []
+        for index, data, user in candidates:
+            if user.username in taken_usernames:
+                reject(index, data, UserAlreadyExistsError(f"Username '{data['username']}' ya existe"))
+            elif user.email in taken_emails:
+                reject(index, data, UserAlreadyExistsError(f"Email '{data['email']}' ya existe"))
+            elif check_externally and (rejection := external[index] if index in external
+                                       else self._external_rejection(user)):
+                reject(index, data, rejection)
+            else:
+                # Las siguientes filas del lote con la misma clave son duplicados
+                taken_usernames.add(user.username)
+                taken_emails.add(user.email)
+                pending.append((index, data, user))
+        
+        # 4. Inserción en bloque; filas rechazadas por la BD (carrera) se reportan igual,
+        #    volviendo a consultar qué clave está ocupada ahora
+        created = self.repository.bulk_create([user for _, _, user in pending])
+        inserted = {user.username for user in created}
+        dropped = [(index, data, user) for index, data, user in pending if user.username not in inserted]
+        if dropped:
+            taken_usernames = self.repository.existing_usernames(u.username for _, _, u in dropped)
+            taken_emails = self.repository.existing_emails(u.email for _, _, u in dropped)
+            for index, data, user in dropped:
+                if user.username in taken_usernames:
+                    reject(index, data, UserAlreadyExistsError(f"Username '{data['username']}' ya existe"))
+                elif user.email in taken_emails:
+                    reject(index, data, UserAlreadyExistsError(f"Email '{data['email']}' ya existe"))
+                else:
+                    reject(index, data, UserAlreadyExistsError("Usuario ya existe"))
+        
+        # 5. Notificación externa (no crítica, en segundo plano)
+        self._queue_notifications(created)
+        
+        errors.sort(key=lambda error: error['index'])
+        return {'created': created, 'errors': errors}
+    
+    def _external_rejections(self, rows: List[Tuple[int, User]],
+                             email_results: Dict[str, Dict[str, Any]]) -> Dict[int, Optional[InvalidUserDataError]]:
+        """
+        Validación externa de un lote: {índice: rechazo o None}
+        Las filas se comprueban a la vez (como mucho max_parallel del cliente) y se
+        esperan todas juntas, no una detrás de otra. Por fila se usa el resultado del
+        email obtenido en bloque (o se consulta si falta) y, si es válido, la reputación
+        """
+        def check(user: User) -> Optional[InvalidUserDataError]:
             try:
-                self.validation_client.notify_user_created(created_user.to_dict())
+                email_validation = email_results.get(user.email)
+                if email_validation is None:
+                    email_validation = self.validation_client.validate_email(user.email)
+                if not email_validation.get('valid', False):
+                    return InvalidUserDataError("Email no válido según servicio externo")
+                reputation = self.validation_client.check_user_reputation(user.username, user.email)
+                if reputation.get('blocked', False):
+                    return InvalidUserDataError("Usuario bloqueado por política de seguridad")
             except ExternalServiceError:
-                # Notificación no crítica, no fallar
                 pass
+            return None
         
-        return created_user
+        if not rows:
+            return {}
+        with ThreadPoolExecutor(max_workers=self.validation_client.max_parallel,
+                                thread_name_prefix='batch-validation') as pool:
+            return dict(zip([index for index, _ in rows], pool.map(check, [user for _, user in rows])))
+    
+    def _external_rejection(self, user: User) -> Optional[InvalidUserDataError]:
+        """
+        Validación externa: email y reputación se consultan en paralelo
+        Los errores del servicio externo no bloquean el alta (en production, decidir
+        si continuar o fallar); un email no válido rechaza sin esperar la reputación
+        """
+        if not self.validation_client:
+            return None
+        email_check = _external_calls.submit(self.validation_client.validate_email, user.email)
+        reputation_check = _external_calls.submit(
+            self.validation_client.check_user_reputation, user.username, user.email)
+        try:
+            email_validation = email_check.result()
+            if not email_validation.get('valid', False):
+                # Si la reputación aún no ha salido, no se llega a pedir
+                reputation_check.cancel()
+                return InvalidUserDataError("Email no válido según servicio externo")
+            
+            reputation = reputation_check.result()
+            if reputation.get('blocked', False):
+                return InvalidUserDataError("Usuario bloqueado por política de seguridad")
+        except ExternalServiceError:
+            pass
+        return None
+    
+    def _queue_notifications(self, users: List[User]):
+        """Encola las notificaciones de alta; el cliente las envía en lotes sin bloquear"""
+        if not self.validation_client:
+            return
+        for user in users:
+            self.validation_client.queue_user_created(user.to_dict())
     
     def get_user(self, user_id: int) -> User:
         """Obtiene usuario por ID - simple delegación"""
@@ -113,29 +262,15 @@ class UserService:
     def get_user_statistics(self) -> Dict[str, Any]:
         """
         Obtiene estadísticas de usuarios
-        Función que coordina múltiples consultas
+        Se agregan en la BD (GROUP BY por dominio): no se cargan los usuarios en memoria
         """
-        active_count = self.repository.count_active_users()
-        all_users = self.repository.get_all_active()
+        stats = self.repository.active_user_statistics(
+            created_since=datetime.utcnow() - timedelta(days=RECENT_REGISTRATION_DAYS)
+        )
         
         return {
-            'total_active_users': active_count,
-            'total_users': len(all_users) if all_users else 0,
-            'users_by_domain': self._group_users_by_email_domain(all_users),
-            'recent_registrations': len([u for u in all_users if self._is_recent_user(u)])
-        }
-    
-    def _group_users_by_email_domain(self, users: List[User]) -> Dict[str, int]:
-        """Agrupa usuarios por dominio de email - lógica interna"""
-        domains = {}
-        for user in users:
-            domain = user.email.split('@')[1] if '@' in user.email else 'unknown'
-            domains[domain] = domains.get(domain, 0) + 1
-        return domains
-    
-    def _is_recent_user(self, user: User) -> bool:
-        """Determina si es un usuario reciente - lógica interna"""
-        from datetime import datetime, timedelta
-        if not user.created_at:
-            return False
-        return user.created_at > datetime.utcnow() - timedelta(days=30)
\ No newline at end of file
+            'total_active_users': stats['total'],
+            'total_users': stats['total'],
+            'users_by_domain': stats['by_domain'],
+            'recent_registrations': stats['recent']
+        }
\ No newline at end of file
@@ -26,7 +26,9 @@ def mock_repository():
 @pytest.fixture
 def mock_api_client():
     """Mock de ExternalUserValidationClient para unit tests"""
-    return Mock(spec=ExternalUserValidationClient)
+    client = Mock(spec=ExternalUserValidationClient)
+    client.max_parallel = 4  # atributo de instancia: spec no lo incluye
+    return client
 
 @pytest.fixture
 def user_service_with_mocks(mock_repository, mock_api_client):
@@ -8,8 +8,12 @@ Enfoque: Probar que componentes trabajen juntos con BD real
 """
 
 import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.exc import IntegrityError
 from src.models import User
+from src.repositories import _email_domain
 from src.exceptions import UserNotFoundError, UserAlreadyExistsError
 
 @pytest.mark.integration
@@ -122,4 +126,130 @@ class TestUserRepositoryIntegration:
         active_usernames = [u.username for u in active_users]
         assert "user1" in active_usernames
         assert "user3" in active_usernames
-        assert "user2" not in active_usernames
\ No newline at end of file
+        assert "user2" not in active_usernames
+    
+    def test_bulk_create_inserts_in_one_statement(self, real_repository, test_session, test_engine):
+        """bulk_create usa un único INSERT (executemany) y devuelve los IDs"""
+        # Arrange
+        statements = []
+        event.listen(test_engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+        users = [User(f"bulk{i}", f"bulk{i}@example.com", f"Bulk {i}") for i in range(500)]
+        
+        # Act
+        created = real_repository.bulk_create(users)
+        test_session.commit()
+        
+        # Assert
+        inserts = [s for s in statements if s.lstrip().upper().startswith('INSERT')]
+        assert len(created) == 500
+        assert [u.username for u in created] == [f"bulk{i}" for i in range(500)]
+        assert all(u.id is not None for u in created)
+        assert len(inserts) <= 2  # insertmanyvalues puede partir lotes grandes
+        assert real_repository.count_active_users() == 500
+    
+    def test_bulk_create_skips_rows_rejected_by_database(self, real_repository, test_session):
+        """Una violación de unicidad no aborta el lote: se omite solo esa fila"""
+        # Arrange
+        real_repository.create(User("alice", "alice@example.com", "Alice"))
+        test_session.commit()
+        users = [
+            User("bob", "bob@example.com", "Bob"),
+            User("alice", "other@example.com", "Alice Again"),
+            User("carol", "carol@example.com", "Carol")
+        ]
+        
+        # Act
+        created = real_repository.bulk_create(users)
+        test_session.commit()
+        
+        # Assert
+        assert [u.username for u in created] == ["bob", "carol"]
+        assert real_repository.count_active_users() == 3
+    
+    def test_existing_keys_lookup(self, real_repository, users_in_db):
+        """Consulta IN por clave, sin distinguir mayúsculas"""
+        assert real_repository.existing_usernames(["ALICE", "bob", "zoe"]) == {"alice", "bob"}
+        assert real_repository.existing_emails(["charlie@demo.org", "x@y.com"]) == {"charlie@demo.org"}
+        assert real_repository.existing_usernames([]) == set()
+    
+    def test_active_user_statistics_aggregates_in_sql(self, real_repository, test_session):
+        """Agregados por dominio y ventana de registro sin cargar objetos User"""
+        # Arrange
+        old = datetime.utcnow() - timedelta(days=90)
+        users = [User(f"user{i}", f"user{i}@{'gmail.com' if i % 3 else 'corp.org'}", f"User {i}")
+                 for i in range(30)]
+        for user in users[:10]:
+            user.created_at = old
+        users[-1].deactivate()
+        real_repository.bulk_create(users)
+        test_session.commit()
+        test_session.expunge_all()
+        
+        # Act
+        stats = real_repository.active_user_statistics(datetime.utcnow() - timedelta(days=30))
+        
+        # Assert
+        assert stats == {'total': 29, 'by_domain': {'gmail.com': 19, 'corp.org': 10}, 'recent': 19}
+        assert len(test_session.identity_map) == 0
+    
+    def test_active_user_statistics_domain_matches_python_split(self, real_repository, test_session):
+        """El dominio en SQL es el mismo que email.split('@')[1] de la versión en Python"""
+        emails = ["a@gmail.com", "b@x@corp.org", "c@", "d@corp.org@extra"]
+        real_repository.bulk_create([User(f"user{i}", email, f"User {i}") for i, email in enumerate(emails)])
+        test_session.commit()
+        
+        stats = real_repository.active_user_statistics(datetime.utcnow())
+        
+        expected = {}
+        for email in emails:
+            domain = email.split('@')[1] if '@' in email else 'unknown'
+            expected[domain] = expected.get(domain, 0) + 1
+        assert stats['by_domain'] == expected
+    
+    def test_email_domain_uses_split_part_on_postgresql(self):
+        """PostgreSQL (producción, psycopg2) no tiene instr"""
+        sql = str(_email_domain('postgresql').compile(dialect=postgresql.dialect()))
+        
+        assert 'split_part' in sql and 'strpos' in sql
+        assert 'instr' not in sql
+    
+    def test_active_user_statistics_empty_table(self, real_repository):
+        """Sin usuarios no hay filas de grupo"""
+        assert real_repository.active_user_statistics(datetime.utcnow()) == {
+            'total': 0, 'by_domain': {}, 'recent': 0
+        }
+    
+    def test_iter_active_rows_pages_by_primary_key(self, real_repository, test_session, test_engine):
+        """Paginación keyset: una consulta por página, sin objetos en la sesión"""
+        # Arrange
+        users = [User(f"user{i}", f"user{i}@example.com", f"User {i}") for i in range(10)]
+        users[4].deactivate()
+        real_repository.bulk_create(users)
+        test_session.commit()
+        test_session.expunge_all()
+        statements = []
+        event.listen(test_engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+        
+        # Act
+        rows = list(real_repository.iter_active_rows(batch_size=3))
+        
+        # Assert
+        assert [row.username for row in rows] == [f"user{i}" for i in range(10) if i != 4]
+        assert [row.id for row in rows] == sorted(row.id for row in rows)
+        # 9 filas en páginas de 3: tres llenas y una vacía que cierra el recorrido
+        assert len([s for s in statements if s.lstrip().upper().startswith('SELECT')]) == 4
+        assert len(test_session.identity_map) == 0
+    
+    def test_iter_active_rows_as_dict(self, real_repository, users_in_db):
+        """Las filas se pueden pedir como dicts con las columnas del usuario"""
+        rows = list(real_repository.iter_active_rows(batch_size=2, as_dict=True))
+        
+        assert [row['username'] for row in rows] == ['alice', 'bob', 'charlie']
+        assert set(rows[0]) == {'id', 'username', 'email', 'full_name',
+                                'is_active', 'created_at', 'updated_at'}
+        
+        with pytest.raises(ValueError):
+            next(real_repository.iter_active_rows(batch_size=0))
+
@@ -0,0 +1,293 @@
+# ============================================================================
+# ARCHIVO 14: tests/integration/test_external_validation.py (Servicio externo simulado)
+# ============================================================================
+
+"""
+Integration tests de UserService + ExternalUserValidationClient reales
+Enfoque: un servidor HTTP local simula el servicio externo con latencia y fallos
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from src.api_client import ExternalUserValidationClient
+from src.exceptions import InvalidUserDataError
+from src.services import UserService
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    """Ignora clientes que cortan la conexión (timeouts del cliente)"""
+
+    # Backlog por defecto = 5: con más conexiones a la vez el SYN se reintenta tras 1s
+    request_queue_size = 64
+
+    def handle_error(self, request, client_address):
+        pass
+
+class StubValidationService:
+    """
+    Servicio externo simulado
+    delay: segundos por endpoint; status: código HTTP forzado por endpoint;
+    fail_next: nº de respuestas 503 antes de volver a responder bien.
+    Las rutas sin respuesta configurada devuelven 404
+    """
+
+    def __init__(self):
+        self.delay = {}
+        self.status = {}
+        self.fail_next = {}
+        self.responses = {
+            '/validate/email': {'valid': True, 'deliverable': True},
+            '/validate/emails': lambda body: {'results': [
+                {'email': email, 'valid': not email.startswith('bad')} for email in body['emails']]},
+            '/reputation/check': {'blocked': False, 'reputation_score': 0.9},
+            '/notifications/user_created/batch': {}
+        }
+        self.calls = []
+        self.notifications = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.handle(self, None)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                stub.handle(self, json.loads(self.rfile.read(length)) if length else None)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = QuietHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def handle(self, request, body):
+        url = urlsplit(request.path)
+        with self._lock:
+            self.calls.append((url.path, parse_qs(url.query), body))
+            if url.path.startswith('/notifications') and body:
+                self.notifications.append(body)
+            failing = self.fail_next.get(url.path, 0) > 0
+            if failing:
+                self.fail_next[url.path] -= 1
+        time.sleep(self.delay.get(url.path, 0))
+        response = self.responses.get(url.path)
+        if failing:
+            status = 503
+        elif response is None:
+            status = 404
+        else:
+            status = self.status.get(url.path, 200)
+        if callable(response):
+            response = response(body)
+        payload = json.dumps(response or {}).encode()
+        request.send_response(status)
+        request.send_header('Content-Type', 'application/json')
+        request.send_header('Content-Length', str(len(payload)))
+        request.end_headers()
+        request.wfile.write(payload)
+
+    def count(self, path):
+        with self._lock:
+            return len([call for call in self.calls if call[0] == path])
+
+@pytest.fixture
+def stub_service():
+    stub = StubValidationService()
+    stub.thread.start()
+    yield stub
+    stub.server.shutdown()
+    stub.server.server_close()
+
+@pytest.fixture
+def stub_client(stub_service):
+    client = ExternalUserValidationClient(stub_service.url, "test_key", timeout=2,
+                                          notification_flush_interval=0.05)
+    yield client
+    client.close()
+
+@pytest.fixture
+def service_with_stub(real_repository, stub_client):
+    return UserService(repository=real_repository, validation_client=stub_client)
+
+@pytest.mark.integration
+class TestExternalValidationAgainstStub:
+    """Latencia y fallos del servicio externo vistos desde create_user"""
+
+    def test_validations_run_concurrently_and_notification_does_not_block(
+            self, service_with_stub, stub_service, stub_client, test_session):
+        """Con 0.3s por llamada, el alta cuesta ~0.3s en vez de 0.9s en serie"""
+        # Arrange
+        for path in ('/validate/email', '/reputation/check', '/notifications/user_created/batch'):
+            stub_service.delay[path] = 0.3
+
+        # Act
+        start = time.perf_counter()
+        user = service_with_stub.create_user("alice", "alice@example.com", "Alice Smith")
+        elapsed = time.perf_counter() - start
+        test_session.commit()
+        stub_client.close()
+
+        # Assert
+        assert user.id is not None
+        assert 0.3 <= elapsed < 0.55
+        assert stub_service.notifications == [{'users': [user.to_dict()]}]
+
+    def test_email_validation_is_cached(self, service_with_stub, stub_service, test_session):
+        """Una segunda consulta del mismo email no vuelve al servicio externo"""
+        service_with_stub.validation_client.validate_email("alice@example.com")
+        service_with_stub.create_user("alice", "alice@example.com", "Alice Smith")
+
+        assert stub_service.count('/validate/email') == 1
+        assert stub_service.count('/reputation/check') == 1
+
+    def test_invalid_email_rejected(self, service_with_stub, stub_service, real_repository):
+        stub_service.responses['/validate/email'] = {'valid': False}
+
+        with pytest.raises(InvalidUserDataError, match="Email no válido"):
+            service_with_stub.create_user("alice", "alice@example.com", "Alice Smith")
+        assert real_repository.count_active_users() == 0
+
+    def test_blocked_user_rejected(self, service_with_stub, stub_service):
+        stub_service.responses['/reputation/check'] = {'blocked': True}
+
+        with pytest.raises(InvalidUserDataError, match="Usuario bloqueado"):
+            service_with_stub.create_user("alice", "alice@example.com", "Alice Smith")
+
+    def test_service_errors_do_not_block_signup(self, service_with_stub, stub_service,
+                                                stub_client, test_session):
+        """500 en validación y notificación: el alta sigue y el fallo solo se contabiliza"""
+        # Arrange
+        stub_service.status['/validate/email'] = 500
+        stub_service.status['/reputation/check'] = 503
+        stub_service.status['/notifications/user_created/batch'] = 500
+
+        # Act
+        user = service_with_stub.create_user("alice", "alice@example.com", "Alice Smith")
+        test_session.commit()
+        stub_client.close()
+
+        # Assert
+        assert user.id is not None
+        assert stub_client.notifications.failed == 1
+
+        # Los errores no se cachean: la siguiente validación vuelve a consultar
+        stub_service.status.clear()
+        assert stub_client.validate_email("alice@example.com")['valid'] is True
+        assert stub_service.count('/validate/email') == 2
+
+    def test_timeout_bounded_by_client_timeout(self, stub_service, real_repository, test_session):
+        """Un servicio colgado cuesta como mucho el timeout, no la suma de llamadas"""
+        # Arrange
+        stub_service.delay['/validate/email'] = 1.5
+        stub_service.delay['/reputation/check'] = 1.5
+        client = ExternalUserValidationClient(stub_service.url, "test_key", timeout=0.5)
+        service = UserService(repository=real_repository, validation_client=client)
+
+        # Act
+        start = time.perf_counter()
+        user = service.create_user("alice", "alice@example.com", "Alice Smith")
+        elapsed = time.perf_counter() - start
+        client.close()
+
+        # Assert
+        assert user.username == "alice"
+        assert elapsed < 0.9
+
+@pytest.mark.integration
+class TestBulkValidationAgainstStub:
+    """validate_emails, reintentos y circuit breaker contra el servicio simulado"""
+
+    def test_bulk_import_uses_batch_endpoint(self, service_with_stub, stub_service, test_session):
+        """Un POST por lote en lugar de una petición por email"""
+        stub_client = service_with_stub.validation_client
+        stub_client.email_batch_size = 20
+        rows = [{'username': f'user{i}', 'email': f"{'bad' if i % 10 == 0 else 'ok'}{i}@example.com",
+                 'full_name': f'User {i}'} for i in range(50)]
+
+        result = service_with_stub.create_users_batch(rows)
+        test_session.commit()
+
+        assert len(result['created']) == 45
+        assert len(result['errors']) == 5
+        assert stub_service.count('/validate/emails') == 3
+        assert stub_service.count('/validate/email') == 0
+
+    def test_bulk_import_checks_reputation_in_parallel(self, service_with_stub, stub_service,
+                                                       stub_client, test_session):
+        """La reputación de las filas se consulta a la vez, no una detrás de otra"""
+        # Arrange
+        stub_service.delay['/reputation/check'] = 0.05
+        rows = [{'username': f'user{i}', 'email': f'user{i}@example.com', 'full_name': f'User {i}'}
+                for i in range(40)]
+        
+        # Act
+        start = time.perf_counter()
+        result = service_with_stub.create_users_batch(rows)
+        elapsed = time.perf_counter() - start
+        test_session.commit()
+        
+        # Assert: 40 filas / max_parallel=8 ≈ 5 rondas de 0.05s; en serie serían 2s
+        assert len(result['created']) == 40
+        assert stub_service.count('/reputation/check') == 40
+        assert elapsed < 40 * 0.05 / 4
+    
+    def test_per_item_fallback_is_bounded(self, stub_service):
+        """Sin batch endpoint: uno a uno, como mucho max_parallel a la vez"""
+        # Arrange
+        del stub_service.responses['/validate/emails']
+        stub_service.delay['/validate/email'] = 0.1
+        client = ExternalUserValidationClient(stub_service.url, "test_key", timeout=2, max_parallel=4)
+
+        # Act
+        start = time.perf_counter()
+        results = client.validate_emails([f"user{i}@example.com" for i in range(8)])
+        elapsed = time.perf_counter() - start
+        client.close()
+
+        # Assert: 8 emails / 4 en paralelo = 2 rondas de 0.1s
+        assert len(results) == 8
+        assert client.batch_supported is False
+        assert 0.2 <= elapsed < 0.4
+
+    def test_transient_errors_are_retried(self, stub_service):
+        """Dos 503 seguidos se absorben con reintentos (backoff con jitter)"""
+        stub_service.fail_next['/reputation/check'] = 2
+        client = ExternalUserValidationClient(stub_service.url, "test_key", timeout=2,
+                                              retries=2, retry_backoff=0.01)
+
+        result = client.check_user_reputation("alice", "alice@example.com")
+        client.close()
+
+        assert result['blocked'] is False
+        assert stub_service.count('/reputation/check') == 3
+        assert client.circuit_breaker.failures == 0
+
+    def test_slow_validator_does_not_stall_import(self, stub_service, real_repository, test_session):
+        """Con el servicio colgado el circuito se abre y el resto del lote no espera"""
+        # Arrange
+        for path in ('/validate/emails', '/validate/email', '/reputation/check'):
+            stub_service.delay[path] = 1.0
+        client = ExternalUserValidationClient(stub_service.url, "test_key", timeout=0.2,
+                                              breaker_threshold=3, max_parallel=2)
+        service = UserService(repository=real_repository, validation_client=client)
+        rows = [{'username': f'user{i}', 'email': f'user{i}@example.com', 'full_name': f'User {i}'}
+                for i in range(100)]
+
+        # Act
+        start = time.perf_counter()
+        result = service.create_users_batch(rows)
+        elapsed = time.perf_counter() - start
+        test_session.commit()
+        client.close()
+
+        # Assert
+        assert len(result['created']) == 100
+        assert client.circuit_breaker.state == 'open'
+        assert elapsed < 2.0  # en serie serían 100 filas × 2 llamadas × 0.2s
+
@@ -154,4 +154,21 @@ class TestLargeDatasetIntegration:
         
         # Verificar estadísticas
         stats = real_user_service.get_user_statistics()
-        assert stats['total_active_users'] == 100
\ No newline at end of file
+        assert stats['total_active_users'] == 100
+    
+    def test_batch_user_creation(self, real_user_service, users_in_db, test_session):
+        """Creación en lote con conflictos contra la BD y dentro del lote"""
+        rows = [{'username': f'batchuser{i}', 'email': f'batch{i}@example.com',
+                 'full_name': f'Batch User {i}'} for i in range(1000)]
+        rows.append({'username': 'alice', 'email': 'new@example.com', 'full_name': 'Alice Dup'})
+        rows.append({'username': 'batchuser1', 'email': 'dup@example.com', 'full_name': 'Dup'})
+        
+        result = real_user_service.create_users_batch(rows, validate_externally=False)
+        test_session.commit()
+        
+        assert len(result['created']) == 1000
+        assert [e['index'] for e in result['errors']] == [1000, 1001]
+        
+        stats = real_user_service.get_user_statistics()
+        assert stats['total_active_users'] == 1003
+
@@ -8,9 +8,12 @@ Enfoque: Mocking de requests HTTP
 """
 
 import pytest
+import threading
+import time
 from unittest.mock import Mock, patch
 import requests
-from src.api_client import ExternalUserValidationClient
+from src.api_client import (CircuitBreaker, ExternalUserValidationClient, NotificationSender, TTLCache,
+                            _close_live_senders, _live_senders)
 from src.exceptions import ExternalServiceError
 
 class TestExternalUserValidationClient:
@@ -141,4 +144,226 @@ class TestExternalUserValidationClient:
         result = api_client.notify_user_created({'id': 1})
         
         # Assert - no debe lanzar excepción, retorna False
-        assert result is False
\ No newline at end of file
+        assert result is False
+    
+    @patch('src.api_client.requests.Session.get')
+    def test_validate_email_is_cached_per_address(self, mock_get, api_client):
+        """Respuestas correctas se cachean; el dominio no distingue mayúsculas"""
+        # Arrange
+        mock_response = Mock()
+        mock_response.json.return_value = {'valid': True}
+        mock_response.raise_for_status.return_value = None
+        mock_get.return_value = mock_response
+        
+        # Act
+        first = api_client.validate_email("test@Example.com")
+        first['valid'] = False  # modificar el resultado no altera la caché
+        second = api_client.validate_email("test@example.com")
+        api_client.validate_email("other@example.com")
+        
+        # Assert
+        assert second['valid'] is True
+        assert mock_get.call_count == 2
+    
+    @patch('src.api_client.requests.Session.get')
+    def test_validate_email_errors_are_not_cached(self, mock_get, api_client):
+        """Un timeout no se cachea: la siguiente llamada vuelve al servicio"""
+        mock_get.side_effect = requests.exceptions.Timeout()
+        
+        for _ in range(2):
+            with pytest.raises(ExternalServiceError):
+                api_client.validate_email("test@example.com")
+        
+        assert mock_get.call_count == 2
+
+    @patch('src.api_client.requests.Session.post')
+    def test_validate_emails_batches_and_skips_cached(self, mock_post, api_client):
+        """Los emails ya cacheados no se envían; el resto va en lotes"""
+        # Arrange
+        api_client.email_batch_size = 2
+        api_client.email_cache.put(('example.com', 'cached'), {'valid': True})
+        def batch_response(url, json, timeout):
+            response = Mock(status_code=200)
+            response.json.return_value = {'results': [
+                {'email': email, 'valid': not email.startswith('bad')} for email in json['emails']]}
+            return response
+        mock_post.side_effect = batch_response
+        emails = ['a@example.com', 'cached@example.com', 'bad@example.com', 'c@example.com', 'a@example.com']
+        
+        # Act
+        results = api_client.validate_emails(emails)
+        
+        # Assert
+        assert {email: r['valid'] for email, r in results.items()} == {
+            'a@example.com': True, 'cached@example.com': True,
+            'bad@example.com': False, 'c@example.com': True}
+        assert [call.kwargs['json']['emails'] for call in mock_post.call_args_list] == [
+            ['a@example.com', 'bad@example.com'], ['c@example.com']]
+        assert api_client.email_cache.get(('example.com', 'bad')) == results['bad@example.com']
+    
+    @patch('src.api_client.requests.Session.get')
+    @patch('src.api_client.requests.Session.post')
+    def test_validate_emails_falls_back_per_item(self, mock_post, mock_get, api_client):
+        """Sin batch endpoint (404) se valida uno a uno y no se vuelve a intentar el lote"""
+        # Arrange
+        mock_post.return_value = Mock(status_code=404)
+        def per_item_response(url, params, timeout):
+            if params['email'] == 'down@example.com':
+                raise requests.exceptions.Timeout()
+            response = Mock()
+            response.json.return_value = {'valid': True}
+            return response
+        mock_get.side_effect = per_item_response
+        
+        # Act
+        first = api_client.validate_emails(['a@example.com', 'down@example.com'])
+        second = api_client.validate_emails(['b@example.com'])
+        
+        # Assert
+        assert set(first) == {'a@example.com'}  # el que falla no aparece
+        assert set(second) == {'b@example.com'}
+        assert api_client.batch_supported is False
+        assert mock_post.call_count == 1
+    
+    @patch('src.api_client.requests.Session.get')
+    def test_client_errors_do_not_open_circuit(self, mock_get, api_client):
+        """Un 4xx es culpa de la petición: no cuenta como caída del servicio"""
+        response = Mock(status_code=400, text="Bad Request")
+        response.raise_for_status.side_effect = requests.exceptions.HTTPError(response=response)
+        mock_get.return_value = response
+        
+        for i in range(10):
+            with pytest.raises(ExternalServiceError, match="Error HTTP 400"):
+                api_client.validate_email(f"user{i}@example.com")
+        
+        assert api_client.circuit_breaker.state == CircuitBreaker.CLOSED
+    
+    @patch('src.api_client.requests.Session.get')
+    def test_open_circuit_fails_fast(self, mock_get, api_client):
+        """Tras varios timeouts el cliente deja de llamar al servicio"""
+        mock_get.side_effect = requests.exceptions.Timeout()
+        
+        for i in range(api_client.circuit_breaker.failure_threshold):
+            with pytest.raises(ExternalServiceError, match="Timeout"):
+                api_client.validate_email(f"user{i}@example.com")
+        with pytest.raises(ExternalServiceError, match="Circuito abierto"):
+            api_client.check_user_reputation("testuser", "test@example.com")
+        
+        assert mock_get.call_count == api_client.circuit_breaker.failure_threshold
+
+class TestCircuitBreaker:
+    """Unit tests para el circuit breaker"""
+    
+    def test_half_open_trial_closes_or_reopens(self):
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+        breaker.record_failure()
+        breaker.before_call()          # un fallo no basta
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        
+        now[0] = 10
+        breaker.before_call()          # llamada de prueba
+        with pytest.raises(ExternalServiceError):
+            breaker.before_call()      # solo una a la vez en half-open
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        
+        now[0] = 20
+        breaker.before_call()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED and breaker.failures == 0
+
+class TestTTLCache:
+    """Unit tests para la caché TTL+LRU"""
+    
+    def test_expires_after_ttl(self):
+        now = [0.0]
+        cache = TTLCache(maxsize=10, ttl=60, clock=lambda: now[0])
+        cache.put('a', 1)
+        
+        now[0] = 59
+        assert cache.get('a') == 1
+        now[0] = 60
+        assert cache.get('a') is None
+        assert len(cache) == 0
+        assert (cache.hits, cache.misses) == (1, 1)
+    
+    def test_evicts_least_recently_used(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')      # 'b' pasa a ser el menos usado
+        cache.put('c', 3)
+        
+        assert cache.get('b') is None
+        assert (cache.get('a'), cache.get('c')) == (1, 3)
+    
+    def test_zero_size_disables_cache(self):
+        cache = TTLCache(maxsize=0)
+        cache.put('a', 1)
+        assert cache.get('a') is None
+
+class TestNotificationSender:
+    """Unit tests para el envío de notificaciones en segundo plano"""
+    
+    def test_batches_and_flushes_on_close(self):
+        batches = []
+        sender = NotificationSender(lambda batch: batches.append(batch) or True,
+                                    batch_size=3, flush_interval=10)
+        
+        for i in range(7):
+            assert sender.submit({'id': i}) is True
+        sender.close()
+        
+        assert [len(batch) for batch in batches] == [3, 3, 1]
+        assert sender.sent == 7 and sender.failed == 0
+    
+    def test_failures_are_counted_not_raised(self):
+        def broken(batch):
+            raise RuntimeError("boom")
+        sender = NotificationSender(broken, batch_size=10, flush_interval=0.01)
+        
+        sender.submit({'id': 1})
+        sender.close()
+        
+        assert sender.failed == 1
+    
+    def test_full_queue_drops_instead_of_blocking(self):
+        release = threading.Event()
+        sender = NotificationSender(lambda batch: release.wait(5), batch_size=1, max_queue=1)
+        
+        results = [sender.submit({'id': i}) for i in range(5)]
+        release.set()
+        sender.close()
+        
+        assert results[0] is True and False in results
+        assert sender.dropped == results.count(False)
+    
+    def test_close_is_bounded_with_full_queue_and_slow_endpoint(self):
+        """close(timeout) no se queda esperando a poder encolar la marca de parada"""
+        release = threading.Event()
+        sender = NotificationSender(lambda batch: release.wait(5), batch_size=1, max_queue=2)
+        for i in range(4):
+            sender.submit({'id': i})
+        
+        start = time.perf_counter()
+        sender.close(timeout=0.2)
+        elapsed = time.perf_counter() - start
+        release.set()
+        
+        assert elapsed < 0.5
+    
+    def test_pending_notifications_are_sent_at_exit(self):
+        """Sin close() explícito, el hook de atexit envía lo que quede en cola"""
+        batches = []
+        sender = NotificationSender(lambda batch: batches.append(batch) or True,
+                                    batch_size=10, flush_interval=10)
+        sender.submit({'id': 1})
+        assert sender in _live_senders
+        
+        _close_live_senders()
+        
+        assert batches == [[{'id': 1}]]
+        assert sender not in _live_senders
+
@@ -8,6 +8,7 @@ Enfoque: Lógica de negocio aislada usando mocks
 """
 
 import pytest
+from datetime import datetime, timedelta
 from unittest.mock import Mock, patch
 from src.services import UserService
 from src.models import User
@@ -77,7 +78,7 @@ class TestUserServiceCreateUser:
         # Mock respuestas del API client
         mock_api_client.validate_email.return_value = {'valid': True, 'deliverable': True}
         mock_api_client.check_user_reputation.return_value = {'blocked': False, 'reputation_score': 0.8}
-        mock_api_client.notify_user_created.return_value = True
+        mock_api_client.queue_user_created.return_value = True
         
         service = user_service_with_mocks
         
@@ -88,7 +89,8 @@ class TestUserServiceCreateUser:
         assert result.username == "testuser"
         mock_api_client.validate_email.assert_called_once_with("test@example.com")
         mock_api_client.check_user_reputation.assert_called_once_with("testuser", "test@example.com")
-        mock_api_client.notify_user_created.assert_called_once()
+        mock_api_client.queue_user_created.assert_called_once()
+        mock_api_client.notify_user_created.assert_not_called()
     
     def test_create_user_blocked_by_reputation(self, user_service_with_mocks, 
                                              mock_repository, mock_api_client):
@@ -146,13 +148,11 @@ class TestUserServiceOtherMethods:
     def test_get_user_statistics(self, user_service_with_mocks, mock_repository):
         """Prueba obtención de estadísticas usando mocks"""
         # Arrange
-        mock_users = [
-            User("user1", "user1@example.com", "User 1"),
-            User("user2", "user2@test.com", "User 2"),
-            User("user3", "user3@example.com", "User 3")
-        ]
-        mock_repository.count_active_users.return_value = 3
-        mock_repository.get_all_active.return_value = mock_users
+        mock_repository.active_user_statistics.return_value = {
+            'total': 3,
+            'by_domain': {'example.com': 2, 'test.com': 1},
+            'recent': 1
+        }
         
         service = user_service_with_mocks
         
@@ -164,4 +164,130 @@ class TestUserServiceOtherMethods:
         assert stats['total_users'] == 3
         assert 'users_by_domain' in stats
         assert stats['users_by_domain']['example.com'] == 2
-        assert stats['users_by_domain']['test.com'] == 1
\ No newline at end of file
+        assert stats['users_by_domain']['test.com'] == 1
+        assert stats['recent_registrations'] == 1
+        
+        # Se agrega en la BD: no se cargan los usuarios
+        mock_repository.get_all_active.assert_not_called()
+        since = mock_repository.active_user_statistics.call_args.kwargs['created_since']
+        assert abs(datetime.utcnow() - timedelta(days=30) - since) < timedelta(seconds=5)
+
+class TestUserServiceCreateUsersBatch:
+    """Unit tests para creación de usuarios en lote usando mocks"""
+    
+    def test_batch_reports_row_errors_without_aborting(self, user_service_with_mocks, mock_repository):
+        """Filas inválidas o duplicadas se reportan; el resto se inserta"""
+        # Arrange
+        mock_repository.existing_usernames.return_value = {'alice'}
+        mock_repository.existing_emails.return_value = {'taken@example.com'}
+        mock_repository.bulk_create.side_effect = lambda users: users
+        rows = [
+            {'username': 'alice', 'email': 'alice@example.com', 'full_name': 'Alice'},   # ya existe
+            {'username': 'bob', 'email': 'bob@example.com', 'full_name': 'Bob'},
+            {'username': 'ab', 'email': 'short@example.com', 'full_name': 'Short'},      # inválido
+            {'username': 'carol', 'email': 'taken@example.com', 'full_name': 'Carol'},   # email existe
+            {'username': 'BOB', 'email': 'bob2@example.com', 'full_name': 'Bob Dos'},    # duplicado en lote
+            {'username': 'dave', 'email': 'dave@example.com', 'full_name': 'Dave'},
+        ]
+        
+        # Act
+        result = user_service_with_mocks.create_users_batch(rows, validate_externally=False)
+        
+        # Assert
+        assert [u.username for u in result['created']] == ['bob', 'dave']
+        assert [e['index'] for e in result['errors']] == [0, 2, 3, 4]
+        assert result['errors'][0]['error'].startswith('UserAlreadyExistsError')
+        assert result['errors'][1]['error'].startswith('InvalidUserDataError')
+        
+        # Una consulta por clave y una sola inserción
+        mock_repository.existing_usernames.assert_called_once()
+        mock_repository.existing_emails.assert_called_once()
+        mock_repository.bulk_create.assert_called_once()
+        mock_repository.exists_username.assert_not_called()
+        mock_repository.create.assert_not_called()
+    
+    def test_batch_external_validation_rejects_rows(self, user_service_with_mocks,
+                                                    mock_repository, mock_api_client):
+        """El servicio externo rechaza filas concretas; sus caídas no bloquean"""
+        # Arrange
+        mock_repository.existing_usernames.return_value = set()
+        mock_repository.existing_emails.return_value = set()
+        mock_repository.bulk_create.side_effect = lambda users: users
+        mock_api_client.validate_emails.return_value = {}  # lote sin resultados: fila a fila
+        email_results = {'user0@example.com': {'valid': False},
+                         'user1@example.com': ExternalServiceError("Timeout"),
+                         'user2@example.com': {'valid': True}}
+        
+        def validate_email(email):
+            # Las filas se validan en paralelo: el resultado depende del email, no del orden
+            result = email_results[email]
+            if isinstance(result, Exception):
+                raise result
+            return result
+        
+        mock_api_client.validate_email.side_effect = validate_email
+        mock_api_client.check_user_reputation.return_value = {'blocked': False}
+        rows = [{'username': f'user{i}', 'email': f'user{i}@example.com', 'full_name': 'User'}
+                for i in range(3)]
+        
+        # Act
+        result = user_service_with_mocks.create_users_batch(rows)
+        
+        # Assert
+        assert [u.username for u in result['created']] == ['user1', 'user2']
+        assert result['errors'] == [{
+            'index': 0, 'username': 'user0', 'email': 'user0@example.com',
+            'error': 'InvalidUserDataError: Email no válido según servicio externo'
+        }]
+        assert mock_api_client.queue_user_created.call_count == 2
+    
+    def test_batch_uses_bulk_email_validation(self, user_service_with_mocks,
+                                              mock_repository, mock_api_client):
+        """Los emails validados en bloque no se vuelven a consultar uno a uno"""
+        # Arrange
+        mock_repository.existing_usernames.return_value = {'taken'}
+        mock_repository.existing_emails.return_value = set()
+        mock_repository.bulk_create.side_effect = lambda users: users
+        mock_api_client.validate_emails.return_value = {
+            'ok@example.com': {'valid': True},
+            'bad@example.com': {'valid': False}
+        }
+        mock_api_client.check_user_reputation.return_value = {'blocked': False}
+        rows = [
+            {'username': 'okuser', 'email': 'ok@example.com', 'full_name': 'Ok'},
+            {'username': 'baduser', 'email': 'bad@example.com', 'full_name': 'Bad'},
+            {'username': 'taken', 'email': 'taken@example.com', 'full_name': 'Taken'},
+        ]
+        
+        # Act
+        result = user_service_with_mocks.create_users_batch(rows)
+        
+        # Assert
+        assert [u.username for u in result['created']] == ['okuser']
+        assert [e['index'] for e in result['errors']] == [1, 2]
+        mock_api_client.validate_emails.assert_called_once_with(['ok@example.com', 'bad@example.com'])
+        mock_api_client.validate_email.assert_not_called()
+        # Un email ya rechazado en bloque no consulta la reputación
+        mock_api_client.check_user_reputation.assert_called_once_with('okuser', 'ok@example.com')
+    
+    def test_batch_reports_conflicting_key_for_rows_dropped_by_database(
+            self, user_service_with_mocks, mock_repository):
+        """Filas que la BD rechaza en bulk_create (alta concurrente) indican qué clave choca"""
+        # Arrange: sin conflictos al comprobar; al insertar ya existen bob (email) y carol (username)
+        mock_repository.existing_usernames.side_effect = [set(), {'carol'}]
+        mock_repository.existing_emails.side_effect = [set(), {'bob@example.com'}]
+        mock_repository.bulk_create.side_effect = lambda users: users[:1]
+        rows = [{'username': name, 'email': f'{name}@example.com', 'full_name': name.title()}
+                for name in ('alice', 'bob', 'carol')]
+        
+        # Act
+        result = user_service_with_mocks.create_users_batch(rows, validate_externally=False)
+        
+        # Assert
+        assert [u.username for u in result['created']] == ['alice']
+        assert [e['error'] for e in result['errors']] == [
+            "UserAlreadyExistsError: Email 'bob@example.com' ya existe",
+            "UserAlreadyExistsError: Username 'carol' ya existe"
+        ]
+
+
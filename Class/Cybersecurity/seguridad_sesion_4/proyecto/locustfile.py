@@ -6,9 +6,13 @@ Define comportamientos realistas de usuarios
 from locust import HttpUser, task, between, events
 import random
 import json
+import os
 import time
+from pathlib import Path
 from typing import Dict, Any
 
+from src.load_metrics import PERCENTILES, RequestAggregator
+
 class WebsiteUser(HttpUser):
     """
     Usuario típico del sitio web
@@ -158,20 +162,45 @@ class HeavyUser(HttpUser):
     wait_time = between(0.5, 1.5)  # Más agresivo
     weight = 1  # Menos instancias de este tipo
     
+    def on_start(self):
+        """Trabajos en segundo plano pendientes de consultar"""
+        self.pending_jobs = []
+    
     @task(5)
     def heavy_operation(self):
-        """Ejecuta operación pesada"""
+        """Encola operación pesada (debe responder 202 de inmediato)"""
         with self.client.post("/api/heavy-operation", catch_response=True) as response:
-            if response.status_code == 200:
-                # Verificar que no tome demasiado tiempo
+            if response.status_code == 202:
+                # Encolar no debe tardar: el trabajo corre en segundo plano
                 if response.elapsed.total_seconds() > 5:
                     response.failure(f"Heavy operation too slow: {response.elapsed.total_seconds()}s")
-            elif response.status_code == 500:
-                # Algunos errores son esperados en operaciones pesadas
-                pass
+                else:
+                    self.pending_jobs.append(response.json()['id'])
+            elif response.status_code == 503:
+                # Cola llena: backpressure del servidor
+                response.failure("Heavy operation rejected: job queue full")
             else:
                 response.failure(f"Heavy operation failed: {response.status_code}")
     
+    @task(5)
+    def poll_job(self):
+        """Consulta el estado del trabajo pendiente más antiguo"""
+        if not self.pending_jobs:
+            return
+        
+        job_id = self.pending_jobs[0]
+        with self.client.get(f"/api/jobs/{job_id}", name="/api/jobs/[id]",
+                             catch_response=True) as response:
+            if response.status_code == 200:
+                # 'failed' es el 10% de errores esperados en operaciones pesadas
+                if response.json()['status'] in ('completed', 'failed'):
+                    self.pending_jobs.pop(0)
+            elif response.status_code == 404:
+                # Trabajo expirado del historial: dejar de consultarlo
+                self.pending_jobs.pop(0)
+            else:
+                response.failure(f"Job status failed: {response.status_code}")
+    
     @task(3)
     def slow_endpoint(self):
         """Accede al endpoint intencionalmente lento"""
@@ -199,18 +228,18 @@ class MonitoringUser(HttpUser):
             else:
                 response.failure(f"Stats check failed: {response.status_code}")
 
+# Agregación en memoria de requests (sin I/O por request)
+request_aggregator = RequestAggregator(Path(os.environ.get('LOCUST_REQUEST_LOG', 'reports/load/requests.jsonl')))
+
 # Event listeners para métricas personalizadas
 @events.request.add_listener
 def my_request_handler(request_type, name, response_time, response_length, response, 
                       context, exception, start_time, url, **kwargs):
     """
     Handler personalizado para requests
-    Permite logging y métricas personalizadas
+    Solo agrega en memoria: imprimir por request limita al propio generador de carga
     """
-    if exception:
-        print(f"Request failed: {name} - {exception}")
-    elif response_time > 1000:  # Log requests lentas (>1s)
-        print(f"Slow request detected: {name} took {response_time}ms")
+    request_aggregator.record(f"{request_type} {name}", response_time, exception)
 
 @events.test_start.add_listener
 def on_test_start(environment, **kwargs):
@@ -227,5 +256,17 @@ def on_test_stop(environment, **kwargs):
     stats = environment.stats
     print(f"Total requests: {stats.total.num_requests}")
     print(f"Total failures: {stats.total.num_failures}")
-    print(f"Average response time: {stats.total.avg_response_time:.2f}ms")
-    print(f"Max response time: {stats.total.max_response_time}ms")
\ No newline at end of file
+    
+    # En modo distribuido el master no recibe eventos de request: usa las stats agregadas
+    if request_aggregator.endpoints:
+        request_aggregator.flush()
+        print(f"Latency percentiles (ms), log: {request_aggregator.path}")
+        print(request_aggregator.percentile_table())
+    elif stats.total.num_requests:
+        print("Latency percentiles (ms), aggregated from workers")
+        print(f"{'endpoint':<32}" + ''.join(f"{'p' + format(p, 'g'):>9}" for p in PERCENTILES))
+        print("-" * (32 + 9 * len(PERCENTILES)))
+        for entry in sorted(stats.entries.values(), key=lambda e: (e.name, e.method)) + [stats.total]:
+            label = f"{entry.method or ''} {entry.name}".strip()
+            print(f"{label[:32]:<32}" + ''.join(
+                f"{entry.get_response_time_percentile(p / 100):>9.0f}" for p in PERCENTILES))
@@ -0,0 +1,93 @@
+"""
+Locust: reproducción de una traza de tráfico real (open-loop)
+
+En lugar de tareas con pesos y esperas between(), cada request de la traza
+se envía en su instante (dividido por --trace-speed), haya o no respuestas
+pendientes. --trace-users es el pool de usuarios que envían en paralelo:
+si se queda corto, los envíos se retrasan y se informa al final.
+
+Uso (un solo proceso: cada worker reproduciría la traza completa):
+    locust -f locustfile_replay.py --headless --host http://localhost:5001 \\
+        --trace-file data/test_datasets/trace.jsonl --trace-speed 2 --trace-users 100
+"""
+
+import time
+import gevent
+from locust import HttpUser, LoadTestShape, constant, events, task
+from locust.exception import StopUser
+
+import locustfile  # noqa: F401 - registra los listeners de métricas por endpoint
+from src.trace_replay import ReplaySchedule, load_trace
+
+# Segundos de margen tras el último envío para recibir las respuestas
+DRAIN_SECONDS = 5
+
+class ReplayState:
+    """Traza cargada y reloj común de la reproducción (uno por proceso)"""
+    schedule = None
+    started_at = None
+
+@events.init_command_line_parser.add_listener
+def add_trace_arguments(parser):
+    parser.add_argument("--trace-file", type=str, env_var="LOCUST_TRACE_FILE", default="",
+                        help="Traza de requests (JSONL o CSV) a reproducir")
+    parser.add_argument("--trace-speed", type=float, env_var="LOCUST_TRACE_SPEED", default=1.0,
+                        help="Multiplicador de velocidad (2 = el doble de rápido)")
+    parser.add_argument("--trace-users", type=int, env_var="LOCUST_TRACE_USERS", default=50,
+                        help="Usuarios que envían requests en paralelo")
+
+@events.init.add_listener
+def load_replay_trace(environment, **kwargs):
+    options = environment.parsed_options
+    if options is None or not options.trace_file:
+        return
+    ReplayState.schedule = ReplaySchedule(load_trace(options.trace_file), options.trace_speed)
+    schedule = ReplayState.schedule
+    print(f"📼 Trace: {len(schedule)} requests over {schedule.duration:.1f}s "
+          f"(x{options.trace_speed:g}, peak {schedule.peak_rate():.0f} req/s)")
+
+class TraceReplayUser(HttpUser):
+    """Toma la siguiente request de la traza, espera a su instante y la envía"""
+
+    wait_time = constant(0)
+
+    @task
+    def replay_next(self):
+        schedule = ReplayState.schedule
+        item = schedule.next() if schedule else None
+        if item is None:
+            raise StopUser()
+
+        if ReplayState.started_at is None:
+            ReplayState.started_at = time.monotonic()
+        due, record = item
+        delay = ReplayState.started_at + due - time.monotonic()
+        if delay > 0:
+            gevent.sleep(delay)
+        schedule.record_dispatch(max(0.0, -delay))
+
+        self.client.request(record.method, record.path, params=record.params or None,
+                            json=record.body, name=record.path)
+
+class TraceReplayShape(LoadTestShape):
+    """Pool fijo de usuarios durante la traza; termina al agotarla"""
+
+    def tick(self):
+        schedule = ReplayState.schedule
+        if schedule is None:
+            return None
+        if self.get_run_time() > schedule.duration + DRAIN_SECONDS:
+            return None
+        users = self.runner.environment.parsed_options.trace_users
+        return users, users
+
+@events.test_stop.add_listener
+def report_replay_lag(environment, **kwargs):
+    schedule = ReplayState.schedule
+    if schedule is None or not schedule.dispatched:
+        return
+    late = schedule.late / schedule.dispatched
+    print(f"📼 Replayed {schedule.dispatched}/{len(schedule)} requests, "
+          f"{late:.1%} sent >{schedule.late_threshold * 1000:.0f}ms late (max lag {schedule.max_lag * 1000:.0f}ms)")
+    if late > 0.01:
+        print("⚠️  Arrivals fell behind the trace: raise --trace-users to keep the open loop")
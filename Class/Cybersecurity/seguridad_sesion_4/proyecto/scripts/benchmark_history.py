@@ -0,0 +1,273 @@
+"""
+Historial de benchmarks y gate automático de regresiones de rendimiento
+
+Guarda los resultados de pytest-benchmark en SQLite (por commit y máquina),
+los compara con la última ejecución de la misma máquina usando Mann-Whitney
+sobre las rondas y falla si una función crítica se degrada por encima del umbral.
+`check` solo guarda la ejecución si pasa el gate; una regresión aceptada se
+registra a mano con `record`.
+
+Uso:
+    pytest tests/regression/performance/ --benchmark-only \\
+        --benchmark-json=reports/benchmarks/latest.json --benchmark-save-data
+    python scripts/benchmark_history.py check reports/benchmarks/latest.json --hot '*search*'
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import math
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_DB = Path("reports/benchmarks/history.sqlite")
+MIN_ROUNDS = 5
+
+@dataclass
+class Comparison:
+    """Resultado de comparar un benchmark con su baseline"""
+    name: str
+    baseline_median: Optional[float]
+    current_median: float
+    ratio: Optional[float]
+    p_value: Optional[float]
+    regressed: bool
+    reason: str
+
+def machine_fingerprint() -> str:
+    """Identificador estable de la máquina (hardware + intérprete)"""
+    parts = [
+        platform.system(), platform.machine(), platform.processor(),
+        str(os.cpu_count()), platform.python_implementation(), platform.python_version()
+    ]
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()[:12]
+
+def current_commit() -> str:
+    try:
+        result = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def mann_whitney_greater(baseline: Sequence[float], current: Sequence[float]) -> float:
+    """
+    p-valor unilateral de Mann-Whitney U (H1: current es mayor que baseline)
+    Aproximación normal con corrección por empates y por continuidad
+    """
+    n1, n2 = len(current), len(baseline)
+    combined = sorted([(value, 1) for value in current] + [(value, 0) for value in baseline])
+    n = n1 + n2
+
+    rank_sum_current = 0.0
+    tie_term = 0.0
+    i = 0
+    while i < n:
+        j = i
+        while j + 1 < n and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        average_rank = (i + j) / 2 + 1
+        ties = j - i + 1
+        tie_term += ties ** 3 - ties
+        rank_sum_current += average_rank * sum(1 for k in range(i, j + 1) if combined[k][1])
+        i = j + 1
+
+    u = rank_sum_current - n1 * (n1 + 1) / 2
+    mean_u = n1 * n2 / 2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+
+    z = (u - mean_u - 0.5) / math.sqrt(variance)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+def load_pytest_benchmark_json(path: Path) -> Dict[str, Dict]:
+    """Extrae {nombre: {median, mean, rounds}} del JSON de pytest-benchmark"""
+    with open(path) as f:
+        payload = json.load(f)
+
+    results = {}
+    for bench in payload.get('benchmarks', []):
+        stats = bench['stats']
+        results[bench.get('fullname', bench['name'])] = {
+            'median': stats['median'],
+            'mean': stats['mean'],
+            'rounds': stats.get('data') or []
+        }
+    return results
+
+class BenchmarkHistory:
+    """Almacén SQLite de ejecuciones de benchmarks"""
+
+    def __init__(self, db_path: Path = DEFAULT_DB):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                commit_sha TEXT NOT NULL,
+                machine TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS results (
+                run_id INTEGER NOT NULL REFERENCES runs(id),
+                name TEXT NOT NULL,
+                median REAL NOT NULL,
+                mean REAL NOT NULL,
+                rounds TEXT NOT NULL,
+                PRIMARY KEY (run_id, name)
+            );
+            CREATE INDEX IF NOT EXISTS idx_runs_machine ON runs(machine, id);
+        """)
+
+    def close(self):
+        self.conn.close()
+
+    def record(self, results: Dict[str, Dict], commit: str, machine: str) -> int:
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (commit_sha, machine, created_at) VALUES (?, ?, ?)",
+                (commit, machine, datetime.utcnow().isoformat())
+            )
+            run_id = cursor.lastrowid
+            self.conn.executemany(
+                "INSERT INTO results (run_id, name, median, mean, rounds) VALUES (?, ?, ?, ?, ?)",
+                [(run_id, name, r['median'], r['mean'], json.dumps(r['rounds']))
+                 for name, r in results.items()]
+            )
+        return run_id
+
+    def baseline(self, name: str, machine: str, exclude_commit: str = None) -> Optional[Dict]:
+        """Último resultado de la misma máquina (de otro commit si se indica)"""
+        row = self.conn.execute(
+            """
+            SELECT r.median, r.mean, r.rounds, runs.commit_sha
+            FROM results r JOIN runs ON runs.id = r.run_id
+            WHERE r.name = ? AND runs.machine = ? AND runs.commit_sha != ?
+            ORDER BY runs.id DESC LIMIT 1
+            """,
+            (name, machine, exclude_commit or '')
+        ).fetchone()
+        if row is None:
+            return None
+        return {'median': row[0], 'mean': row[1], 'rounds': json.loads(row[2]), 'commit': row[3]}
+
+    def history(self, name: str, machine: str = None) -> List[Tuple[str, str, float]]:
+        query = """
+            SELECT runs.created_at, runs.commit_sha, r.median
+            FROM results r JOIN runs ON runs.id = r.run_id
+            WHERE r.name = ?
+        """
+        params: list = [name]
+        if machine:
+            query += " AND runs.machine = ?"
+            params.append(machine)
+        return self.conn.execute(query + " ORDER BY runs.id", params).fetchall()
+
+def compare(name: str, current: Dict, baseline: Optional[Dict],
+            threshold: float, alpha: float) -> Comparison:
+    """
+    Regresión = mediana más lenta por encima del umbral y, si hay rondas
+    suficientes en ambos lados, diferencia significativa (Mann-Whitney)
+    """
+    if baseline is None:
+        return Comparison(name, None, current['median'], None, None, False, 'no baseline')
+
+    ratio = current['median'] / baseline['median'] if baseline['median'] > 0 else math.inf
+    slower = ratio > 1 + threshold
+
+    if len(current['rounds']) >= MIN_ROUNDS and len(baseline['rounds']) >= MIN_ROUNDS:
+        p_value = mann_whitney_greater(baseline['rounds'], current['rounds'])
+        regressed = slower and p_value < alpha
+        reason = f"{ratio:.2f}x, p={p_value:.4f}"
+    else:
+        p_value = None
+        regressed = slower
+        reason = f"{ratio:.2f}x (median only: not enough rounds)"
+
+    return Comparison(name, baseline['median'], current['median'], ratio, p_value, regressed, reason)
+
+def compare_run(history: BenchmarkHistory, results: Dict[str, Dict], machine: str, commit: str,
+                threshold: float, alpha: float) -> List[Comparison]:
+    return [
+        compare(name, result, history.baseline(name, machine, exclude_commit=commit), threshold, alpha)
+        for name, result in sorted(results.items())
+    ]
+
+def is_hot(name: str, patterns: Sequence[str]) -> bool:
+    return not patterns or any(fnmatch.fnmatch(name, pattern) for pattern in patterns)
+
+def print_comparisons(comparisons: List[Comparison], hot: Sequence[str]):
+    print(f"{'benchmark':<70} {'baseline':>12} {'current':>12}  verdict")
+    print("-" * 110)
+    for c in comparisons:
+        baseline = f"{c.baseline_median * 1000:.3f}ms" if c.baseline_median is not None else '-'
+        current = f"{c.current_median * 1000:.3f}ms"
+        if c.regressed:
+            verdict = ("❌ REGRESSION " if is_hot(c.name, hot) else "⚠️  slower ") + c.reason
+        else:
+            verdict = "✅ " + c.reason
+        print(f"{c.name[-70:]:<70} {baseline:>12} {current:>12}  {verdict}")
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark history and regression gate")
+    parser.add_argument('--db', type=Path, default=DEFAULT_DB, help='Fichero SQLite del historial')
+    parser.add_argument('--machine', default=None, help='Huella de máquina (por defecto, automática)')
+    parser.add_argument('--commit', default=None, help='Commit (por defecto, git rev-parse HEAD)')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    for command in ('record', 'compare', 'check'):
+        cmd = sub.add_parser(command)
+        cmd.add_argument('results', type=Path, help='JSON de pytest-benchmark (--benchmark-json)')
+        if command != 'record':
+            cmd.add_argument('--threshold', type=float, default=0.10,
+                             help='Degradación máxima tolerada de la mediana (0.10 = 10%%)')
+            cmd.add_argument('--alpha', type=float, default=0.05, help='Nivel de significación')
+            cmd.add_argument('--hot', action='append', default=[],
+                             help='Patrón fnmatch de benchmarks que bloquean (repetible; por defecto todos)')
+
+    show = sub.add_parser('history')
+    show.add_argument('name', help='Nombre completo del benchmark')
+
+    args = parser.parse_args(argv)
+    machine = args.machine or machine_fingerprint()
+    commit = args.commit or current_commit()
+    history = BenchmarkHistory(args.db)
+
+    try:
+        if args.command == 'history':
+            for created_at, sha, median in history.history(args.name, machine):
+                print(f"{created_at}  {sha[:10]}  {median * 1000:.3f}ms")
+            return 0
+
+        results = load_pytest_benchmark_json(args.results)
+        if args.command == 'record':
+            run_id = history.record(results, commit, machine)
+            print(f"📦 Recorded run {run_id}: {len(results)} benchmarks ({commit[:10]} @ {machine})")
+            return 0
+
+        comparisons = compare_run(history, results, machine, commit, args.threshold, args.alpha)
+        print_comparisons(comparisons, args.hot)
+
+        blocking = [c for c in comparisons if c.regressed and is_hot(c.name, args.hot)]
+        if blocking:
+            # Una ejecución que falla no pasa a ser baseline: aceptarla exige `record`
+            print(f"\n💥 {len(blocking)} performance regression(s) above {args.threshold:.0%}")
+            return 1
+        if args.command == 'check':
+            history.record(results, commit, machine)
+        print("\n✅ No blocking performance regressions")
+        return 0
+    finally:
+        history.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Benchmark: índice de n-gramas vs recorrido lineal para /api/search
+Mide ambas estrategias con 10k, 100k y 1M usuarios
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Permitir importar src/ al ejecutar desde la raíz del proyecto
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.search_index import NGramIndex
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+QUERIES = ['user12345', 'er999', 'example7', 'nomatch']
+
+def build_users(n: int):
+    """Genera n usuarios con el mismo formato que app.py"""
+    return {
+        i: {'id': i, 'username': f'user{i}', 'email': f'user{i}@example{i % 10}.com'}
+        for i in range(1, n + 1)
+    }
+
+def linear_scan(users_db, query: str):
+    """Implementación original del endpoint (recorrido completo)"""
+    results = []
+    for user in users_db.values():
+        if query.lower() in user['username'].lower():
+            results.append(user)
+    return results
+
+def time_call(func, *args, repeat: int = 5) -> float:
+    """Devuelve el mejor tiempo (en ms) de varias ejecuciones"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def run_benchmark(sizes, repeat: int):
+    print(f"{'users':>10} {'query':>12} {'scan (ms)':>12} {'index (ms)':>12} {'speedup':>10}")
+    print("-" * 60)
+
+    for size in sizes:
+        users_db = build_users(size)
+
+        build_start = time.perf_counter()
+        index = NGramIndex(fields=('username',))
+        for user_id, user in users_db.items():
+            index.add(user_id, user)
+        build_time = time.perf_counter() - build_start
+
+        for query in QUERIES:
+            indexed = [users_db[i] for i in index.search(query)]
+            assert indexed == linear_scan(users_db, query), f"Mismatch for {query!r}"
+
+            scan_ms = time_call(linear_scan, users_db, query, repeat=repeat)
+            index_ms = time_call(index.search, query, repeat=repeat)
+            speedup = scan_ms / index_ms if index_ms > 0 else float('inf')
+            print(f"{size:>10} {query:>12} {scan_ms:>12.3f} {index_ms:>12.3f} {speedup:>9.1f}x")
+
+        print(f"{'':>10} index build: {build_time:.2f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='Número de usuarios a probar')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Repeticiones por medición (se toma el mejor tiempo)')
+    args = parser.parse_args()
+
+    print("🔍 Search benchmark: linear scan vs n-gram index")
+    run_benchmark(args.sizes, args.repeat)
+
+if __name__ == "__main__":
+    main()
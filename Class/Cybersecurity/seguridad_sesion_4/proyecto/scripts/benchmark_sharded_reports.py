@@ -0,0 +1,70 @@
+"""
+Benchmark: resumen de usuarios en serie vs repartido en procesos
+Genera un JSONL sintético y mide el escalado con 1, 2, 4... workers
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Permitir importar src/ al ejecutar desde la raíz del proyecto
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.report_generator import ReportGenerator
+
+DOMAINS = ['gmail.com', 'company.com', 'university.edu', 'mail.org', 'example.net']
+
+def write_users_jsonl(path: Path, n: int):
+    """Escribe n usuarios sintéticos, uno por línea"""
+    rng = random.Random(42)
+    with open(path, 'w') as f:
+        for i in range(n):
+            f.write(json.dumps({
+                'id': i,
+                'username': f'user{i}',
+                'email': f'user{i}@{rng.choice(DOMAINS)}',
+                'is_active': rng.random() < 0.7
+            }) + '\n')
+
+def load_users(path: Path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=1_000_000, help='Usuarios a generar')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    generator = ReportGenerator()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'users.jsonl'
+        print(f"📝 Writing {args.users:,} users to {path}...")
+        write_users_jsonl(path, args.users)
+
+        # Serie: cargar el fichero completo y resumir en un proceso
+        start = time.perf_counter()
+        expected = generator.generate_user_summary(load_users(path))
+        serial = time.perf_counter() - start
+        print(f"\n{'mode':>16} {'time (s)':>10} {'speedup':>9}")
+        print("-" * 38)
+        print(f"{'serial (load)':>16} {serial:>10.2f} {1.0:>8.2f}x")
+
+        workers = 1
+        while workers <= args.max_workers:
+            start = time.perf_counter()
+            result = generator.generate_user_summary_sharded(path, workers=workers)
+            elapsed = time.perf_counter() - start
+            assert result == expected, "Sharded output differs from serial output"
+            print(f"{f'sharded x{workers}':>16} {elapsed:>10.2f} {serial / elapsed:>8.2f}x")
+            workers *= 2
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+"""
+Resultados estructurados de load testing con Locust
+
+Lee los CSV que genera `locust --csv <prefijo>` (<prefijo>_stats.csv y
+<prefijo>_stats_history.csv), los guarda en SQLite por escenario y permite
+comparar escenarios (smoke/normal/stress/spike) y detectar el "codo" de
+throughput: el punto en que añadir usuarios deja de aumentar las RPS.
+
+También contiene la búsqueda de capacidad en lazo cerrado: aumentar usuarios
+(por pasos o búsqueda binaria) hasta que se incumple el SLO de p95 o de errores.
+
+Uso:
+    python scripts/load_results.py compare
+    python scripts/load_results.py show stress
+    python scripts/load_results.py capacity
+"""
+
+import argparse
+import csv
+import sqlite3
+import sys
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_DB = Path("reports/load/results.sqlite")
+AGGREGATED = 'Aggregated'
+
+# Percentiles de Locust que se conservan (columna CSV -> campo)
+PERCENTILE_COLUMNS = {'50%': 'p50', '90%': 'p90', '95%': 'p95', '99%': 'p99'}
+
+@dataclass
+class EndpointStats:
+    """Métricas de un endpoint (o del agregado) en una ejecución"""
+    method: str
+    name: str
+    requests: int
+    failures: int
+    rps: float
+    avg_ms: float
+    max_ms: float
+    p50: Optional[float]
+    p90: Optional[float]
+    p95: Optional[float]
+    p99: Optional[float]
+
+    @property
+    def failure_rate(self) -> float:
+        return self.failures / self.requests if self.requests else 0.0
+
+def _number(value: str) -> Optional[float]:
+    """Locust escribe 'N/A' cuando aún no hay muestras"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def parse_stats_csv(path: Path) -> List[EndpointStats]:
+    """Una entrada por endpoint más la fila 'Aggregated'"""
+    with open(path, newline='') as f:
+        rows = list(csv.DictReader(f))
+
+    stats = []
+    for row in rows:
+        stats.append(EndpointStats(
+            method=row['Type'],
+            name=row['Name'],
+            requests=int(row['Request Count']),
+            failures=int(row['Failure Count']),
+            rps=_number(row['Requests/s']) or 0.0,
+            avg_ms=_number(row['Average Response Time']) or 0.0,
+            max_ms=_number(row['Max Response Time']) or 0.0,
+            **{field: _number(row.get(column)) for column, field in PERCENTILE_COLUMNS.items()}
+        ))
+    return stats
+
+def parse_stats_history_csv(path: Path) -> List[Tuple[int, float, Optional[float]]]:
+    """Serie (usuarios, RPS, p95) del agregado, una muestra por segundo"""
+    with open(path, newline='') as f:
+        return [
+            (int(row['User Count']), _number(row['Requests/s']) or 0.0, _number(row['95%']))
+            for row in csv.DictReader(f)
+            if row['Name'] == AGGREGATED
+        ]
+
+def aggregated(stats: Sequence[EndpointStats]) -> Optional[EndpointStats]:
+    return next((s for s in stats if s.name == AGGREGATED), None)
+
+def find_throughput_knee(points: Sequence[Tuple[int, float]], ratio: float = 0.5) -> Optional[int]:
+    """
+    Usuarios a partir de los cuales el throughput deja de escalar
+
+    points son pares (usuarios, RPS). La eficiencia de referencia es RPS/usuario
+    del primer punto; el codo es el primer tramo cuya ganancia marginal
+    (ΔRPS/Δusuarios) cae por debajo de ratio veces esa referencia.
+    """
+    by_users: Dict[int, float] = {}
+    for users, rps in points:
+        if users > 0:
+            by_users[users] = max(rps, by_users.get(users, 0.0))
+
+    ordered = sorted(by_users.items())
+    if len(ordered) < 2 or ordered[0][1] <= 0:
+        return None
+
+    reference = ordered[0][1] / ordered[0][0]
+    for (prev_users, prev_rps), (users, rps) in zip(ordered, ordered[1:]):
+        marginal = (rps - prev_rps) / (users - prev_users)
+        if marginal < ratio * reference:
+            return prev_users
+    return None
+
+@dataclass
+class CapacityProbe:
+    """Una ejecución a concurrencia fija durante la búsqueda de capacidad"""
+    users: int
+    rps: float
+    p95: Optional[float]
+    failure_rate: float
+    endpoints: List[EndpointStats]
+
+    @classmethod
+    def from_stats(cls, users: int, stats: Sequence[EndpointStats]) -> 'CapacityProbe':
+        total = aggregated(stats)
+        if total is None or total.requests == 0:
+            return cls(users, 0.0, None, 1.0, list(stats))
+        return cls(users, total.rps, total.p95, total.failure_rate, list(stats))
+
+    def meets(self, slo_p95_ms: float, max_error_rate: float) -> bool:
+        return (self.p95 is not None and self.p95 <= slo_p95_ms
+                and self.failure_rate <= max_error_rate)
+
+@dataclass
+class CapacityResult:
+    """Máxima concurrencia sostenible de una clase de usuario"""
+    user_class: str
+    strategy: str
+    best: Optional[CapacityProbe]      # mayor concurrencia que cumple el SLO
+    breached_at: Optional[int]         # menor concurrencia probada que lo incumple
+    probes: List[CapacityProbe]
+
+    @property
+    def max_users(self) -> int:
+        return self.best.users if self.best else 0
+
+def search_capacity(user_class: str, run_probe: Callable[[int], CapacityProbe], slo_p95_ms: float,
+                    max_error_rate: float, start_users: int = 5, max_users: int = 500,
+                    strategy: str = 'binary', step: int = None, factor: float = 2.0,
+                    resolution: float = 0.1) -> CapacityResult:
+    """
+    Busca la mayor concurrencia que cumple el SLO
+
+    - strategy='step': start_users, start_users + step, ... hasta el primer incumplimiento
+    - strategy='binary': crecimiento geométrico (×factor) hasta acotar el límite y
+      bisección hasta que el intervalo sea menor que resolution × usuarios
+    run_probe(users) ejecuta la carga con esa concurrencia y devuelve sus métricas
+    """
+    if strategy not in ('step', 'binary'):
+        raise ValueError(f"Unknown capacity search strategy: {strategy}")
+
+    probes: List[CapacityProbe] = []
+
+    def probe(users: int) -> bool:
+        result = run_probe(users)
+        probes.append(result)
+        return result.meets(slo_p95_ms, max_error_rate)
+
+    step = step or start_users
+    best_users, breached = None, None
+    users = min(start_users, max_users)
+
+    # Fase de subida: por pasos fijos o geométrica
+    while True:
+        if not probe(users):
+            breached = users
+            break
+        best_users = users
+        if users >= max_users:
+            break
+        users = min(max_users, users + step if strategy == 'step' else max(users + 1, int(users * factor)))
+
+    # Fase de bisección entre el último éxito y el primer incumplimiento
+    if strategy == 'binary' and best_users is not None and breached is not None:
+        low, high = best_users, breached
+        while high - low > max(1, int(low * resolution)):
+            middle = (low + high) // 2
+            if probe(middle):
+                low = middle
+            else:
+                high = middle
+        best_users, breached = low, high
+
+    best = next((p for p in reversed(probes) if p.users == best_users), None)
+    return CapacityResult(user_class, strategy, best, breached, probes)
+
+class LoadResultsDB:
+    """Almacén SQLite de ejecuciones de Locust"""
+
+    def __init__(self, db_path: Path = DEFAULT_DB):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                scenario TEXT NOT NULL,
+                users INTEGER NOT NULL,
+                duration TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                ramp_knee_users INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS capacity (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_class TEXT NOT NULL,
+                strategy TEXT NOT NULL,
+                max_users INTEGER NOT NULL,
+                rps REAL NOT NULL,
+                p95 REAL,
+                failure_rate REAL NOT NULL,
+                breached_at INTEGER,
+                slo_p95_ms REAL NOT NULL,
+                slo_error_rate REAL NOT NULL,
+                created_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS endpoint_stats (
+                run_id INTEGER NOT NULL REFERENCES runs(id),
+                method TEXT NOT NULL,
+                name TEXT NOT NULL,
+                requests INTEGER NOT NULL,
+                failures INTEGER NOT NULL,
+                rps REAL NOT NULL,
+                avg_ms REAL NOT NULL,
+                max_ms REAL NOT NULL,
+                p50 REAL, p90 REAL, p95 REAL, p99 REAL,
+                PRIMARY KEY (run_id, method, name)
+            );
+        """)
+
+    def close(self):
+        self.conn.close()
+
+    def record(self, scenario: str, users: int, duration: str, stats: Sequence[EndpointStats],
+               ramp_knee_users: int = None) -> int:
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (scenario, users, duration, created_at, ramp_knee_users) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (scenario, users, duration, datetime.utcnow().isoformat(), ramp_knee_users)
+            )
+            run_id = cursor.lastrowid
+            self.conn.executemany(
+                "INSERT INTO endpoint_stats VALUES "
+                "(:run_id, :method, :name, :requests, :failures, :rps, :avg_ms, :max_ms, "
+                ":p50, :p90, :p95, :p99)",
+                [dict(asdict(s), run_id=run_id) for s in stats]
+            )
+        return run_id
+
+    def record_capacity(self, result: CapacityResult, slo_p95_ms: float, slo_error_rate: float) -> int:
+        best = result.best
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO capacity (user_class, strategy, max_users, rps, p95, failure_rate, "
+                "breached_at, slo_p95_ms, slo_error_rate, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (result.user_class, result.strategy, result.max_users, best.rps if best else 0.0,
+                 best.p95 if best else None, best.failure_rate if best else 1.0, result.breached_at,
+                 slo_p95_ms, slo_error_rate, datetime.utcnow().isoformat())
+            )
+        return cursor.lastrowid
+
+    def latest_capacity(self) -> List[Dict]:
+        """Última búsqueda de capacidad de cada clase de usuario"""
+        rows = self.conn.execute("""
+            SELECT user_class, strategy, max_users, rps, p95, failure_rate, breached_at,
+                   slo_p95_ms, slo_error_rate, created_at
+            FROM capacity WHERE id IN (SELECT MAX(id) FROM capacity GROUP BY user_class)
+            ORDER BY user_class
+        """).fetchall()
+        keys = ['user_class', 'strategy', 'max_users', 'rps', 'p95', 'failure_rate', 'breached_at',
+                'slo_p95_ms', 'slo_error_rate', 'created_at']
+        return [dict(zip(keys, row)) for row in rows]
+
+    def endpoints(self, run_id: int) -> List[EndpointStats]:
+        rows = self.conn.execute(
+            "SELECT method, name, requests, failures, rps, avg_ms, max_ms, p50, p90, p95, p99 "
+            "FROM endpoint_stats WHERE run_id = ? ORDER BY name = ?, name, method",
+            (run_id, AGGREGATED)
+        ).fetchall()
+        return [EndpointStats(*row) for row in rows]
+
+    def latest_runs(self) -> List[Dict]:
+        """Última ejecución de cada escenario con su agregado, ordenadas por usuarios"""
+        rows = self.conn.execute("""
+            SELECT runs.id, runs.scenario, runs.users, runs.duration, runs.ramp_knee_users,
+                   s.requests, s.failures, s.rps, s.p50, s.p95, s.p99
+            FROM runs JOIN endpoint_stats s ON s.run_id = runs.id AND s.name = ?
+            WHERE runs.id IN (SELECT MAX(id) FROM runs GROUP BY scenario)
+            ORDER BY runs.users, runs.id
+        """, (AGGREGATED,)).fetchall()
+        keys = ['run_id', 'scenario', 'users', 'duration', 'ramp_knee_users',
+                'requests', 'failures', 'rps', 'p50', 'p95', 'p99']
+        return [dict(zip(keys, row)) for row in rows]
+
+def print_endpoint_table(stats: Sequence[EndpointStats]):
+    print(f"{'endpoint':<32} {'reqs':>7} {'fail%':>7} {'rps':>8} {'p50':>7} {'p95':>7} {'p99':>7}")
+    print("-" * 80)
+    for s in stats:
+        label = f"{s.method} {s.name}".strip()
+        percentiles = [f"{p:.0f}" if p is not None else '-' for p in (s.p50, s.p95, s.p99)]
+        print(f"{label[:32]:<32} {s.requests:>7} {s.failure_rate:>7.1%} {s.rps:>8.2f} "
+              f"{percentiles[0]:>7} {percentiles[1]:>7} {percentiles[2]:>7}")
+
+def print_scenario_comparison(runs: Sequence[Dict], ratio: float = 0.5):
+    """Tabla entre escenarios y codo de throughput entre ellos"""
+    print(f"{'scenario':<12} {'users':>6} {'rps':>8} {'rps/user':>9} {'fail%':>7} "
+          f"{'p50':>7} {'p95':>7} {'p99':>7}  ramp knee")
+    print("-" * 90)
+    for run in runs:
+        fail_rate = run['failures'] / run['requests'] if run['requests'] else 0.0
+        percentiles = [f"{run[p]:.0f}" if run[p] is not None else '-' for p in ('p50', 'p95', 'p99')]
+        knee = f"~{run['ramp_knee_users']} users" if run['ramp_knee_users'] else '-'
+        print(f"{run['scenario']:<12} {run['users']:>6} {run['rps']:>8.2f} "
+              f"{run['rps'] / run['users']:>9.3f} {fail_rate:>7.1%} "
+              f"{percentiles[0]:>7} {percentiles[1]:>7} {percentiles[2]:>7}  {knee}")
+
+    knee = find_throughput_knee([(run['users'], run['rps']) for run in runs], ratio)
+    if knee is not None:
+        print(f"\n⚠️  Throughput knee: RPS stops scaling beyond ~{knee} users")
+    else:
+        print("\n✅ No throughput knee across scenarios")
+
+def print_capacity_report(capacity: Sequence[Dict]):
+    """Máxima concurrencia y throughput sostenibles por clase de usuario"""
+    print(f"{'user class':<16} {'max users':>10} {'rps':>8} {'p95':>7} {'fail%':>7}  limit")
+    print("-" * 72)
+    for row in capacity:
+        p95 = f"{row['p95']:.0f}" if row['p95'] is not None else '-'
+        limit = (f"SLO breached at {row['breached_at']} users" if row['breached_at']
+                 else "not reached (raise --max-users)")
+        print(f"{row['user_class']:<16} {row['max_users']:>10} {row['rps']:>8.2f} {p95:>7} "
+              f"{row['failure_rate']:>7.1%}  {limit}")
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Locust load test results")
+    parser.add_argument('--db', type=Path, default=DEFAULT_DB, help='Fichero SQLite de resultados')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    compare = sub.add_parser('compare', help='Comparar la última ejecución de cada escenario')
+    compare.add_argument('--knee-ratio', type=float, default=0.5,
+                         help='Ganancia marginal mínima relativa para considerar que escala')
+    show = sub.add_parser('show', help='Endpoints de la última ejecución de un escenario')
+    show.add_argument('scenario')
+    sub.add_parser('capacity', help='Última búsqueda de capacidad por clase de usuario')
+
+    args = parser.parse_args(argv)
+    db = LoadResultsDB(args.db)
+    try:
+        if args.command == 'capacity':
+            print_capacity_report(db.latest_capacity())
+            return 0
+
+        runs = db.latest_runs()
+        if args.command == 'compare':
+            print_scenario_comparison(runs, args.knee_ratio)
+            return 0
+
+        run = next((r for r in runs if r['scenario'] == args.scenario), None)
+        if run is None:
+            print(f"No runs recorded for scenario '{args.scenario}'")
+            return 1
+        print_endpoint_table(db.endpoints(run['run_id']))
+        return 0
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,21 +1,65 @@
 """
 Script para automatizar load testing con diferentes escenarios
+
+Uso:
+    python scripts/run_load_test.py                          # escenarios smoke/normal/stress/spike
+    python scripts/run_load_test.py --capacity --slo-p95 500 # búsqueda de capacidad por clase
+    python scripts/run_load_test.py --workers auto           # master + un worker de Locust por núcleo
 """
 
+import argparse
 import subprocess
 import time
 import requests
 import signal
+import socket
 import os
 import sys
 from pathlib import Path
+from urllib.parse import urlparse
+
+# Permitir importar scripts/ al ejecutar desde la raíz del proyecto
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from scripts.load_results import (
+    CapacityProbe, LoadResultsDB, aggregated, find_throughput_knee, parse_stats_csv,
+    parse_stats_history_csv, print_capacity_report, print_endpoint_table,
+    print_scenario_comparison, search_capacity
+)
+
+# Clases de usuario definidas en locustfile.py
+USER_CLASSES = ('WebsiteUser', 'HeavyUser', 'MonitoringUser')
+
+# Segundos que el master espera a que se conecten todos los workers
+WORKER_CONNECT_TIMEOUT = 60
+
+# Ficheros que escribe `locust --csv <prefijo>`
+CSV_SUFFIXES = ('_stats.csv', '_stats_history.csv', '_failures.csv', '_exceptions.csv')
+
+def free_port() -> int:
+    """Puerto TCP libre en loopback para el master de Locust"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def remove_stale_csv(csv_prefix: Path) -> None:
+    """Borra los CSV de una ejecución anterior para que un fallo de Locust no los reutilice"""
+    for suffix in CSV_SUFFIXES:
+        Path(f"{csv_prefix}{suffix}").unlink(missing_ok=True)
 
 class LoadTestRunner:
     """Automatiza ejecución de load tests con diferentes configuraciones"""
     
-    def __init__(self, host="http://localhost:5000"):
+    def __init__(self, host="http://localhost:5000", results_db: Path = Path("reports/load/results.sqlite"),
+                 workers: int = 0):
+        """workers=0 ejecuta Locust en un solo proceso; N > 0 lanza master + N workers locales"""
         self.host = host
         self.server_process = None
+        self.results_db = results_db
+        self.workers = workers
+        self.worker_processes = []
     
     def check_server_health(self) -> bool:
         """Verifica que el servidor esté respondiendo"""
@@ -32,9 +76,10 @@ class LoadTestRunner:
             return
         
         print(f"🚀 Starting server at {self.host}...")
+        port = urlparse(self.host).port or 80
         self.server_process = subprocess.Popen([
-            sys.executable, "src/app.py"
-        ], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            sys.executable, "src/app.py", "--port", str(port)
+        ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         
         # Esperar a que el servidor inicie
         for i in range(30):  # Máximo 30 segundos
@@ -52,37 +97,215 @@ class LoadTestRunner:
             self.server_process.terminate()
             self.server_process.wait()
     
-    def run_load_test(self, users: int, duration: str, description: str):
-        """Ejecuta load test con configuración específica"""
-        print(f"\n🔄 {description}")
-        print(f"Users: {users}, Duration: {duration}")
-        
+    def stop_workers(self, timeout: float = 10):
+        """Detiene los workers que sigan vivos (normalmente salen al terminar el master)"""
+        for process in self.worker_processes:
+            try:
+                process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                process.terminate()
+                try:
+                    process.wait(timeout=timeout)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.wait()
+        self.worker_processes = []
+
+    def _worker_command(self, master_port: int, user_classes=()) -> list:
+        return [
+            "locust",
+            "-f", "locustfile.py",
+            "--worker",
+            "--master-host", "127.0.0.1",
+            "--master-port", str(master_port),
+        ] + list(user_classes)
+
+    def _run_locust(self, cmd: list, user_classes=()) -> subprocess.CompletedProcess:
+        """
+        Ejecuta Locust en un proceso o, con workers, como master + N workers locales
+        El master espera a que se conecten todos, agrega sus estadísticas y escribe los CSV
+        """
+        if not self.workers:
+            return subprocess.run(cmd, capture_output=True, text=True)
+
+        port = free_port()
+        master_cmd = cmd + [
+            "--master",
+            "--master-bind-host", "127.0.0.1",
+            "--master-bind-port", str(port),
+            "--expect-workers", str(self.workers),
+            "--expect-workers-max-wait", str(WORKER_CONNECT_TIMEOUT),
+        ]
+        master = subprocess.Popen(master_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        try:
+            self.worker_processes = [
+                subprocess.Popen(self._worker_command(port, user_classes),
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                for _ in range(self.workers)
+            ]
+            stdout, stderr = master.communicate()
+        except BaseException:
+            master.terminate()
+            master.wait()
+            raise
+        finally:
+            self.stop_workers()
+
+        return subprocess.CompletedProcess(master_cmd, master.returncode, stdout, stderr)
+
+    def _locust_command(self, users: int, spawn_rate: int, duration: str, csv_prefix: Path,
+                        user_classes=(), html: str = None) -> list:
+        """Locust headless con estadísticas CSV (opcionalmente solo algunas clases)"""
         cmd = [
             "locust",
             "-f", "locustfile.py",
             "--host", self.host,
             "--users", str(users),
-            "--spawn-rate", str(min(users // 10, 10)),  # Spawn rate razonable
+            "--spawn-rate", str(spawn_rate),
             "--run-time", duration,
             "--headless",  # Sin interfaz web
-            "--html", f"reports/load_test_{users}users_{duration.replace('m', 'min')}.html"
+            "--only-summary",
+            "--csv", str(csv_prefix),
         ]
+        if html:
+            cmd += ["--html", html]
+        return cmd + list(user_classes)
+    
+    def run_load_test(self, users: int, duration: str, description: str, scenario: str = None):
+        """
+        Ejecuta load test con configuración específica
+        Guarda las estadísticas CSV de Locust en la base de resultados
+        """
+        scenario = scenario or f"{users}users"
+        print(f"\n🔄 {description}")
+        print(f"Users: {users}, Duration: {duration}"
+              + (f", Workers: {self.workers}" if self.workers else ""))
+        
+        csv_prefix = Path("reports/load") / scenario
+        csv_prefix.parent.mkdir(parents=True, exist_ok=True)
+        remove_stale_csv(csv_prefix)
+        
+        cmd = self._locust_command(
+            users, max(1, min(users // 10, 10)), duration, csv_prefix,  # Spawn rate razonable (>= 1)
+            html=f"reports/load_test_{users}users_{duration.replace('m', 'min')}.html"
+        )
         
         start_time = time.time()
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = self._run_locust(cmd)
         duration_actual = time.time() - start_time
         
-        if result.returncode == 0:
-            print(f"✅ {description} - Completed ({duration_actual:.1f}s)")
-            
-            # Extraer métricas básicas del output
-            output_lines = result.stdout.split('\n')
-            for line in output_lines:
-                if 'Aggregated' in line or 'Total' in line:
-                    print(f"📊 {line.strip()}")
-        else:
+        # Locust sale con código 1 si hubo fallos en requests: los CSV siguen siendo válidos
+        stats_path = Path(f"{csv_prefix}_stats.csv")
+        if not stats_path.exists():
             print(f"❌ {description} - Failed")
             print(f"Error: {result.stderr}")
+            return None
+        
+        stats = parse_stats_csv(stats_path)
+        history_path = Path(f"{csv_prefix}_stats_history.csv")
+        ramp_knee = None
+        if history_path.exists():
+            ramp_knee = find_throughput_knee(
+                [(count, rps) for count, rps, _ in parse_stats_history_csv(history_path)])
+        
+        db = LoadResultsDB(self.results_db)
+        try:
+            db.record(scenario, users, duration, stats, ramp_knee_users=ramp_knee)
+        finally:
+            db.close()
+        
+        total = aggregated(stats)
+        status = "✅" if result.returncode == 0 else "⚠️ "
+        print(f"{status} {description} - Completed ({duration_actual:.1f}s)")
+        if total is not None:
+            print(f"📊 {total.rps:.2f} req/s, {total.failure_rate:.1%} failures, "
+                  f"p95 {total.p95 or 0:.0f}ms")
+        print_endpoint_table(stats)
+        if ramp_knee is not None:
+            print(f"⚠️  Throughput stopped scaling during ramp-up at ~{ramp_knee} users")
+        return stats
+    
+    def wait_until_idle(self, timeout: float = 60) -> bool:
+        """Espera a que la cola de trabajos pesados se vacíe entre ejecuciones"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            try:
+                queue = requests.get(f"{self.host}/api/stats", timeout=5).json().get('job_queue', {})
+                if queue.get('queue_depth', 0) == 0 and queue.get('running', 0) == 0:
+                    return True
+            except (requests.RequestException, ValueError):
+                pass
+            time.sleep(1)
+        return False
+    
+    def run_capacity_probe(self, user_class: str, users: int, duration: str) -> CapacityProbe:
+        """
+        Carga sostenida con una sola clase de usuario y concurrencia fija
+        Parte de un servidor sin trabajos pendientes para que los probes sean independientes
+        """
+        self.wait_until_idle()
+        csv_prefix = Path("reports/load/capacity") / f"{user_class}_{users}"
+        csv_prefix.parent.mkdir(parents=True, exist_ok=True)
+        remove_stale_csv(csv_prefix)
+        
+        # Todos los usuarios a la vez: la ventana medida es la de carga estable
+        cmd = self._locust_command(users, users, duration, csv_prefix, user_classes=[user_class])
+        result = self._run_locust(cmd, user_classes=[user_class])
+        
+        stats_path = Path(f"{csv_prefix}_stats.csv")
+        if not stats_path.exists():
+            raise RuntimeError(f"locust produced no stats for {user_class} x{users}: {result.stderr}")
+        
+        probe = CapacityProbe.from_stats(users, parse_stats_csv(stats_path))
+        p95 = f"{probe.p95:.0f}ms" if probe.p95 is not None else '-'
+        print(f"   {user_class} x{users:<5} {probe.rps:8.2f} req/s  p95 {p95:>7}  "
+              f"failures {probe.failure_rate:.1%}")
+        return probe
+    
+    def run_capacity_search(self, user_classes=USER_CLASSES, slo_p95_ms: float = 500,
+                            max_error_rate: float = 0.01, strategy: str = 'binary',
+                            start_users: int = 5, max_users: int = 500, step: int = None,
+                            probe_duration: str = "30s"):
+        """
+        Busca la máxima concurrencia que cumple el SLO para cada clase de usuario
+        Sube usuarios por pasos o por búsqueda binaria contra el servidor local
+        """
+        try:
+            self.start_server_if_needed()
+            
+            print("\n" + "="*60)
+            print(f"CAPACITY SEARCH (p95 <= {slo_p95_ms:.0f}ms, errors <= {max_error_rate:.1%}, {strategy})")
+            print("="*60)
+            
+            db = LoadResultsDB(self.results_db)
+            try:
+                for user_class in user_classes:
+                    print(f"\n🔎 {user_class}")
+                    result = search_capacity(
+                        user_class,
+                        lambda users: self.run_capacity_probe(user_class, users, probe_duration),
+                        slo_p95_ms, max_error_rate, start_users=start_users, max_users=max_users,
+                        strategy=strategy, step=step
+                    )
+                    db.record_capacity(result, slo_p95_ms, max_error_rate)
+                    if result.best is not None:
+                        print(f"📊 {user_class}: {result.max_users} users, "
+                              f"{result.best.rps:.2f} req/s sustainable")
+                        print_endpoint_table(result.best.endpoints)
+                    else:
+                        print(f"❌ {user_class}: SLO breached already at {start_users} users")
+                
+                print("\n" + "="*60)
+                print("🎯 CAPACITY SUMMARY")
+                print("="*60)
+                print_capacity_report([row for row in db.latest_capacity()
+                                       if row['user_class'] in user_classes])
+            finally:
+                db.close()
+            
+            print(f"🗄️  Results database: {self.results_db}")
+        finally:
+            self.stop_server()
     
     def run_test_suite(self):
         """Ejecuta suite completa de load tests"""
@@ -97,34 +320,46 @@ class LoadTestRunner:
             self.run_load_test(
                 users=5,
                 duration="1m",
-                description="Smoke load test (light load verification)"
+                description="Smoke load test (light load verification)",
+                scenario="smoke"
             )
             
             # 2. Normal load test
             self.run_load_test(
                 users=20,
                 duration="3m",
-                description="Normal load test (typical usage)"
+                description="Normal load test (typical usage)",
+                scenario="normal"
             )
             
             # 3. Stress test
             self.run_load_test(
                 users=50,
                 duration="2m",
-                description="Stress test (high load)"
+                description="Stress test (high load)",
+                scenario="stress"
             )
             
             # 4. Spike test (rápido pero intenso)
             self.run_load_test(
                 users=100,
                 duration="30s",
-                description="Spike test (sudden load increase)"
+                description="Spike test (sudden load increase)",
+                scenario="spike"
             )
             
             print("\n" + "="*60)
             print("🎉 LOAD TESTING COMPLETED")
             print("="*60)
+            
+            db = LoadResultsDB(self.results_db)
+            try:
+                print_scenario_comparison(db.latest_runs())
+            finally:
+                db.close()
+            
             print("📊 Reports generated in reports/ directory")
+            print(f"🗄️  Results database: {self.results_db}")
             print("📋 Review HTML reports for detailed metrics")
             
         finally:
@@ -132,21 +367,48 @@ class LoadTestRunner:
 
 def main():
     """Función principal"""
+    parser = argparse.ArgumentParser(description="Automated load testing")
+    parser.add_argument('--host', default="http://localhost:5000")
+    parser.add_argument('--capacity', action='store_true',
+                        help='Buscar la capacidad máxima por clase de usuario en lugar de los escenarios fijos')
+    parser.add_argument('--strategy', choices=['step', 'binary'], default='binary')
+    parser.add_argument('--slo-p95', type=float, default=500, help='SLO de latencia p95 (ms)')
+    parser.add_argument('--slo-errors', type=float, default=0.01, help='Tasa de errores máxima (0.01 = 1%%)')
+    parser.add_argument('--start-users', type=int, default=5)
+    parser.add_argument('--max-users', type=int, default=500)
+    parser.add_argument('--step', type=int, default=None, help='Incremento de usuarios en modo step')
+    parser.add_argument('--probe-duration', default="30s", help='Duración de cada ejecución de la búsqueda')
+    parser.add_argument('--user-class', action='append', choices=USER_CLASSES,
+                        help='Clase de usuario a medir (repetible; por defecto todas)')
+    parser.add_argument('--workers', default='0',
+                        help="Workers locales de Locust ('auto' = uno por núcleo; 0 = un solo proceso)")
+    args = parser.parse_args()
+    workers = (os.cpu_count() or 1) if args.workers == 'auto' else int(args.workers)
+    
     # Crear directorio de reportes
     Path("reports").mkdir(exist_ok=True)
     
-    runner = LoadTestRunner()
+    runner = LoadTestRunner(host=args.host, workers=workers)
     
     # Manejar Ctrl+C gracefully
     def signal_handler(sig, frame):
         print("\n🛑 Load testing interrupted")
+        runner.stop_workers(timeout=2)
         runner.stop_server()
         sys.exit(0)
     
     signal.signal(signal.SIGINT, signal_handler)
     
     try:
-        runner.run_test_suite()
+        if args.capacity:
+            runner.run_capacity_search(
+                user_classes=args.user_class or USER_CLASSES, slo_p95_ms=args.slo_p95,
+                max_error_rate=args.slo_errors, strategy=args.strategy,
+                start_users=args.start_users, max_users=args.max_users, step=args.step,
+                probe_duration=args.probe_duration
+            )
+        else:
+            runner.run_test_suite()
     except Exception as e:
         print(f"❌ Load testing failed: {e}")
         runner.stop_server()
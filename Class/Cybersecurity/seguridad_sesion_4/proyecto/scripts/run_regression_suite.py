@@ -68,11 +68,30 @@ def main():
     print("PHASE 4: PERFORMANCE REGRESSION (Speed verification)")
     print("="*60)
     
-    run_command(
-        "pytest tests/regression/performance/ --benchmark-only --benchmark-sort=mean",
+    Path("reports/benchmarks").mkdir(parents=True, exist_ok=True)
+    benchmarks_ok = run_command(
+        "pytest tests/regression/performance/ --benchmark-only --benchmark-sort=mean "
+        "--benchmark-json=reports/benchmarks/latest.json --benchmark-save-data",
         "Performance regression benchmarks"
     )
     
+    # Comparar con el historial (misma máquina) y bloquear regresiones en funciones críticas
+    if benchmarks_ok and not run_command(
+        "python scripts/benchmark_history.py check reports/benchmarks/latest.json "
+        "--threshold 0.10 --hot '*search*'",
+        "Benchmark history regression gate"
+    ):
+        print("\n💥 PERFORMANCE GATE: hot function slowed down significantly. Stopping execution.")
+        sys.exit(1)
+    
+    # Complejidad empírica: una función O(n) que pasa a O(n²) bloquea la suite
+    if not run_command(
+        "python scripts/scaling_benchmark.py --csv reports/benchmarks/scaling.csv",
+        "Scaling benchmark (empirical complexity)"
+    ):
+        print("\n💥 COMPLEXITY GATE: a function changed complexity class. Stopping execution.")
+        sys.exit(1)
+    
     # 5. Generar reportes
     print("\n" + "="*60)
     print("PHASE 5: REPORTING")
@@ -95,6 +114,8 @@ def main():
     print("  - HTML Report: reports/regression_report.html")
     print("  - Coverage: reports/coverage/index.html")
     print("  - Benchmark results in terminal output")
+    print("  - Benchmark history: reports/benchmarks/history.sqlite")
+    print("  - Scaling curves (CSV): reports/benchmarks/scaling.csv")
     
     print("\n📋 Next steps:")
     print("  1. Review any failed tests")
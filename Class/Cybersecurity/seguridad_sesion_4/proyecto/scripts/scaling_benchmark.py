@@ -0,0 +1,224 @@
+"""
+Benchmark de escalado: complejidad empírica de DataProcessor y ReportGenerator
+
+Ejecuta cada función con tamaños geométricos (n, 2n, 4n...), ajusta el exponente
+de crecimiento t ≈ c·n^k por mínimos cuadrados en escala log-log y lo clasifica
+(constante, lineal, cuadrática, cúbica). Falla si la clase ajustada no es la
+esperada, por ejemplo si una función O(n) pasa a ser O(n²).
+
+Uso:
+    python scripts/scaling_benchmark.py                       # todas las funciones
+    python scripts/scaling_benchmark.py --only search_users --csv reports/benchmarks/scaling.csv
+"""
+
+import argparse
+import csv
+import math
+import random
+import sys
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+# Permitir importar src/ al ejecutar desde la raíz del proyecto
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.data_processor import DataProcessor
+from src.report_generator import ReportGenerator
+
+DEFAULT_CSV = Path("reports/benchmarks/scaling.csv")
+
+# Bandas de exponente -> clase. n·log n ajusta a ~1.1 en tamaños prácticos,
+# así que comparte banda con O(n): el objetivo es detectar saltos de clase
+COMPLEXITY_BANDS = [
+    (0.5, 'O(1)'),
+    (1.5, 'O(n)'),
+    (2.5, 'O(n^2)'),
+    (math.inf, 'O(n^3)'),
+]
+
+CSV_FIELDS = ['case', 'n', 'seconds', 'seconds_per_item', 'exponent', 'r_squared',
+              'fitted_class', 'expected_class']
+
+@dataclass
+class ScalingCase:
+    """Función a medir: make_input(n) construye la entrada (fuera del tiempo medido)"""
+    name: str
+    func: Callable[[Any], Any]
+    make_input: Callable[[int], Any]
+    sizes: Sequence[int]
+    expected: str
+
+@dataclass
+class ScalingResult:
+    """Tiempos por tamaño y ajuste del exponente"""
+    case: str
+    sizes: List[int]
+    seconds: List[float]
+    exponent: float
+    r_squared: float
+    fitted_class: str
+    expected: str
+
+    @property
+    def ok(self) -> bool:
+        return self.fitted_class == self.expected
+
+def geometric_sizes(start: int, steps: int, factor: int = 2) -> List[int]:
+    return [start * factor ** i for i in range(steps)]
+
+def fit_exponent(sizes: Sequence[int], seconds: Sequence[float]) -> Tuple[float, float]:
+    """Pendiente y R² de log(t) frente a log(n)"""
+    xs = [math.log(n) for n in sizes]
+    ys = [math.log(max(t, 1e-12)) for t in seconds]
+    n = len(xs)
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    syy = sum((y - mean_y) ** 2 for y in ys)
+
+    slope = sxy / sxx if sxx else 0.0
+    # Tiempos constantes: no hay varianza que explicar
+    r_squared = (sxy * sxy) / (sxx * syy) if sxx and syy > 1e-12 else 1.0
+    return slope, r_squared
+
+def complexity_class(exponent: float) -> str:
+    for upper, label in COMPLEXITY_BANDS:
+        if exponent < upper:
+            return label
+    return COMPLEXITY_BANDS[-1][1]
+
+def time_call(func: Callable[[Any], Any], arg: Any, repeats: int = 5, min_time: float = 0.005) -> float:
+    """
+    Mejor tiempo por llamada de varias repeticiones
+    Cada repetición encadena llamadas hasta superar min_time (funciones muy rápidas)
+    """
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func(arg)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2
+
+    best = elapsed / loops
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func(arg)
+        best = min(best, (time.perf_counter() - start) / loops)
+    return best
+
+def measure_scaling(case: ScalingCase, repeats: int = 5) -> ScalingResult:
+    seconds = []
+    for n in case.sizes:
+        data = case.make_input(n)
+        seconds.append(time_call(case.func, data, repeats=repeats))
+
+    exponent, r_squared = fit_exponent(case.sizes, seconds)
+    return ScalingResult(case.name, list(case.sizes), seconds, exponent, r_squared,
+                         complexity_class(exponent), case.expected)
+
+def write_csv(results: Sequence[ScalingResult], path: Path) -> Path:
+    """Formato largo (una fila por caso y tamaño), listo para graficar"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for result in results:
+            for n, seconds in zip(result.sizes, result.seconds):
+                writer.writerow({
+                    'case': result.case,
+                    'n': n,
+                    'seconds': f"{seconds:.9f}",
+                    'seconds_per_item': f"{seconds / n:.12f}",
+                    'exponent': f"{result.exponent:.3f}",
+                    'r_squared': f"{result.r_squared:.3f}",
+                    'fitted_class': result.fitted_class,
+                    'expected_class': result.expected,
+                })
+    return path
+
+def make_users(n: int) -> List[Dict[str, Any]]:
+    rng = random.Random(n)
+    return [{
+        'id': i,
+        'username': f'user{i}',
+        'email': f'user{i}@example{i % 10}.com',
+        'is_active': rng.random() < 0.7
+    } for i in range(n)]
+
+def make_numbers(n: int) -> List[float]:
+    rng = random.Random(n)
+    return [rng.uniform(0, 1000) for _ in range(n)]
+
+def make_daily_data(n: int) -> Dict[str, int]:
+    rng = random.Random(n)
+    start = date(2000, 1, 1)
+    days = [(start + timedelta(days=i)).isoformat() for i in range(n)]
+    rng.shuffle(days)
+    return {day: rng.randint(0, 100) for day in days}
+
+def default_cases() -> List[ScalingCase]:
+    """Funciones públicas de DataProcessor / ReportGenerator y su clase esperada"""
+    processor = DataProcessor()
+    generator = ReportGenerator()
+    linear = geometric_sizes(1_000, 5)
+
+    return [
+        # process_user_list simula 1ms por usuario: tamaños pequeños
+        ScalingCase('process_user_list', processor.process_user_list, make_users,
+                    geometric_sizes(10, 4), 'O(n)'),
+        ScalingCase('process_user_batch', processor.process_user_batch, make_users, linear, 'O(n)'),
+        ScalingCase('search_users', lambda users: processor.search_users(users, 'user1'),
+                    make_users, linear, 'O(n)'),
+        ScalingCase('calculate_statistics', processor.calculate_statistics, make_numbers, linear, 'O(n)'),
+        ScalingCase('calculate_statistics_streaming', processor.calculate_statistics_streaming,
+                    make_numbers, linear, 'O(n)'),
+        ScalingCase('slow_algorithm', processor.slow_algorithm, lambda n: list(range(n)),
+                    geometric_sizes(50, 4), 'O(n^2)'),
+        ScalingCase('optimized_algorithm', processor.optimized_algorithm, lambda n: list(range(n)),
+                    linear, 'O(1)'),
+        ScalingCase('generate_user_summary', generator.generate_user_summary, make_users, linear, 'O(n)'),
+        ScalingCase('generate_performance_report', generator.generate_performance_report,
+                    make_numbers, linear, 'O(n)'),
+        ScalingCase('generate_trend_analysis', generator.generate_trend_analysis,
+                    make_daily_data, linear, 'O(n)'),
+    ]
+
+def print_results(results: Sequence[ScalingResult]):
+    print(f"{'function':<32} {'sizes':>14} {'exponent':>9} {'R²':>6} {'class':>8}  verdict")
+    print("-" * 88)
+    for r in results:
+        sizes = f"{r.sizes[0]}..{r.sizes[-1]}"
+        verdict = "✅" if r.ok else f"❌ expected {r.expected}"
+        print(f"{r.case:<32} {sizes:>14} {r.exponent:>9.2f} {r.r_squared:>6.2f} {r.fitted_class:>8}  {verdict}")
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Empirical complexity scaling benchmark")
+    parser.add_argument('--csv', type=Path, default=DEFAULT_CSV, help='Salida CSV para graficar')
+    parser.add_argument('--only', action='append', default=[], help='Medir solo estas funciones (repetible)')
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    cases = [case for case in default_cases() if not args.only or case.name in args.only]
+    results = [measure_scaling(case, repeats=args.repeats) for case in cases]
+    print_results(results)
+    print(f"\n📈 CSV written to {write_csv(results, args.csv)}")
+
+    changed = [r for r in results if not r.ok]
+    if changed:
+        print(f"\n💥 {len(changed)} function(s) changed complexity class")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
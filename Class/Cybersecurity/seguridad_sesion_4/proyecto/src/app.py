@@ -3,7 +3,7 @@ API Flask simple para demostrar load testing
 Incluye endpoints con diferentes características de rendimiento
 """
 
-from flask import Flask, jsonify, request, abort
+from flask import Flask, jsonify, request, abort, g
 import time
 import random
 import threading
@@ -11,26 +11,145 @@ from datetime import datetime
 from typing import Dict, List
 import json
 
+try:
+    from src.job_queue import JobQueue, QueueFullError
+    from src.metrics import RequestMetrics
+    from src.post_store import InvalidCursorError, PostStore
+    from src.search_index import NGramIndex
+except ImportError:  # Ejecutado como script: python src/app.py
+    from job_queue import JobQueue, QueueFullError
+    from metrics import RequestMetrics
+    from post_store import InvalidCursorError, PostStore
+    from search_index import NGramIndex
+
 app = Flask(__name__)
 
 # Simulación de base de datos en memoria
 users_db = {}
-posts_db = {}
+posts_db = PostStore()  # Ordenado, paginación O(tamaño de página)
 sessions = {}
-request_count = 0
-request_lock = threading.Lock()
+
+# Contador de requests e histogramas de latencia por shards (sin lock global)
+request_metrics = RequestMetrics()
+
+# Índice de n-gramas para /api/search (se actualiza al crear usuarios)
+SEARCH_FIELDS = ('username', 'email')
+search_index = NGramIndex(fields=SEARCH_FIELDS)
+
+# Pool acotado para /api/heavy-operation (responde 202 y se consulta en /api/jobs/<id>)
+HEAVY_WORKERS = 4
+HEAVY_MAX_PENDING = 50
+heavy_jobs = JobQueue(workers=HEAVY_WORKERS, max_pending=HEAVY_MAX_PENDING)
 
 def get_request_stats():
     """Obtiene estadísticas de requests para monitoring"""
-    with request_lock:
-        return request_count
+    return request_metrics.total_requests()
+
+# Lógica compartida por la versión WSGI (este módulo) y ASGI (async_app.py)
+def add_user(username: str, email: str = None) -> Dict:
+    """Registra un usuario en la BD en memoria y en el índice de búsqueda"""
+    user_id = len(users_db) + 1
+    user = {
+        'id': user_id,
+        'username': username,
+        'email': email if email is not None else f'{username}@example.com',
+        'created_at': datetime.utcnow().isoformat()
+    }
+    users_db[user_id] = user
+    search_index.add(user_id, user)
+    return user
+
+def parse_search_fields(raw: str) -> List[str]:
+    """Valida el parámetro fields de /api/search; lanza ValueError si no es válido"""
+    fields = [f for f in raw.split(',') if f]
+    if not fields or any(f not in SEARCH_FIELDS for f in fields):
+        raise ValueError(f"fields must be a subset of: {', '.join(SEARCH_FIELDS)}")
+    return fields
+
+def find_users(query: str, fields: List[str]) -> List[Dict]:
+    """Búsqueda por subcadena usando el índice de n-gramas"""
+    return [users_db[user_id] for user_id in search_index.search(query, fields)]
+
+def paginate_posts(page: int, per_page: int, cursor: str = None) -> Dict:
+    """
+    Página de posts por offset (page) o por cursor
+    Lanza InvalidCursorError si el cursor no es válido
+    """
+    total_posts = len(posts_db)
+    pagination = {
+        'per_page': per_page,
+        'total': total_posts,
+        'pages': (total_posts + per_page - 1) // per_page if per_page > 0 else 0
+    }
+    
+    if cursor is not None:
+        # Paginación por cursor: no depende de la profundidad de la página
+        posts_slice, next_cursor = posts_db.page_after(cursor, per_page)
+        pagination['cursor'] = cursor
+    else:
+        # Paginación por offset: solo se copia la página pedida
+        start = (page - 1) * per_page
+        end = start + per_page
+        posts_slice = posts_db.slice(start, end)
+        next_cursor = (PostStore.encode_cursor(posts_slice[-1]['id'])
+                       if posts_slice and 0 <= end < total_posts else None)
+        pagination['page'] = page
+    
+    pagination['next_cursor'] = next_cursor
+    return {'posts': posts_slice, 'pagination': pagination}
+
+def build_stats() -> Dict:
+    """Estadísticas del servidor para /api/stats"""
+    return {
+        'total_requests': get_request_stats(),
+        'total_users': len(users_db),
+        'total_posts': len(posts_db),
+        'active_sessions': len(sessions),
+        'endpoints': request_metrics.snapshot(),
+        'job_queue': heavy_jobs.metrics(),
+        'timestamp': datetime.utcnow().isoformat()
+    }
+
+def run_heavy_operation() -> Dict:
+    """Trabajo pesado ejecutado por el pool (1-3 segundos, 10% de error)"""
+    start = time.perf_counter()
+    time.sleep(random.uniform(1.0, 3.0))
+    
+    # 10% de probabilidad de error para simular condiciones reales
+    if random.random() < 0.1:
+        raise RuntimeError('Internal server error during heavy operation')
+    
+    return {
+        'status': 'completed',
+        'processing_time': round(time.perf_counter() - start, 3),
+        'timestamp': datetime.utcnow().isoformat()
+    }
+
+def submit_heavy_operation() -> Dict:
+    """Encola la operación pesada; lanza QueueFullError si no hay hueco"""
+    job = heavy_jobs.submit(run_heavy_operation)
+    job['status_url'] = f"/api/jobs/{job['id']}"
+    return job
+
+def slow_sleep_time(current_load: int) -> float:
+    """Degradación progresiva bajo carga (máximo 2 segundos)"""
+    return min(0.1 + (current_load * 0.001), 2.0)
 
 @app.before_request
 def track_requests():
     """Middleware para contar requests"""
-    global request_count
-    with request_lock:
-        request_count += 1
+    g.request_start = time.perf_counter()
+    request_metrics.count_request()
+
+@app.after_request
+def record_latency(response):
+    """Middleware para registrar la latencia por endpoint"""
+    start = g.get('request_start')
+    if start is not None:
+        rule = request.url_rule.rule if request.url_rule else '<unmatched>'
+        elapsed_us = int((time.perf_counter() - start) * 1_000_000)
+        request_metrics.record_latency(f"{request.method} {rule}", elapsed_us)
+    return response
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -76,14 +195,7 @@ def create_user():
     # Simular validación y escritura a BD (100-200ms)
     time.sleep(random.uniform(0.1, 0.2))
     
-    user_id = len(users_db) + 1
-    user = {
-        'id': user_id,
-        'username': username,
-        'email': data.get('email', f'{username}@example.com'),
-        'created_at': datetime.utcnow().isoformat()
-    }
-    users_db[user_id] = user
+    user = add_user(username, data.get('email'))
     
     return jsonify(user), 201
 
@@ -106,47 +218,43 @@ def get_posts():
     """
     Endpoint con paginación - útil para load testing
     Simula consulta más compleja
+    Acepta `page` (offset) o `cursor` (opaco, devuelto en next_cursor)
     """
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
+    cursor = request.args.get('cursor')
     
     # Simular consulta compleja (100-300ms)
     time.sleep(random.uniform(0.1, 0.3))
     
-    # Simular paginación
-    total_posts = len(posts_db)
-    start = (page - 1) * per_page
-    end = start + per_page
-    posts_slice = list(posts_db.values())[start:end]
+    try:
+        result = paginate_posts(page, per_page, cursor)
+    except InvalidCursorError as e:
+        abort(400, str(e))
     
-    return jsonify({
-        'posts': posts_slice,
-        'pagination': {
-            'page': page,
-            'per_page': per_page,
-            'total': total_posts,
-            'pages': (total_posts + per_page - 1) // per_page
-        }
-    }), 200
+    return jsonify(result), 200
 
 @app.route('/api/search', methods=['GET'])
 def search():
     """
     Endpoint de búsqueda - operación costosa
     Ideal para stress testing
+    Usa el índice de n-gramas: el coste no crece con el total de usuarios
     """
     query = request.args.get('q', '')
     if not query:
         abort(400, 'Query parameter q is required')
     
+    # Campos donde buscar (por defecto solo username, como antes)
+    try:
+        fields = parse_search_fields(request.args.get('fields', 'username'))
+    except ValueError as e:
+        abort(400, str(e))
+    
     # Simular búsqueda compleja (200-500ms)
     time.sleep(random.uniform(0.2, 0.5))
     
-    # Simular resultados basados en query
-    results = []
-    for user in users_db.values():
-        if query.lower() in user['username'].lower():
-            results.append(user)
+    results = find_users(query, fields)
     
     return jsonify({
         'query': query,
@@ -160,19 +268,31 @@ def heavy_operation():
     """
     Endpoint que simula operación pesada
     Para testing de límites y timeouts
+    Se ejecuta en segundo plano: responde 202 con el id del trabajo
+    y 503 si la cola está llena (backpressure)
     """
-    # Simular operación muy lenta (1-3 segundos)
-    time.sleep(random.uniform(1.0, 3.0))
+    try:
+        job = submit_heavy_operation()
+    except QueueFullError as e:
+        response = jsonify({'error': str(e), 'job_queue': heavy_jobs.metrics()})
+        response.headers['Retry-After'] = '1'
+        return response, 503
     
-    # 10% de probabilidad de error para simular condiciones reales
-    if random.random() < 0.1:
-        abort(500, 'Internal server error during heavy operation')
+    response = jsonify(job)
+    response.headers['Location'] = job['status_url']
+    return response, 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Estado de un trabajo en segundo plano
+    queued -> running -> completed | failed
+    """
+    job = heavy_jobs.get(job_id)
+    if job is None:
+        abort(404, 'Job not found')
     
-    return jsonify({
-        'status': 'completed',
-        'processing_time': random.uniform(1.0, 3.0),
-        'timestamp': datetime.utcnow().isoformat()
-    }), 200
+    return jsonify(job), 200
 
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
@@ -180,13 +300,7 @@ def get_stats():
     Endpoint para obtener estadísticas del servidor
     Útil para monitoreo durante load testing
     """
-    return jsonify({
-        'total_requests': get_request_stats(),
-        'total_users': len(users_db),
-        'total_posts': len(posts_db),
-        'active_sessions': len(sessions),
-        'timestamp': datetime.utcnow().isoformat()
-    }), 200
+    return jsonify(build_stats()), 200
 
 @app.route('/api/slow', methods=['GET'])
 def slow_endpoint():
@@ -196,7 +310,7 @@ def slow_endpoint():
     """
     # Simular degradación progresiva bajo carga
     current_load = get_request_stats()
-    sleep_time = min(0.1 + (current_load * 0.001), 2.0)  # Máximo 2 segundos
+    sleep_time = slow_sleep_time(current_load)
     time.sleep(sleep_time)
     
     return jsonify({
@@ -219,6 +333,7 @@ def init_test_data():
             'created_at': datetime.utcnow().isoformat()
         }
         users_db[i] = user
+        search_index.add(i, user)
     
     # Crear posts de prueba
     for i in range(1, 21):
@@ -229,20 +344,47 @@ def init_test_data():
             'author_id': random.randint(1, 10),
             'created_at': datetime.utcnow().isoformat()
         }
-        posts_db[i] = post
+        posts_db.add(post)
 
-if __name__ == '__main__':
-    init_test_data()
-    print("🚀 Starting Flask server for load testing...")
+def main():
+    """Lanzador: servidor Flask con hilos (por defecto) o versión ASGI con --async"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='API para load testing')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='Servir la versión ASGI (uvicorn + sleeps no bloqueantes)')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5001)
+    args = parser.parse_args()
+    
+    if args.use_async:
+        try:
+            import uvicorn
+            import async_app
+        except ImportError as e:
+            raise SystemExit(f"ASGI mode requires starlette and uvicorn: {e}")
+        # async_app importa este módulo como 'app': inicializar esa instancia
+        async_app.init_test_data()
+        print("🚀 Starting ASGI (async) server for load testing...")
+    else:
+        init_test_data()
+        print("🚀 Starting Flask server for load testing...")
     print("📊 Available endpoints:")
     print("  GET  /health - Health check")
     print("  GET  /api/users - List users")
     print("  POST /api/users - Create user")
     print("  GET  /api/users/<id> - Get user")
-    print("  GET  /api/posts - List posts (paginated)")
-    print("  GET  /api/search?q=<query> - Search")
-    print("  POST /api/heavy-operation - Heavy operation")
+    print("  GET  /api/posts - List posts (paginated, ?page= or ?cursor=)")
+    print("  GET  /api/search?q=<query>[&fields=username,email] - Search")
+    print("  POST /api/heavy-operation - Heavy operation (202 + job id)")
+    print("  GET  /api/jobs/<id> - Background job status")
     print("  GET  /api/stats - Server stats")
     print("  GET  /api/slow - Intentionally slow endpoint")
     
-    app.run(host='0.0.0.0', port=5001, debug=False, threaded=True)
\ No newline at end of file
+    if args.use_async:
+        uvicorn.run(async_app.asgi_app, host=args.host, port=args.port, log_level='warning')
+    else:
+        app.run(host=args.host, port=args.port, debug=False, threaded=True)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
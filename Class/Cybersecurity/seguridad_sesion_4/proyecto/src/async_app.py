@@ -0,0 +1,193 @@
+"""
+Versión ASGI (async) de la API de load testing
+Mismos endpoints y mismos almacenes en memoria que app.py, pero las esperas
+simuladas usan asyncio.sleep: una request en curso no ocupa un hilo del SO
+
+Ejecutar: python src/app.py --async
+"""
+
+import asyncio
+import random
+import time
+from datetime import datetime
+
+from starlette.applications import Starlette
+from starlette.exceptions import HTTPException
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+try:
+    from src.app import (
+        add_user, build_stats, find_users, get_request_stats, heavy_jobs,
+        init_test_data, paginate_posts, parse_search_fields, request_metrics,
+        slow_sleep_time, submit_heavy_operation, users_db
+    )
+    from src.job_queue import QueueFullError
+    from src.post_store import InvalidCursorError
+except ImportError:  # Ejecutado como script: python src/app.py --async
+    from app import (
+        add_user, build_stats, find_users, get_request_stats, heavy_jobs,
+        init_test_data, paginate_posts, parse_search_fields, request_metrics,
+        slow_sleep_time, submit_heavy_operation, users_db
+    )
+    from job_queue import QueueFullError
+    from post_store import InvalidCursorError
+
+class RequestMetricsMiddleware:
+    """Middleware ASGI: cuenta requests y registra latencia por ruta"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        request_metrics.count_request()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route = scope.get('route')
+            rule = route.path if route is not None else '<unmatched>'
+            elapsed_us = int((time.perf_counter() - start) * 1_000_000)
+            request_metrics.record_latency(f"{scope['method']} {rule}", elapsed_us)
+
+async def health_check(request: Request):
+    """Health check - sin espera simulada"""
+    return JSONResponse({
+        'status': 'healthy',
+        'timestamp': datetime.utcnow().isoformat(),
+        'version': '1.0.0'
+    })
+
+async def get_users(request: Request):
+    """Listar usuarios (50-100ms de latencia simulada)"""
+    await asyncio.sleep(random.uniform(0.05, 0.1))
+
+    return JSONResponse({
+        'users': list(users_db.values()),
+        'total': len(users_db),
+        'timestamp': datetime.utcnow().isoformat()
+    })
+
+async def create_user(request: Request):
+    """Crear usuario (100-200ms de escritura simulada)"""
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    if not isinstance(data, dict) or 'username' not in data:
+        raise HTTPException(400, 'Username is required')
+
+    username = data['username']
+    if username in users_db:
+        raise HTTPException(409, 'User already exists')
+
+    await asyncio.sleep(random.uniform(0.1, 0.2))
+
+    user = add_user(username, data.get('email'))
+    return JSONResponse(user, status_code=201)
+
+async def get_user(request: Request):
+    """Obtener usuario específico (30-80ms de consulta simulada)"""
+    user_id = request.path_params['user_id']
+    await asyncio.sleep(random.uniform(0.03, 0.08))
+
+    if user_id not in users_db:
+        raise HTTPException(404, 'User not found')
+
+    return JSONResponse(users_db[user_id])
+
+async def get_posts(request: Request):
+    """Posts paginados por offset (page) o por cursor"""
+    try:
+        page = int(request.query_params.get('page', 1))
+    except ValueError:
+        page = 1
+    try:
+        per_page = int(request.query_params.get('per_page', 10))
+    except ValueError:
+        per_page = 10
+    cursor = request.query_params.get('cursor')
+
+    await asyncio.sleep(random.uniform(0.1, 0.3))
+
+    try:
+        result = paginate_posts(page, per_page, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(400, str(e))
+
+    return JSONResponse(result)
+
+async def search(request: Request):
+    """Búsqueda con el índice de n-gramas (200-500ms simulados)"""
+    query = request.query_params.get('q', '')
+    if not query:
+        raise HTTPException(400, 'Query parameter q is required')
+
+    try:
+        fields = parse_search_fields(request.query_params.get('fields', 'username'))
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    await asyncio.sleep(random.uniform(0.2, 0.5))
+
+    results = find_users(query, fields)
+    return JSONResponse({
+        'query': query,
+        'results': results,
+        'total': len(results),
+        'execution_time_ms': random.randint(200, 500)
+    })
+
+async def heavy_operation(request: Request):
+    """Encola la operación pesada en el pool compartido (202 / 503)"""
+    try:
+        job = submit_heavy_operation()
+    except QueueFullError as e:
+        return JSONResponse({'error': str(e), 'job_queue': heavy_jobs.metrics()},
+                            status_code=503, headers={'Retry-After': '1'})
+
+    return JSONResponse(job, status_code=202, headers={'Location': job['status_url']})
+
+async def get_job(request: Request):
+    """Estado de un trabajo en segundo plano"""
+    job = heavy_jobs.get(request.path_params['job_id'])
+    if job is None:
+        raise HTTPException(404, 'Job not found')
+
+    return JSONResponse(job)
+
+async def get_stats(request: Request):
+    """Estadísticas del servidor (compartidas con la versión Flask)"""
+    return JSONResponse(build_stats())
+
+async def slow_endpoint(request: Request):
+    """Endpoint que se degrada con la carga acumulada"""
+    current_load = get_request_stats()
+    sleep_time = slow_sleep_time(current_load)
+    await asyncio.sleep(sleep_time)
+
+    return JSONResponse({
+        'message': 'This endpoint gets slower under load',
+        'current_load': current_load,
+        'sleep_time': sleep_time
+    })
+
+routes = [
+    Route('/health', health_check, methods=['GET']),
+    Route('/api/users', get_users, methods=['GET']),
+    Route('/api/users', create_user, methods=['POST']),
+    Route('/api/users/{user_id:int}', get_user, methods=['GET']),
+    Route('/api/posts', get_posts, methods=['GET']),
+    Route('/api/search', search, methods=['GET']),
+    Route('/api/heavy-operation', heavy_operation, methods=['POST']),
+    Route('/api/jobs/{job_id}', get_job, methods=['GET']),
+    Route('/api/stats', get_stats, methods=['GET']),
+    Route('/api/slow', slow_endpoint, methods=['GET']),
+]
+
+asgi_app = RequestMetricsMiddleware(Starlette(routes=routes))
@@ -5,7 +5,15 @@ Usado para detectar regresiones de rendimiento
 
 import time
 import random
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Mapping, Sequence, Tuple, Union
+
+try:
+    from src.streaming_stats import StreamingStatistics, exact_statistics, is_ndarray
+except ImportError:  # Importado con src/ en el PYTHONPATH
+    from streaming_stats import StreamingStatistics, exact_statistics, is_ndarray
+
+# Entrada del modo por lotes: lista de dicts o columnas {'id': [...], 'username': [...], 'email': [...]}
+UserBatch = Union[List[Dict], Mapping[str, Sequence]]
 
 class DataProcessor:
     """
@@ -32,6 +40,63 @@ class DataProcessor:
         
         return processed
     
+    def process_user_batch(self, users: UserBatch, stream: bool = False,
+                           chunk_size: int = 10_000) -> Union[List[Dict], Iterator[Dict]]:
+        """
+        Versión por lotes de process_user_list para volúmenes grandes
+        - Acepta lista de dicts o columnas (listas / arrays de NumPy)
+        - Transforma columnas completas y usa un único timestamp por lote
+        - Con stream=True devuelve un generador que procesa chunk_size filas a la vez
+        No incluye la espera simulada de process_user_list; para comparar ambos
+        caminos hay que medirlos sin ella (ver test_user_batch_performance)
+        """
+        ids, usernames, emails = self._user_columns(users)
+        processed_at = time.time()
+        
+        if stream:
+            return self._stream_user_batch(ids, usernames, emails, processed_at, chunk_size)
+        
+        return self._process_user_chunk(ids, usernames, emails, processed_at)
+    
+    def _stream_user_batch(self, ids, usernames, emails, processed_at: float,
+                           chunk_size: int) -> Iterator[Dict]:
+        for start in range(0, len(ids), chunk_size):
+            end = start + chunk_size
+            yield from self._process_user_chunk(
+                ids[start:end], usernames[start:end], emails[start:end], processed_at
+            )
+    
+    @staticmethod
+    def _user_columns(users: UserBatch) -> Tuple[Sequence, Sequence, Sequence]:
+        """Normaliza la entrada a tres columnas de igual longitud"""
+        if isinstance(users, Mapping):
+            n = max((len(column) for column in users.values()), default=0)
+            ids = users.get('id', [None] * n)
+            usernames = users.get('username', [None] * n)
+            emails = users.get('email', [''] * n)
+            if not len(ids) == len(usernames) == len(emails):
+                raise ValueError("All columns must have the same length")
+            return ids, usernames, emails
+        
+        return (
+            [user.get('id') for user in users],
+            [user.get('username') for user in users],
+            [user.get('email', '') for user in users],
+        )
+    
+    @staticmethod
+    def _process_user_chunk(ids: Sequence, usernames: Sequence, emails: Sequence,
+                            processed_at: float) -> List[Dict]:
+        upper_names = [(name or '').upper() for name in usernames]
+        domains = [
+            email.rpartition('@')[2] if '@' in email else 'unknown'
+            for email in (email or '' for email in emails)
+        ]
+        return [
+            {'id': user_id, 'username': name, 'email_domain': domain, 'processed_at': processed_at}
+            for user_id, name, domain in zip(ids, upper_names, domains)
+        ]
+    
     def search_users(self, users: List[Dict], query: str) -> List[Dict]:
         """
         Búsqueda de usuarios - algoritmo O(n) que debe mantenerse eficiente
@@ -59,24 +124,42 @@ class DataProcessor:
     def calculate_statistics(self, numbers: List[float]) -> Dict[str, float]:
         """
         Calcula estadísticas - función matemática que debe ser rápida
+        Los arrays de NumPy usan el modo exacto vectorizado (mismas claves y tipos)
         """
+        if is_ndarray(numbers):
+            return exact_statistics(numbers)
+        
         if not numbers:
             return {}
         
-        # Implementación eficiente
+        # Implementación eficiente: una ordenación y una suma
         sorted_nums = sorted(numbers)
         n = len(numbers)
+        total = sum(numbers)
         
         return {
             'count': n,
-            'sum': sum(numbers),
-            'mean': sum(numbers) / n,
+            'sum': total,
+            'mean': total / n,
             'median': sorted_nums[n // 2] if n % 2 == 1 else (sorted_nums[n // 2 - 1] + sorted_nums[n // 2]) / 2,
-            'min': min(numbers),
-            'max': max(numbers),
-            'range': max(numbers) - min(numbers)
+            'min': sorted_nums[0],
+            'max': sorted_nums[-1],
+            'range': sorted_nums[-1] - sorted_nums[0]
         }
     
+    def calculate_statistics_streaming(self, data: Iterable, chunked: bool = False,
+                                       compression: float = 100) -> Dict[str, float]:
+        """
+        Estadísticas en una sola pasada con memoria O(1)
+        data puede ser un iterable de números o, con chunked=True, de chunks
+        La mediana es aproximada (t-digest); el resto es exacto
+        """
+        stats = StreamingStatistics(compression)
+        if chunked:
+            return stats.consume(data).result()
+        # update_many consume los iterables en bloques acotados
+        return stats.update_many(data).result()
+    
     def slow_algorithm(self, data: List[Any]) -> int:
         """
         Algoritmo intencionalmente lento para demostrar regression testing
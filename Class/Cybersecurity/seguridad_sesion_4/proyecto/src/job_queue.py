@@ -0,0 +1,136 @@
+"""
+Cola de trabajos en segundo plano con pool de hilos acotado
+Las operaciones pesadas se encolan y el cliente consulta su estado por id
+"""
+
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+
+class QueueFullError(Exception):
+    """La cola alcanzó su capacidad máxima (backpressure)"""
+
+
+class JobQueue:
+    """
+    Pool de `workers` hilos que consume una cola de tamaño `max_pending`
+
+    - submit() nunca bloquea: si la cola está llena lanza QueueFullError
+    - Se conservan los últimos `retention` trabajos terminados para consultas
+    - Los hilos se arrancan en el primer submit()
+    """
+
+    def __init__(self, workers: int = 4, max_pending: int = 50, retention: int = 1000):
+        if workers < 1 or max_pending < 1:
+            raise ValueError("workers and max_pending must be >= 1")
+
+        self.workers = workers
+        self.max_pending = max_pending
+        self.retention = retention
+        self._queue: 'queue.Queue' = queue.Queue(maxsize=max_pending)
+        self._jobs: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._running = 0
+        self._counters = {'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0}
+
+    def _ensure_workers(self) -> None:
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f'job-worker-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, func: Callable[[], Any]) -> Dict[str, Any]:
+        """Encola func y devuelve una copia del registro del trabajo"""
+        self._ensure_workers()
+
+        job_id = uuid.uuid4().hex
+        job = {
+            'id': job_id,
+            'status': 'queued',
+            'submitted_at': datetime.utcnow().isoformat(),
+            'started_at': None,
+            'finished_at': None,
+            'result': None,
+            'error': None
+        }
+
+        with self._lock:
+            try:
+                self._queue.put_nowait((job_id, func))
+            except queue.Full:
+                self._counters['rejected'] += 1
+                raise QueueFullError(f"Job queue is full ({self.max_pending} pending)") from None
+            self._jobs[job_id] = job
+            self._counters['submitted'] += 1
+            return dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Estado actual del trabajo (copia) o None si no existe o expiró"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def metrics(self) -> Dict[str, int]:
+        """Profundidad de cola y contadores para /api/stats"""
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'queue_depth': self._queue.qsize(),
+                'running': self._running,
+                **self._counters
+            }
+
+    def _worker(self) -> None:
+        while True:
+            job_id, func = self._queue.get()
+            with self._lock:
+                job = self._jobs[job_id]
+                job['status'] = 'running'
+                job['started_at'] = datetime.utcnow().isoformat()
+                self._running += 1
+
+            try:
+                result, error, status = func(), None, 'completed'
+            except Exception as e:
+                result, error, status = None, str(e), 'failed'
+
+            with self._lock:
+                job.update(status=status, result=result, error=error,
+                           finished_at=datetime.utcnow().isoformat())
+                self._running -= 1
+                self._counters[status] += 1
+                self._evict_finished()
+            self._queue.task_done()
+
+    def _evict_finished(self) -> None:
+        """Descarta los trabajos terminados más antiguos por encima de retention"""
+        excess = len(self._jobs) - self.retention
+        if excess <= 0:
+            return
+        for job_id in list(self._jobs):
+            if excess <= 0:
+                break
+            if self._jobs[job_id]['status'] in ('completed', 'failed'):
+                del self._jobs[job_id]
+                excess -= 1
+
+    def join(self, timeout: float = None) -> bool:
+        """Espera a que la cola se vacíe (útil en tests); True si terminó"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
@@ -0,0 +1,120 @@
+"""
+Métricas del generador de carga (Locust) sin I/O por request
+Histogramas HDR y contadores por endpoint en memoria, volcados al fichero por lotes
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    from src.metrics import LatencyHistogram
+except ImportError:  # Importado con src/ en el PYTHONPATH
+    from metrics import LatencyHistogram
+
+
+DEFAULT_LOG = Path("reports/load/requests.jsonl")
+FLUSH_INTERVAL = 5.0      # segundos entre escrituras al fichero
+SLOW_REQUEST_MS = 1000    # requests más lentas se guardan como evento
+MAX_BUFFERED_EVENTS = 1000
+PERCENTILES = (50, 90, 95, 99, 99.9)
+
+
+class EndpointAggregate:
+    """Contadores e histograma HDR de latencias (µs) de un endpoint"""
+
+    __slots__ = ('requests', 'failures', 'slow', 'histogram')
+
+    def __init__(self):
+        self.requests = 0
+        self.failures = 0
+        self.slow = 0
+        self.histogram = LatencyHistogram()
+
+
+class RequestAggregator:
+    """
+    Métricas por endpoint en memoria, volcadas al fichero por lotes
+
+    record() solo actualiza contadores y el histograma; los eventos de requests
+    lentas o fallidas se acumulan y se escriben junto con un snapshot de
+    percentiles cada flush_interval segundos (o al llenarse el buffer).
+    """
+
+    def __init__(self, path: Path = DEFAULT_LOG, flush_interval: float = FLUSH_INTERVAL,
+                 slow_ms: float = SLOW_REQUEST_MS, max_buffered: int = MAX_BUFFERED_EVENTS):
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self.slow_ms = slow_ms
+        self.max_buffered = max_buffered
+        self.endpoints: Dict[str, EndpointAggregate] = {}
+        self.events: List[Dict[str, Any]] = []
+        self.last_flush = time.monotonic()
+
+    def record(self, name: str, response_time: float, exception: Optional[BaseException] = None):
+        endpoint = self.endpoints.get(name)
+        if endpoint is None:
+            endpoint = self.endpoints[name] = EndpointAggregate()
+
+        endpoint.requests += 1
+        endpoint.histogram.record(response_time * 1000)
+        if exception is not None:
+            endpoint.failures += 1
+            self.events.append({'type': 'failure', 'name': name, 'response_time': response_time,
+                                'error': str(exception), 'time': time.time()})
+        elif response_time > self.slow_ms:
+            endpoint.slow += 1
+            self.events.append({'type': 'slow', 'name': name, 'response_time': response_time,
+                                'time': time.time()})
+
+        if len(self.events) >= self.max_buffered or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Contadores y percentiles (ms) por endpoint más el total"""
+        total = EndpointAggregate()
+        rows = {}
+        for name, endpoint in sorted(self.endpoints.items()):
+            rows[name] = self._row(endpoint)
+            total.requests += endpoint.requests
+            total.failures += endpoint.failures
+            total.slow += endpoint.slow
+            total.histogram.merge(endpoint.histogram)
+        if self.endpoints:
+            rows['Aggregated'] = self._row(total)
+        return rows
+
+    @staticmethod
+    def _row(endpoint: EndpointAggregate) -> Dict[str, Any]:
+        values = endpoint.histogram.percentiles(PERCENTILES + (100,))
+        return {
+            'requests': endpoint.requests,
+            'failures': endpoint.failures,
+            'slow': endpoint.slow,
+            **{f'p{p:g}': value / 1000 for p, value in zip(PERCENTILES, values[:-1])},
+            'max': values[-1] / 1000,
+        }
+
+    def flush(self):
+        """Escribe los eventos pendientes y un snapshot en una sola escritura"""
+        self.last_flush = time.monotonic()
+        lines = [json.dumps(event) for event in self.events]
+        lines.append(json.dumps({'type': 'snapshot', 'time': time.time(), 'pid': os.getpid(),
+                                 'endpoints': self.snapshot()}))
+        self.events = []
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a') as f:
+            f.write('\n'.join(lines) + '\n')
+
+    def percentile_table(self) -> str:
+        headers = ['reqs', 'fail', 'slow'] + [f'p{p:g}' for p in PERCENTILES] + ['max']
+        lines = [f"{'endpoint':<32}" + ''.join(f"{h:>9}" for h in headers), "-" * (32 + 9 * len(headers))]
+        for name, row in self.snapshot().items():
+            counters = [row['requests'], row['failures'], row['slow']]
+            latencies = [row[f'p{p:g}'] for p in PERCENTILES] + [row['max']]
+            lines.append(f"{name[:32]:<32}" + ''.join(f"{c:>9}" for c in counters)
+                         + ''.join(f"{v:>9.0f}" for v in latencies))
+        return '\n'.join(lines)
@@ -0,0 +1,194 @@
+"""
+Métricas de requests sin lock global en el camino caliente
+Contadores repartidos en shards e histogramas de latencia estilo HDR
+"""
+
+import itertools
+import os
+import threading
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_SHARDS = max(8, (os.cpu_count() or 1) * 2)
+
+
+_thread_slot = threading.local()
+_next_slot = itertools.count()
+
+
+def _shard_for(num_shards: int) -> int:
+    """
+    Cada hilo escribe siempre en el mismo shard
+    Los slots se reparten en round-robin al primer uso: get_ident() no sirve
+    como hash porque en Linux son direcciones alineadas a página (% n == 0)
+    """
+    try:
+        slot = _thread_slot.index
+    except AttributeError:
+        slot = _thread_slot.index = next(_next_slot)
+    return slot % num_shards
+
+
+class _Shard:
+    __slots__ = ('lock', 'count', 'histograms')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.count = 0
+        self.histograms: Dict[str, 'LatencyHistogram'] = {}
+
+
+class ShardedCounter:
+    """
+    Contador repartido en N shards (estilo LongAdder)
+    increment() solo bloquea el shard del hilo; value() suma todos los shards
+    """
+
+    def __init__(self, num_shards: int = DEFAULT_SHARDS):
+        self._shards = [_Shard() for _ in range(num_shards)]
+
+    def increment(self, amount: int = 1) -> None:
+        shard = self._shards[_shard_for(len(self._shards))]
+        with shard.lock:
+            shard.count += amount
+
+    def value(self) -> int:
+        return sum(shard.count for shard in self._shards)
+
+    def reset(self) -> None:
+        for shard in self._shards:
+            with shard.lock:
+                shard.count = 0
+
+
+class LatencyHistogram:
+    """
+    Histograma log-lineal estilo HDR sobre valores enteros (microsegundos)
+
+    Los valores < 2**sub_bucket_bits se guardan exactos; por encima, cada
+    potencia de dos se divide en 2**(sub_bucket_bits - 1) buckets lineales,
+    con un error relativo máximo de 1 / 2**(sub_bucket_bits - 1).
+    No es thread-safe: cada shard protege los suyos.
+    """
+
+    def __init__(self, sub_bucket_bits: int = 7):
+        self.sub_bucket_bits = sub_bucket_bits
+        self._half = 1 << (sub_bucket_bits - 1)
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.max_value = 0
+
+    def _index(self, value: int) -> int:
+        shift = value.bit_length() - self.sub_bucket_bits
+        if shift <= 0:
+            return value
+        return shift * self._half + (value >> shift)
+
+    def _bounds(self, index: int):
+        """Límites [inferior, superior] de los valores del bucket"""
+        if index < 2 * self._half:
+            return index, index
+        shift, offset = divmod(index, self._half)
+        shift -= 1
+        mantissa = self._half + offset
+        return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+    def record(self, value: int) -> None:
+        value = max(int(value), 0)
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.total += 1
+        if value > self.max_value:
+            self.max_value = value
+
+    def merge(self, other: 'LatencyHistogram') -> None:
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+        self.max_value = max(self.max_value, other.max_value)
+
+    def copy(self) -> 'LatencyHistogram':
+        clone = LatencyHistogram(self.sub_bucket_bits)
+        clone.merge(self)
+        return clone
+
+    def percentiles(self, ps: Iterable[float]) -> List[Optional[int]]:
+        """Percentiles (0-100) en una sola pasada sobre los buckets ordenados"""
+        ps = list(ps)
+        if not self.total:
+            return [None] * len(ps)
+
+        ranks = sorted((max(1, -(-p * self.total // 100)), i) for i, p in enumerate(ps))
+        results: List[Optional[int]] = [None] * len(ps)
+        seen = 0
+        pending = iter(ranks)
+        rank, slot = next(pending)
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            while seen >= rank:
+                low, high = self._bounds(index)
+                results[slot] = min((low + high) // 2, self.max_value)
+                try:
+                    rank, slot = next(pending)
+                except StopIteration:
+                    return results
+        return results
+
+    def percentile(self, p: float) -> Optional[int]:
+        return self.percentiles([p])[0]
+
+
+class RequestMetrics:
+    """
+    Contador total + histogramas de latencia por endpoint, repartidos en shards
+    La agregación se hace solo al leer (snapshot), no al registrar
+    """
+
+    def __init__(self, num_shards: int = DEFAULT_SHARDS, sub_bucket_bits: int = 7):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.requests = ShardedCounter(num_shards)
+        self._shards = [_Shard() for _ in range(num_shards)]
+
+    def count_request(self) -> None:
+        self.requests.increment()
+
+    def total_requests(self) -> int:
+        return self.requests.value()
+
+    def record_latency(self, endpoint: str, micros: int) -> None:
+        shard = self._shards[_shard_for(len(self._shards))]
+        with shard.lock:
+            histogram = shard.histograms.get(endpoint)
+            if histogram is None:
+                histogram = shard.histograms[endpoint] = LatencyHistogram(self.sub_bucket_bits)
+            histogram.record(micros)
+
+    def merged_histograms(self) -> Dict[str, LatencyHistogram]:
+        merged: Dict[str, LatencyHistogram] = {}
+        for shard in self._shards:
+            with shard.lock:
+                for endpoint, histogram in shard.histograms.items():
+                    if endpoint in merged:
+                        merged[endpoint].merge(histogram)
+                    else:
+                        merged[endpoint] = histogram.copy()
+        return merged
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Resumen por endpoint: count, p50/p95/p99 y max en milisegundos"""
+        summary = {}
+        for endpoint, histogram in sorted(self.merged_histograms().items()):
+            p50, p95, p99 = histogram.percentiles([50, 95, 99])
+            summary[endpoint] = {
+                'count': histogram.total,
+                'p50_ms': round(p50 / 1000, 3),
+                'p95_ms': round(p95 / 1000, 3),
+                'p99_ms': round(p99 / 1000, 3),
+                'max_ms': round(histogram.max_value / 1000, 3)
+            }
+        return summary
+
+    def reset(self) -> None:
+        self.requests.reset()
+        for shard in self._shards:
+            with shard.lock:
+                shard.histograms.clear()
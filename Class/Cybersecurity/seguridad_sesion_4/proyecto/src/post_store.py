@@ -0,0 +1,97 @@
+"""
+Almacén ordenado de posts respaldado por una lista
+Permite paginar por offset o por cursor sin copiar todos los posts
+"""
+
+import base64
+import binascii
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+class InvalidCursorError(ValueError):
+    """Cursor de paginación mal formado o desconocido"""
+
+
+class PostStore:
+    """
+    Posts en orden de inserción (lista) + índice id -> posición (dict)
+
+    - slice(start, end): O(tamaño de página), misma semántica que list[start:end]
+    - page_after(cursor, limit): keyset pagination, sin recorrer el offset
+    """
+
+    _CURSOR_PREFIX = 'post:'
+
+    def __init__(self):
+        self._posts: List[Dict] = []
+        self._positions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._posts)
+
+    def __contains__(self, post_id: int) -> bool:
+        return post_id in self._positions
+
+    def __getitem__(self, post_id: int) -> Dict:
+        return self._posts[self._positions[post_id]]
+
+    def add(self, post: Dict) -> None:
+        """Añade un post al final; los ids deben ser únicos"""
+        with self._lock:
+            if post['id'] in self._positions:
+                raise KeyError(f"Post {post['id']} already exists")
+            self._positions[post['id']] = len(self._posts)
+            self._posts.append(post)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._posts.clear()
+            self._positions.clear()
+
+    def slice(self, start: int, end: int) -> List[Dict]:
+        """Página por offset: solo copia los elementos pedidos"""
+        return self._posts[start:end]
+
+    def page_after(self, cursor: Optional[str], limit: int) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Devuelve (posts, next_cursor) empezando tras el post del cursor
+        Sin cursor empieza desde el principio; next_cursor es None al final
+        """
+        start = 0
+        if cursor:
+            start = self._position_of(cursor) + 1
+
+        end = start + max(limit, 0)
+        page = self._posts[start:end]
+        next_cursor = self.encode_cursor(page[-1]['id']) if page and end < len(self._posts) else None
+        return page, next_cursor
+
+    def _position_of(self, cursor: str) -> int:
+        post_id = self.decode_cursor(cursor)
+        try:
+            return self._positions[post_id]
+        except KeyError:
+            raise InvalidCursorError("Cursor refers to an unknown post") from None
+
+    @classmethod
+    def encode_cursor(cls, post_id: int) -> str:
+        """Cursor opaco para el cliente (base64 url-safe sin padding)"""
+        raw = f"{cls._CURSOR_PREFIX}{post_id}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    @classmethod
+    def decode_cursor(cls, cursor: str) -> int:
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        except (binascii.Error, UnicodeError, ValueError):
+            raise InvalidCursorError("Malformed cursor") from None
+
+        if not raw.startswith(cls._CURSOR_PREFIX):
+            raise InvalidCursorError("Malformed cursor")
+        try:
+            return int(raw[len(cls._CURSOR_PREFIX):])
+        except ValueError:
+            raise InvalidCursorError("Malformed cursor") from None
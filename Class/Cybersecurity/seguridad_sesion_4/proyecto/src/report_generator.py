@@ -3,11 +3,21 @@ Generador de reportes que será usado para golden/snapshot testing
 Los outputs de estas funciones deben permanecer estables
 """
 
+import heapq
 import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Any
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Tuple, Union
 import statistics
 
+try:
+    from src.streaming_stats import StreamingStatistics
+except ImportError:  # Importado con src/ en el PYTHONPATH
+    from streaming_stats import StreamingStatistics
+
 class ReportGenerator:
     """
     Generador de reportes con salidas determinísticas
@@ -25,27 +35,52 @@ class ReportGenerator:
         Genera resumen de usuarios
         Output debe ser estable para golden testing
         """
-        if not users:
+        return self._build_user_summary(_summarise_users(enumerate(users)))
+    
+    def generate_user_summary_sharded(self, source: Union[List[Dict[str, Any]], str, Path],
+                                      workers: int = None) -> Dict[str, Any]:
+        """
+        Resumen de usuarios repartido en un pool de procesos
+        source: lista de usuarios o ruta a un fichero JSONL (un usuario por línea)
+        Cada worker calcula contadores parciales que se combinan al final;
+        el resultado es idéntico al de generate_user_summary
+        """
+        workers = workers or os.cpu_count() or 1
+        
+        if isinstance(source, (str, Path)):
+            tasks = [(str(source), start, end) for start, end in _jsonl_shards(source, workers)]
+            worker_fn = _summarise_jsonl_range
+        else:
+            chunk = -(-len(source) // workers) if source else 1
+            tasks = [(source[i:i + chunk], i) for i in range(0, len(source), chunk)]
+            worker_fn = _summarise_user_chunk
+        
+        if workers == 1 or len(tasks) <= 1:
+            partials = [worker_fn(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                partials = list(pool.map(worker_fn, tasks))
+        
+        return self._build_user_summary(_merge_user_partials(partials))
+    
+    def _build_user_summary(self, partial: Dict[str, Any]) -> Dict[str, Any]:
+        """Construye el reporte a partir de contadores (parciales ya combinados)"""
+        total_users = partial['total']
+        if not total_users:
             return {
                 'total_users': 0,
                 'summary': 'No users found',
                 'timestamp': self.fixed_timestamp
             }
         
-        # Estadísticas básicas
-        total_users = len(users)
-        active_users = len([u for u in users if u.get('is_active', True)])
-        
-        # Dominios de email más comunes
-        domains = {}
-        for user in users:
-            email = user.get('email', '')
-            if '@' in email:
-                domain = email.split('@')[1]
-                domains[domain] = domains.get(domain, 0) + 1
+        active_users = partial['active']
         
-        # Top 3 dominios
-        top_domains = sorted(domains.items(), key=lambda x: x[1], reverse=True)[:3]
+        # Top 3 dominios: más usuarios primero; en empate, el que apareció antes
+        top_domains = heapq.nsmallest(
+            3,
+            ((domain, count, first_seen) for domain, (count, first_seen) in partial['domains'].items()),
+            key=lambda item: (-item[1], item[2])
+        )
         
         return {
             'total_users': total_users,
@@ -54,34 +89,74 @@ class ReportGenerator:
             'activity_rate': round(active_users / total_users * 100, 2) if total_users > 0 else 0,
             'top_email_domains': [
                 {'domain': domain, 'count': count} 
-                for domain, count in top_domains
+                for domain, count, _ in top_domains
             ],
             'timestamp': self.fixed_timestamp,
             'report_version': '1.0'
         }
     
-    def generate_performance_report(self, metrics: List[float]) -> Dict[str, Any]:
+    def generate_performance_report(self, metrics: Union[List[float], Iterable[float], StreamingStatistics],
+                                    sketch: bool = False) -> Dict[str, Any]:
         """
         Genera reporte de rendimiento
         Usado para detectar regresiones de performance
+        Modo exacto: una sola ordenación compartida por mediana y percentiles
+        Modo sketch (sketch=True o un StreamingStatistics ya construido):
+        memoria O(1), combinable entre workers, percentiles aproximados
         """
-        if not metrics:
+        if sketch or isinstance(metrics, StreamingStatistics):
+            return self._sketch_performance_report(metrics)
+        
+        # Se ordena una sola vez: también acepta generadores y demás iterables
+        sorted_metrics = sorted(metrics)
+        if not sorted_metrics:
             return {
                 'error': 'No metrics provided',
                 'timestamp': self.fixed_timestamp
             }
         
         return {
-            'metrics_count': len(metrics),
-            'min_value': round(min(metrics), 3),
-            'max_value': round(max(metrics), 3),
-            'mean': round(statistics.mean(metrics), 3),
-            'median': round(statistics.median(metrics), 3),
-            'std_dev': round(statistics.stdev(metrics) if len(metrics) > 1 else 0, 3),
+            'metrics_count': len(sorted_metrics),
+            'min_value': round(sorted_metrics[0], 3),
+            'max_value': round(sorted_metrics[-1], 3),
+            'mean': round(statistics.mean(sorted_metrics), 3),
+            'median': round(self._median_sorted(sorted_metrics), 3),
+            'std_dev': round(statistics.stdev(sorted_metrics) if len(sorted_metrics) > 1 else 0, 3),
             'percentiles': {
-                'p90': round(self._percentile(metrics, 90), 3),
-                'p95': round(self._percentile(metrics, 95), 3),
-                'p99': round(self._percentile(metrics, 99), 3)
+                'p90': round(self._percentile_sorted(sorted_metrics, 90), 3),
+                'p95': round(self._percentile_sorted(sorted_metrics, 95), 3),
+                'p99': round(self._percentile_sorted(sorted_metrics, 99), 3)
+            },
+            'timestamp': self.fixed_timestamp,
+            'report_version': '1.0'
+        }
+    
+    def _sketch_performance_report(self, metrics: Union[Iterable[float], StreamingStatistics]) -> Dict[str, Any]:
+        """Reporte de rendimiento a partir de un acumulador en streaming"""
+        if isinstance(metrics, StreamingStatistics):
+            stats = metrics
+        else:
+            stats = StreamingStatistics()
+            for value in metrics:
+                stats.update(value)
+        
+        if not stats.count:
+            return {
+                'error': 'No metrics provided',
+                'timestamp': self.fixed_timestamp
+            }
+        
+        return {
+            'metrics_count': stats.count,
+            'min_value': round(stats.min, 3),
+            'max_value': round(stats.max, 3),
+            'mean': round(stats.mean, 3),
+            'median': round(stats.quantile(0.5), 3),
+            'std_dev': round(stats.variance ** 0.5, 3),
+            'percentiles': {
+                'p90': round(stats.quantile(0.90), 3),
+                'p95': round(stats.quantile(0.95), 3),
+                'p99': round(stats.quantile(0.99), 3)
             },
             'timestamp': self.fixed_timestamp,
             'report_version': '1.0'
@@ -91,56 +166,264 @@ class ReportGenerator:
         """
         Analiza tendencias en datos temporales
         Para detectar cambios en patrones
+        Una sola pasada, sin ordenar: ver TrendAccumulator
         """
-        if not daily_data:
+        return self.trend_accumulator().extend(daily_data.items()).report()
+    
+    def trend_accumulator(self, windows: Iterable[int] = (7, 30)) -> 'TrendAccumulator':
+        """Acumulador incremental con el mismo timestamp que este generador"""
+        return TrendAccumulator(self.fixed_timestamp, windows)
+    
+    def _percentile(self, data: List[float], p: float) -> float:
+        """Calcula percentil específico"""
+        return self._percentile_sorted(sorted(data), p)
+    
+    @staticmethod
+    def _median_sorted(sorted_data: List[float]) -> float:
+        """Mediana sobre datos ya ordenados (misma fórmula que statistics.median)"""
+        n = len(sorted_data)
+        if n % 2 == 1:
+            return sorted_data[n // 2]
+        return (sorted_data[n // 2 - 1] + sorted_data[n // 2]) / 2
+    
+    @staticmethod
+    def _percentile_sorted(sorted_data: List[float], p: float) -> float:
+        """Percentil por interpolación lineal sobre datos ya ordenados"""
+        index = (p / 100.0) * (len(sorted_data) - 1)
+        lower = int(index)
+        upper = lower + 1
+        
+        if upper >= len(sorted_data):
+            return sorted_data[-1]
+        
+        weight = index - lower
+        return sorted_data[lower] * (1 - weight) + sorted_data[upper] * weight
+
+
+def _summarise_users(indexed_users: Iterable[Tuple[int, Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Contadores parciales en una sola pasada: total, activos y dominios
+    Cada dominio guarda [usuarios, posición de su primera aparición] para
+    desempatar igual que la ordenación estable del modo serie
+    """
+    total = 0
+    active = 0
+    domains: Dict[str, List[int]] = {}
+    
+    for position, user in indexed_users:
+        total += 1
+        if user.get('is_active', True):
+            active += 1
+        
+        email = user.get('email', '')
+        if '@' in email:
+            domain = email.split('@')[1]
+            entry = domains.get(domain)
+            if entry is None:
+                domains[domain] = [1, position]
+            else:
+                entry[0] += 1
+    
+    return {'total': total, 'active': active, 'domains': domains}
+
+def _merge_user_partials(partials: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    merged = {'total': 0, 'active': 0, 'domains': {}}
+    domains = merged['domains']
+    for partial in partials:
+        merged['total'] += partial['total']
+        merged['active'] += partial['active']
+        for domain, (count, first_seen) in partial['domains'].items():
+            entry = domains.get(domain)
+            if entry is None:
+                domains[domain] = [count, first_seen]
+            else:
+                entry[0] += count
+                entry[1] = min(entry[1], first_seen)
+    return merged
+
+def _summarise_user_chunk(task: Tuple[List[Dict[str, Any]], int]) -> Dict[str, Any]:
+    """Worker: trozo de una lista en memoria (users, offset global)"""
+    users, offset = task
+    return _summarise_users(enumerate(users, offset))
+
+def _summarise_jsonl_range(task: Tuple[str, int, int]) -> Dict[str, Any]:
+    """Worker: líneas de un JSONL entre dos offsets; la posición es el offset en bytes"""
+    path, start, end = task
+    return _summarise_users(_read_jsonl_range(path, start, end))
+
+def _read_jsonl_range(path: str, start: int, end: int) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    with open(path, 'rb') as f:
+        f.seek(start)
+        position = start
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            if line.strip():
+                yield position, json.loads(line)
+            position += len(line)
+
+def _jsonl_shards(path: Union[str, Path], shards: int) -> List[Tuple[int, int]]:
+    """Divide el fichero en rangos de bytes que empiezan al inicio de una línea"""
+    size = os.path.getsize(path)
+    if not size:
+        return []
+    
+    boundaries = [0]
+    with open(path, 'rb') as f:
+        for i in range(1, shards):
+            f.seek(max(size * i // shards, boundaries[-1]))
+            if f.tell() > 0:
+                f.seek(f.tell() - 1)
+                f.readline()  # Avanzar hasta el inicio de la siguiente línea
+            boundaries.append(max(f.tell(), boundaries[-1]))
+    boundaries.append(size)
+    
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+
+
+class TrendAccumulator:
+    """
+    Análisis de tendencias incremental
+    Acepta puntos diarios uno a uno y mantiene totales, extremos y ventanas
+    móviles en O(1) por punto; report() devuelve el mismo dict que
+    ReportGenerator.generate_trend_analysis
+
+    Añadir días en orden cronológico es siempre O(1). Las correcciones de un
+    día ya existente o los días atrasados dentro de una ventana se marcan y se
+    recalculan (O(n log n)) solo en la siguiente lectura.
+    """
+    
+    def __init__(self, fixed_timestamp: str = None, windows: Iterable[int] = (7, 30)):
+        self.fixed_timestamp = fixed_timestamp or "2024-01-01T00:00:00Z"
+        self.windows = tuple(sorted(set(windows)))
+        if any(window < 1 for window in self.windows):
+            raise ValueError("windows must be >= 1")
+        
+        self._values: Dict[str, int] = {}
+        self._total = 0
+        self._first: Optional[str] = None
+        self._last: Optional[str] = None
+        self._peak: Optional[Tuple[str, int]] = None
+        self._low: Optional[Tuple[str, int]] = None
+        self._extremes_dirty = False
+        self._recent = {window: deque() for window in self.windows}
+        self._recent_sums = {window: 0 for window in self.windows}
+        self._windows_dirty = False
+    
+    def __len__(self) -> int:
+        return len(self._values)
+    
+    def add(self, date: str, value: int) -> 'TrendAccumulator':
+        """Añade (o corrige) el valor de un día"""
+        previous = self._values.get(date)
+        self._values[date] = value
+        
+        if previous is not None:
+            self._total += value - previous
+            self._extremes_dirty = True
+            self._windows_dirty = True
+            return self
+        
+        self._total += value
+        is_latest = self._last is None or date > self._last
+        if self._first is None or date < self._first:
+            self._first = date
+        if is_latest:
+            self._last = date
+        
+        if not self._extremes_dirty:
+            self._track_extremes(date, value)
+        
+        if is_latest and not self._windows_dirty:
+            self._push_recent(value)
+        elif not is_latest:
+            self._windows_dirty = True
+        
+        return self
+    
+    def extend(self, points: Iterable[Tuple[str, int]]) -> 'TrendAccumulator':
+        for date, value in points:
+            self.add(date, value)
+        return self
+    
+    def _track_extremes(self, date: str, value: int) -> None:
+        # Empates: gana la fecha más antigua (como values.index(max(values)))
+        if self._peak is None or value > self._peak[1] or (value == self._peak[1] and date < self._peak[0]):
+            self._peak = (date, value)
+        if self._low is None or value < self._low[1] or (value == self._low[1] and date < self._low[0]):
+            self._low = (date, value)
+    
+    def _push_recent(self, value: int) -> None:
+        for window, recent in self._recent.items():
+            if len(recent) == window:
+                self._recent_sums[window] -= recent.popleft()
+            recent.append(value)
+            self._recent_sums[window] += value
+    
+    def _rebuild(self) -> None:
+        """Recalcula extremos y ventanas tras correcciones o días atrasados"""
+        if self._extremes_dirty:
+            self._peak = self._low = None
+            for date, value in self._values.items():
+                self._track_extremes(date, value)
+            self._extremes_dirty = False
+        
+        if self._windows_dirty:
+            longest = self.windows[-1] if self.windows else 0
+            latest = sorted(self._values)[-longest:] if longest else []
+            for window in self.windows:
+                self._recent[window] = deque(self._values[date] for date in latest[-window:])
+                self._recent_sums[window] = sum(self._recent[window])
+            self._windows_dirty = False
+    
+    def rolling_averages(self) -> Dict[str, float]:
+        """Media de los últimos N días registrados para cada ventana"""
+        self._rebuild()
+        return {
+            f'last_{window}_days': round(self._recent_sums[window] / len(self._recent[window]), 2)
+            for window in self.windows if self._recent[window]
+        }
+    
+    def report(self) -> Dict[str, Any]:
+        """Mismo formato que ReportGenerator.generate_trend_analysis"""
+        if not self._values:
             return {
                 'error': 'No data provided',
                 'timestamp': self.fixed_timestamp
             }
         
-        # Ordenar por fecha
-        sorted_dates = sorted(daily_data.keys())
-        values = [daily_data[date] for date in sorted_dates]
+        self._rebuild()
+        first_value = self._values[self._first]
+        last_value = self._values[self._last]
+        days = len(self._values)
         
         # Calcular tendencia simple
-        if len(values) >= 2:
-            trend = 'increasing' if values[-1] > values[0] else 'decreasing' if values[-1] < values[0] else 'stable'
-            change_percent = round(((values[-1] - values[0]) / values[0]) * 100, 2) if values[0] != 0 else 0
+        if days >= 2:
+            trend = 'increasing' if last_value > first_value else 'decreasing' if last_value < first_value else 'stable'
+            change_percent = round(((last_value - first_value) / first_value) * 100, 2) if first_value != 0 else 0
         else:
             trend = 'insufficient_data'
             change_percent = 0
         
         return {
             'date_range': {
-                'start': sorted_dates[0],
-                'end': sorted_dates[-1],
-                'days': len(sorted_dates)
+                'start': self._first,
+                'end': self._last,
+                'days': days
             },
             'trend': trend,
             'change_percent': change_percent,
-            'total_sum': sum(values),
-            'daily_average': round(sum(values) / len(values), 2),
+            'total_sum': self._total,
+            'daily_average': round(self._total / days, 2),
             'peak_day': {
-                'date': sorted_dates[values.index(max(values))],
-                'value': max(values)
+                'date': self._peak[0],
+                'value': self._peak[1]
             },
             'lowest_day': {
-                'date': sorted_dates[values.index(min(values))],
-                'value': min(values)
+                'date': self._low[0],
+                'value': self._low[1]
             },
             'timestamp': self.fixed_timestamp,
             'report_version': '1.0'
         }
-    
-    def _percentile(self, data: List[float], p: float) -> float:
-        """Calcula percentil específico"""
-        sorted_data = sorted(data)
-        index = (p / 100.0) * (len(sorted_data) - 1)
-        lower = int(index)
-        upper = lower + 1
-        
-        if upper >= len(sorted_data):
-            return sorted_data[-1]
-        
-        weight = index - lower
-        return sorted_data[lower] * (1 - weight) + sorted_data[upper] * weight
\ No newline at end of file
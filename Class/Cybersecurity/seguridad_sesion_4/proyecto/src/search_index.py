@@ -0,0 +1,111 @@
+"""
+Índice invertido de n-gramas para búsqueda por subcadena
+Evita recorrer todos los usuarios en cada request de /api/search
+"""
+
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+
+class NGramIndex:
+    """
+    Índice invertido de n-gramas (de 1 a n caracteres) sobre campos de texto
+
+    - Consultas de hasta n caracteres: una sola búsqueda en el diccionario
+    - Consultas más largas: intersección de los n-gramas (empezando por el
+      más selectivo) y verificación final de la subcadena
+
+    El coste depende del tamaño de las listas candidatas, no del total de
+    registros indexados.
+    """
+
+    def __init__(self, fields: Iterable[str] = ('username', 'email'), n: int = 3):
+        if n < 1:
+            raise ValueError("n must be >= 1")
+
+        self.fields = tuple(fields)
+        self.n = n
+        self._postings: Dict[str, Dict[str, Set[int]]] = {
+            field: defaultdict(set) for field in self.fields
+        }
+        self._values: Dict[str, Dict[int, str]] = {field: {} for field in self.fields}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._values[self.fields[0]]) if self.fields else 0
+
+    def _grams(self, text: str) -> Set[str]:
+        """Genera todos los n-gramas de 1 a n caracteres del texto"""
+        grams = set()
+        for size in range(1, self.n + 1):
+            for i in range(len(text) - size + 1):
+                grams.add(text[i:i + size])
+        return grams
+
+    def add(self, doc_id: int, record: Dict) -> None:
+        """Indexa (o re-indexa) un registro de forma incremental"""
+        with self._lock:
+            for field in self.fields:
+                values = self._values[field]
+                postings = self._postings[field]
+
+                previous = values.get(doc_id)
+                if previous is not None:
+                    for gram in self._grams(previous):
+                        postings[gram].discard(doc_id)
+
+                value = (record.get(field) or '').lower()
+                values[doc_id] = value
+                for gram in self._grams(value):
+                    postings[gram].add(doc_id)
+
+    def clear(self) -> None:
+        """Elimina todo el contenido del índice"""
+        with self._lock:
+            for field in self.fields:
+                self._postings[field].clear()
+                self._values[field].clear()
+
+    def search(self, query: str, fields: Optional[Iterable[str]] = None) -> List[int]:
+        """
+        Devuelve los ids (ordenados) cuyo campo contiene la subcadena query
+        Equivalente a `query.lower() in value.lower()` para cada campo
+        """
+        query = query.lower()
+        fields = tuple(fields) if fields is not None else self.fields
+
+        unknown = [field for field in fields if field not in self._postings]
+        if unknown:
+            raise ValueError(f"Fields not indexed: {', '.join(unknown)}")
+
+        matches: Set[int] = set()
+        with self._lock:
+            for field in fields:
+                matches |= self._search_field(field, query)
+
+        return sorted(matches)
+
+    def _search_field(self, field: str, query: str) -> Set[int]:
+        postings = self._postings[field]
+        values = self._values[field]
+
+        if not query:
+            return set(values)
+
+        if len(query) <= self.n:
+            return set(postings.get(query, ()))
+
+        # Intersectar desde la lista más corta para acotar candidatos
+        grams = sorted(
+            {query[i:i + self.n] for i in range(len(query) - self.n + 1)},
+            key=lambda gram: len(postings.get(gram, ()))
+        )
+        candidates = set(postings.get(grams[0], ()))
+        for gram in grams[1:]:
+            if not candidates:
+                break
+            candidates &= postings.get(gram, set())
+
+        # Los trigramas pueden coincidir sin formar la subcadena completa
+        return {doc_id for doc_id in candidates if query in values[doc_id]}
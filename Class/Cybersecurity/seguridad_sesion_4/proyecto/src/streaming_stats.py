@@ -0,0 +1,287 @@
+"""
+Estadísticas en streaming con memoria O(1)
+Welford para media/varianza y t-digest para mediana/cuantiles; ambos se
+pueden combinar (merge) entre procesos
+"""
+
+import math
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Tamaño de bloque al consumir iterables sin longitud (generadores, ficheros)
+CHUNK_SIZE = 10_000
+
+
+def is_ndarray(values) -> bool:
+    return type(values).__module__ == 'numpy' and hasattr(values, 'dtype')
+
+
+class TDigest:
+    """
+    t-digest (variante "merging") con función de escala k1
+
+    Mantiene como mucho ~compression centroides; los puntos nuevos se
+    acumulan en un buffer y se fusionan al llenarse. Dos digests se combinan
+    con merge(), por lo que cada worker puede construir el suyo.
+    """
+
+    def __init__(self, compression: float = 100):
+        if compression < 10:
+            raise ValueError("compression must be >= 10")
+
+        self.compression = compression
+        self.means: List[float] = []
+        self.weights: List[float] = []
+        self.total_weight = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer: List[float] = []
+        self._buffer_limit = int(compression * 10)
+
+    def __len__(self) -> int:
+        self._flush()
+        return len(self.means)
+
+    def add(self, value: float) -> None:
+        self._buffer.append(value)
+        if len(self._buffer) >= self._buffer_limit:
+            self._flush()
+
+    def update_many(self, values: Iterable[float]) -> None:
+        """Añade valores sin pasar del límite del buffer (memoria acotada con generadores)"""
+        iterator = iter(values)
+        while True:
+            chunk = list(islice(iterator, self._buffer_limit - len(self._buffer)))
+            if not chunk:
+                return
+            self._buffer.extend(chunk)
+            if len(self._buffer) >= self._buffer_limit:
+                self._flush()
+
+    def merge(self, other: 'TDigest') -> None:
+        other._flush()
+        self._compress(list(zip(other.means, other.weights)))
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def _flush(self) -> None:
+        if self._buffer:
+            buffer, self._buffer = self._buffer, []
+            self.min = min(self.min, min(buffer))
+            self.max = max(self.max, max(buffer))
+            self._compress([(value, 1.0) for value in buffer])
+
+    def _k(self, q: float) -> float:
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _q(self, k: float) -> float:
+        if k >= self.compression / 4:
+            return 1.0
+        return (math.sin(k * 2 * math.pi / self.compression) + 1) / 2
+
+    def _compress(self, incoming: List[Tuple[float, float]]) -> None:
+        if not incoming:
+            return
+
+        points = sorted(list(zip(self.means, self.weights)) + incoming)
+        total = self.total_weight + sum(weight for _, weight in incoming)
+
+        means, weights = [], []
+        weight_so_far = 0.0
+        limit = self._q(self._k(0.0) + 1) * total
+        current_mean, current_weight = points[0]
+
+        for mean, weight in points[1:]:
+            if weight_so_far + current_weight + weight <= limit:
+                current_weight += weight
+                current_mean += (mean - current_mean) * weight / current_weight
+            else:
+                weight_so_far += current_weight
+                means.append(current_mean)
+                weights.append(current_weight)
+                limit = self._q(self._k(weight_so_far / total) + 1) * total
+                current_mean, current_weight = mean, weight
+
+        means.append(current_mean)
+        weights.append(current_weight)
+        self.means, self.weights, self.total_weight = means, weights, total
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Cuantil q en [0, 1]; None si el digest está vacío"""
+        if not 0 <= q <= 1:
+            raise ValueError("q must be in [0, 1]")
+
+        self._flush()
+        if not self.means:
+            return None
+        if len(self.means) == 1:
+            return self.means[0]
+
+        target = q * self.total_weight
+        # Cada centroide se sitúa en el centro de su peso acumulado
+        cumulative = 0.0
+        previous_center, previous_mean = 0.0, self.min
+        for mean, weight in zip(self.means, self.weights):
+            center = cumulative + weight / 2
+            if target <= center:
+                if center == previous_center:
+                    return mean
+                fraction = (target - previous_center) / (center - previous_center)
+                return previous_mean + fraction * (mean - previous_mean)
+            previous_center, previous_mean = center, mean
+            cumulative += weight
+
+        if cumulative == previous_center:
+            return self.max
+        fraction = (target - previous_center) / (cumulative - previous_center)
+        return previous_mean + fraction * (self.max - previous_mean)
+
+
+class StreamingStatistics:
+    """
+    Acumulador de una sola pasada: count, sum, min, max, media y varianza
+    (Welford / Chan por bloques) y mediana aproximada con t-digest
+
+    Consume valores sueltos, iterables o chunks (listas o arrays de NumPy)
+    y se combina con merge() para agregar resultados de varios procesos.
+    """
+
+    def __init__(self, compression: float = 100):
+        self.count = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.digest = TDigest(compression)
+
+    def update(self, value: float) -> 'StreamingStatistics':
+        self.count += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.digest.add(value)
+        return self
+
+    def update_many(self, values: Iterable[float]) -> 'StreamingStatistics':
+        """
+        Añade un chunk completo combinando sus momentos de una vez
+        Los iterables que no son listas ni arrays se consumen en bloques de CHUNK_SIZE
+        """
+        if not isinstance(values, list) and not is_ndarray(values):
+            iterator = iter(values)
+            for chunk in iter(lambda: list(islice(iterator, CHUNK_SIZE)), []):
+                self.update_many(chunk)
+            return self
+
+        if is_ndarray(values):
+            n = int(values.size)
+            if not n:
+                return self
+            chunk_sum = float(values.sum())
+            chunk_mean = chunk_sum / n
+            chunk_m2 = float(((values - chunk_mean) ** 2).sum())
+            chunk_min, chunk_max = float(values.min()), float(values.max())
+            values = values.ravel().tolist()
+        else:
+            n = len(values)
+            if not n:
+                return self
+            chunk_sum = sum(values)
+            chunk_mean = chunk_sum / n
+            chunk_m2 = sum((value - chunk_mean) ** 2 for value in values)
+            chunk_min, chunk_max = min(values), max(values)
+
+        self._combine(n, chunk_sum, chunk_mean, chunk_m2, chunk_min, chunk_max)
+        self.digest.update_many(values)
+        return self
+
+    def consume(self, chunks: Iterable[Iterable[float]]) -> 'StreamingStatistics':
+        """Procesa un iterable de chunks (p. ej. bloques leídos de un fichero)"""
+        for chunk in chunks:
+            self.update_many(chunk)
+        return self
+
+    def merge(self, other: 'StreamingStatistics') -> 'StreamingStatistics':
+        """Combina el acumulador de otro proceso/worker"""
+        if other.count:
+            self._combine(other.count, other.total, other.mean, other._m2, other.min, other.max)
+            self.digest.merge(other.digest)
+        return self
+
+    def _combine(self, n: int, total: float, mean: float, m2: float,
+                 minimum: float, maximum: float) -> None:
+        # Fórmula paralela de Chan et al. para media y M2
+        combined = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / combined
+        self._m2 += m2 + delta * delta * self.count * n / combined
+        self.count = combined
+        self.total += total
+        self.min = min(self.min, minimum)
+        self.max = max(self.max, maximum)
+
+    @property
+    def variance(self) -> float:
+        """Varianza muestral (n - 1)"""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def quantile(self, q: float) -> Optional[float]:
+        return self.digest.quantile(q)
+
+    def result(self) -> Dict[str, float]:
+        """Mismas claves que DataProcessor.calculate_statistics; la varianza va en .variance"""
+        if not self.count:
+            return {}
+
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'mean': self.mean,
+            'median': self.quantile(0.5),
+            'min': self.min,
+            'max': self.max,
+            'range': self.max - self.min
+        }
+
+
+def exact_statistics(values) -> Dict[str, float]:
+    """
+    Modo exacto para datos en memoria usando NumPy
+    Devuelve las mismas claves y tipos de Python que DataProcessor.calculate_statistics
+    con una lista: int si los datos son enteros, float si no
+    """
+    import numpy as np
+
+    array = np.asarray(values).ravel()
+    n = int(array.size)
+    if not n:
+        return {}
+
+    minimum, maximum = array.min().item(), array.max().item()
+    if array.dtype.kind in 'iub' and n * max(abs(minimum), abs(maximum)) >= 2 ** 63:
+        total = sum(array.tolist())  # La suma en int64 desbordaría
+    else:
+        total = array.sum().item()
+
+    middle = n // 2
+    if n % 2 == 1:
+        median = np.partition(array, middle)[middle].item()
+    else:
+        lower, upper = np.partition(array, [middle - 1, middle])[middle - 1:middle + 1].tolist()
+        median = (lower + upper) / 2
+
+    return {
+        'count': n,
+        'sum': total,
+        'mean': total / n,
+        'median': median,
+        'min': minimum,
+        'max': maximum,
+        'range': maximum - minimum
+    }
@@ -0,0 +1,139 @@
+"""
+Reproducción de trazas de tráfico real (open-loop)
+
+Carga un log de requests grabado (timestamp, endpoint, params) y calcula
+el instante de envío de cada request con un multiplicador de velocidad.
+Las llegadas no dependen de las respuestas: cada request sale en su instante
+aunque las anteriores sigan en curso (semántica open-loop).
+
+Formatos admitidos:
+    JSONL: {"timestamp": 1700000000.25, "method": "GET", "endpoint": "/api/search", "params": {"q": "user"}}
+    CSV:   timestamp,method,endpoint,params   (params como query string: q=user&fields=email)
+timestamp puede ser epoch en segundos o ISO 8601; method es opcional (GET).
+"""
+
+import csv
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl, urlsplit
+
+
+@dataclass(frozen=True)
+class TraceRecord:
+    """Una request de la traza; offset en segundos desde la primera"""
+    offset: float
+    method: str
+    path: str
+    params: Dict[str, str] = field(default_factory=dict)
+    body: Optional[Any] = None
+
+
+def _parse_timestamp(value: Union[str, float, int]) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+
+def _parse_params(value: Union[str, Dict, None]) -> Dict[str, str]:
+    if not value:
+        return {}
+    if isinstance(value, dict):
+        return {str(k): str(v) for k, v in value.items()}
+    value = value.strip()
+    if value.startswith('{'):
+        return _parse_params(json.loads(value))
+    return dict(parse_qsl(value.lstrip('?'), keep_blank_values=True))
+
+
+def _raw_rows(path: Path) -> Iterable[Dict[str, Any]]:
+    with open(path, newline='') as f:
+        if path.suffix.lower() == '.csv':
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def load_trace(path: Union[str, Path]) -> List[TraceRecord]:
+    """Lee la traza y la ordena por tiempo; la query string del endpoint se une a params"""
+    rows = []
+    for row in _raw_rows(Path(path)):
+        url = urlsplit(row['endpoint'])
+        params = dict(parse_qsl(url.query, keep_blank_values=True))
+        params.update(_parse_params(row.get('params')))
+        body = row.get('body')
+        if isinstance(body, str) and body:
+            body = json.loads(body)
+        rows.append((_parse_timestamp(row['timestamp']), (row.get('method') or 'GET').upper(),
+                     url.path, params, body or None))
+
+    if not rows:
+        return []
+
+    rows.sort(key=lambda row: row[0])
+    start = rows[0][0]
+    return [TraceRecord(ts - start, method, path, params, body) for ts, method, path, params, body in rows]
+
+
+class ReplaySchedule:
+    """
+    Cola de envíos de la traza a una velocidad dada (speed=2 reproduce el doble de rápido)
+    next() reparte las requests entre los usuarios que las envían; no es thread-safe
+    (con gevent no hay cambio de contexto dentro de next())
+    """
+
+    def __init__(self, records: List[TraceRecord], speed: float = 1.0, late_threshold: float = 0.05):
+        if speed <= 0:
+            raise ValueError("speed must be positive")
+        self.records = records
+        self.speed = speed
+        self.late_threshold = late_threshold
+        self._cursor = 0
+        self.dispatched = 0
+        self.late = 0
+        self.max_lag = 0.0
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def duration(self) -> float:
+        """Segundos de reproducción a la velocidad configurada"""
+        return self.records[-1].offset / self.speed if self.records else 0.0
+
+    @property
+    def remaining(self) -> int:
+        return len(self.records) - self._cursor
+
+    def next(self) -> Optional[Tuple[float, TraceRecord]]:
+        """(instante de envío relativo al inicio, request) o None si la traza terminó"""
+        if self._cursor >= len(self.records):
+            return None
+        record = self.records[self._cursor]
+        self._cursor += 1
+        return record.offset / self.speed, record
+
+    def record_dispatch(self, lag: float) -> None:
+        """Retraso real de envío: si crece, faltan usuarios para mantener el open-loop"""
+        self.dispatched += 1
+        if lag > self.late_threshold:
+            self.late += 1
+        if lag > self.max_lag:
+            self.max_lag = lag
+
+    def peak_rate(self, window: float = 1.0) -> float:
+        """Máximo de requests por segundo (reproducción) en una ventana deslizante"""
+        times = [record.offset / self.speed for record in self.records]
+        best, start = 0, 0
+        for end, t in enumerate(times):
+            while t - times[start] >= window:
+                start += 1
+            best = max(best, end - start + 1)
+        return best / window
@@ -0,0 +1,86 @@
+"""
+Tests del historial de benchmarks y del gate de regresiones
+Simulan dos ejecuciones de pytest-benchmark y comprueban la decisión del gate
+"""
+
+import json
+import random
+import pytest
+from scripts.benchmark_history import (
+    BenchmarkHistory, compare, main, mann_whitney_greater
+)
+
+def write_results(path, rounds_by_name):
+    """JSON mínimo con el formato de --benchmark-json --benchmark-save-data"""
+    benchmarks = []
+    for name, rounds in rounds_by_name.items():
+        ordered = sorted(rounds)
+        benchmarks.append({
+            'name': name.split('::')[-1],
+            'fullname': name,
+            'stats': {
+                'median': ordered[len(ordered) // 2],
+                'mean': sum(rounds) / len(rounds),
+                'data': rounds
+            }
+        })
+    path.write_text(json.dumps({'benchmarks': benchmarks}))
+    return path
+
+def timings(center, n=30, seed=0):
+    rng = random.Random(seed)
+    return [rng.gauss(center, center * 0.02) for _ in range(n)]
+
+SEARCH = 'tests/regression/performance/test_performance_regression.py::test_search_performance'
+STATS = 'tests/regression/performance/test_performance_regression.py::test_statistics_calculation_performance'
+
+@pytest.mark.regression
+@pytest.mark.performance
+class TestBenchmarkHistory:
+    """Comparación estadística y CLI del gate"""
+
+    def test_mann_whitney_detects_shift(self):
+        baseline = timings(1.0, seed=1)
+        assert mann_whitney_greater(baseline, timings(1.0, seed=2)) > 0.05
+        assert mann_whitney_greater(baseline, timings(1.2, seed=3)) < 0.001
+        # Más rápido no es regresión (test unilateral)
+        assert mann_whitney_greater(baseline, timings(0.8, seed=4)) > 0.99
+
+    def test_noise_below_threshold_is_not_regression(self):
+        baseline = {'median': 1.0, 'rounds': timings(1.0, seed=1)}
+        current = {'median': 1.05, 'rounds': timings(1.05, seed=2)}
+        assert not compare('bench', current, baseline, threshold=0.10, alpha=0.05).regressed
+
+    def test_store_keeps_runs_per_machine(self, tmp_path):
+        history = BenchmarkHistory(tmp_path / 'h.sqlite')
+        result = {'median': 1.0, 'mean': 1.0, 'rounds': [1.0]}
+        history.record({SEARCH: result}, commit='aaa', machine='m1')
+        history.record({SEARCH: dict(result, median=2.0)}, commit='bbb', machine='m2')
+
+        assert history.baseline(SEARCH, 'm1')['commit'] == 'aaa'
+        assert history.baseline(SEARCH, 'm1', exclude_commit='aaa') is None
+        assert len(history.history(SEARCH)) == 2
+        history.close()
+
+    def test_gate_fails_only_on_hot_regressions(self, tmp_path):
+        db = tmp_path / 'history.sqlite'
+        first = write_results(tmp_path / 'first.json', {
+            SEARCH: timings(0.001, seed=1), STATS: timings(0.002, seed=2)})
+        common = ['--db', str(db), '--machine', 'ci-box']
+
+        assert main(common + ['--commit', 'c1', 'check', str(first), '--hot', '*search*']) == 0
+
+        # Estadísticas 30% más lentas: no es función crítica, solo aviso
+        second = write_results(tmp_path / 'second.json', {
+            SEARCH: timings(0.001, seed=3), STATS: timings(0.0026, seed=4)})
+        assert main(common + ['--commit', 'c2', 'check', str(second), '--hot', '*search*']) == 0
+
+        # search_users 30% más lenta: el gate falla
+        third = write_results(tmp_path / 'third.json', {
+            SEARCH: timings(0.0013, seed=5), STATS: timings(0.0026, seed=6)})
+        assert main(common + ['--commit', 'c3', 'check', str(third), '--hot', '*search*']) == 1
+
+        # La ejecución fallida no se guardó: repetirla sigue fallando hasta aceptarla con record
+        assert main(common + ['--commit', 'c4', 'check', str(third), '--hot', '*search*']) == 1
+        assert main(common + ['--commit', 'c4', 'record', str(third)]) == 0
+        assert main(common + ['--commit', 'c5', 'check', str(third), '--hot', '*search*']) == 0
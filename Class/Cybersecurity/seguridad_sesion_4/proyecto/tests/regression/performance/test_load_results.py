@@ -0,0 +1,214 @@
+"""
+Tests del análisis de resultados de Locust
+Usan CSV con el formato real de `locust --csv` y comprueban la detección de codos
+"""
+
+import subprocess
+from pathlib import Path
+import pytest
+from scripts import run_load_test
+from scripts.load_results import (
+    CapacityProbe, LoadResultsDB, aggregated, find_throughput_knee,
+    parse_stats_csv, parse_stats_history_csv, search_capacity
+)
+
+STATS_HEADER = ("Type,Name,Request Count,Failure Count,Median Response Time,Average Response Time,"
+                "Min Response Time,Max Response Time,Average Content Size,Requests/s,Failures/s,"
+                "50%,66%,75%,80%,90%,95%,98%,99%,99.9%,99.99%,100%\n")
+
+HISTORY_HEADER = ("Timestamp,User Count,Type,Name,Requests/s,Failures/s,50%,66%,75%,80%,90%,95%,"
+                  "98%,99%,99.9%,99.99%,100%,Total Request Count,Total Failure Count,"
+                  "Total Median Response Time,Total Average Response Time,Total Min Response Time,"
+                  "Total Max Response Time,Total Average Content Size\n")
+
+def write_stats(path, rps_scale=1.0):
+    path.write_text(
+        STATS_HEADER
+        + f"GET,/health,300,0,3,3.5,1,20,80,{10 * rps_scale},0,3,3,4,4,5,8,12,15,20,20,20\n"
+        + f"GET,/api/slow,100,10,150,160,100,900,50,{2 * rps_scale},0.2,150,160,170,180,300,500,800,900,900,900,900\n"
+        + f",Aggregated,400,10,4,42,1,900,72,{12 * rps_scale},0.2,4,5,6,8,150,300,500,800,900,900,900\n"
+    )
+    return path
+
+@pytest.mark.regression
+@pytest.mark.performance
+class TestLoadResults:
+    """Parseo de CSV, almacenamiento y comparación entre escenarios"""
+
+    def test_parse_stats_csv(self, tmp_path):
+        stats = parse_stats_csv(write_stats(tmp_path / 'run_stats.csv'))
+        slow = next(s for s in stats if s.name == '/api/slow')
+
+        assert [s.name for s in stats] == ['/health', '/api/slow', 'Aggregated']
+        assert slow.method == 'GET' and slow.requests == 100
+        assert slow.failure_rate == pytest.approx(0.1)
+        assert (slow.p50, slow.p90, slow.p95, slow.p99) == (150, 300, 500, 900)
+        assert aggregated(stats).rps == pytest.approx(12)
+
+    def test_parse_history_skips_missing_percentiles(self, tmp_path):
+        path = tmp_path / 'run_stats_history.csv'
+        path.write_text(
+            HISTORY_HEADER
+            + "1,0,,Aggregated,0.000000,0.000000,N/A,N/A,N/A,N/A,N/A,N/A,N/A,N/A,N/A,N/A,N/A,0,0,0,0.0,0,0,0\n"
+            + "2,5,,Aggregated,2.500000,0.000000,3,4,4,35,35,40,35,35,35,35,35,5,0,3,8.9,1.4,34.6,0.0\n"
+            + "2,5,GET,/health,1.000000,0.000000,3,4,4,35,35,40,35,35,35,35,35,5,0,3,8.9,1.4,34.6,0.0\n"
+        )
+        assert parse_stats_history_csv(path) == [(0, 0.0, None), (5, 2.5, 40.0)]
+
+    def test_knee_detection(self):
+        # Escala linealmente hasta 50 usuarios y después se satura
+        saturating = [(5, 10), (20, 40), (50, 100), (100, 110), (200, 105)]
+        assert find_throughput_knee(saturating) == 50
+
+        linear = [(5, 10), (20, 40), (50, 100), (100, 200)]
+        assert find_throughput_knee(linear) is None
+        assert find_throughput_knee([(10, 5)]) is None
+
+    def test_database_keeps_latest_run_per_scenario(self, tmp_path):
+        db = LoadResultsDB(tmp_path / 'results.sqlite')
+        db.record('smoke', 5, '1m', parse_stats_csv(write_stats(tmp_path / 'a.csv', 0.1)))
+        db.record('stress', 50, '2m', parse_stats_csv(write_stats(tmp_path / 'b.csv', 1.0)))
+        rerun = db.record('smoke', 5, '1m', parse_stats_csv(write_stats(tmp_path / 'c.csv', 0.2)),
+                          ramp_knee_users=4)
+
+        runs = db.latest_runs()
+        assert [(r['scenario'], r['users']) for r in runs] == [('smoke', 5), ('stress', 50)]
+        assert runs[0]['run_id'] == rerun and runs[0]['ramp_knee_users'] == 4
+        assert runs[0]['rps'] == pytest.approx(2.4)
+
+        endpoints = db.endpoints(rerun)
+        assert endpoints[-1].name == 'Aggregated'
+        assert {s.name for s in endpoints} == {'/health', '/api/slow', 'Aggregated'}
+        db.close()
+
+def fake_probe(capacity, calls):
+    """Servidor simulado: p95 crece con la carga y se dispara por encima de capacity"""
+    def run(users):
+        calls.append(users)
+        p95 = 100 + users if users <= capacity else 2000
+        return CapacityProbe(users, users * 0.5, p95, 0.0, [])
+    return run
+
+@pytest.mark.regression
+@pytest.mark.performance
+class TestCapacitySearch:
+    """Búsqueda de capacidad en lazo cerrado con un servidor simulado"""
+
+    def test_binary_search_brackets_and_bisects(self):
+        calls = []
+        result = search_capacity('WebsiteUser', fake_probe(70, calls), slo_p95_ms=500,
+                                 max_error_rate=0.01, start_users=5, max_users=500)
+        assert calls[:6] == [5, 10, 20, 40, 80, 60]
+        assert result.breached_at - result.max_users <= max(1, int(result.max_users * 0.1))
+        assert 63 <= result.max_users <= 70
+        assert result.best.rps == pytest.approx(result.max_users * 0.5)
+
+    def test_step_search_stops_at_first_breach(self):
+        calls = []
+        result = search_capacity('HeavyUser', fake_probe(23, calls), slo_p95_ms=500,
+                                 max_error_rate=0.01, start_users=5, strategy='step')
+        assert calls == [5, 10, 15, 20, 25]
+        assert (result.max_users, result.breached_at) == (20, 25)
+
+    def test_error_rate_slo_and_limits(self):
+        failing = lambda users: CapacityProbe(users, 1.0, 50, 0.2, [])
+        result = search_capacity('HeavyUser', failing, slo_p95_ms=500, max_error_rate=0.01)
+        assert result.best is None and result.max_users == 0 and result.breached_at == 5
+
+        calls = []
+        result = search_capacity('MonitoringUser', fake_probe(10_000, calls), slo_p95_ms=20_000,
+                                 max_error_rate=0.01, start_users=5, max_users=30)
+        assert calls == [5, 10, 20, 30]
+        assert result.max_users == 30 and result.breached_at is None
+
+        with pytest.raises(ValueError):
+            search_capacity('WebsiteUser', failing, 500, 0.01, strategy='random')
+
+    def test_capacity_is_stored_per_user_class(self, tmp_path):
+        db = LoadResultsDB(tmp_path / 'results.sqlite')
+        for capacity in (40, 70):
+            db.record_capacity(search_capacity('WebsiteUser', fake_probe(capacity, []), 500, 0.01),
+                               slo_p95_ms=500, slo_error_rate=0.01)
+
+        [row] = db.latest_capacity()
+        assert row['user_class'] == 'WebsiteUser' and 63 <= row['max_users'] <= 70
+        db.close()
+
+@pytest.mark.regression
+@pytest.mark.performance
+class TestLoadTestRunner:
+    """Una ejecución fallida de Locust no debe registrar los CSV de la anterior"""
+
+    @pytest.fixture
+    def failing_runner(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        runner = run_load_test.LoadTestRunner(results_db=tmp_path / 'results.sqlite')
+        monkeypatch.setattr(runner, '_run_locust', lambda cmd, user_classes=(): (
+            subprocess.CompletedProcess(cmd, 2, '', 'locust: error')))
+        return runner
+
+    def test_failed_run_ignores_previous_csv(self, failing_runner, tmp_path):
+        stale = tmp_path / 'reports' / 'load'
+        stale.mkdir(parents=True)
+        write_stats(stale / 'smoke_stats.csv')
+        (stale / 'smoke_failures.csv').write_text('Method,Name,Error,Occurrences\n')
+
+        assert failing_runner.run_load_test(5, "1m", "Smoke", scenario="smoke") is None
+        assert list(stale.iterdir()) == []
+        assert not (tmp_path / 'results.sqlite').exists()
+
+    def test_failed_capacity_probe_ignores_previous_csv(self, failing_runner, tmp_path, monkeypatch):
+        monkeypatch.setattr(failing_runner, 'wait_until_idle', lambda: True)
+        stale = tmp_path / 'reports' / 'load' / 'capacity'
+        stale.mkdir(parents=True)
+        write_stats(stale / 'HeavyUser_20_stats.csv')
+
+        with pytest.raises(RuntimeError, match='no stats for HeavyUser x20'):
+            failing_runner.run_capacity_probe('HeavyUser', 20, "30s")
+        assert list(stale.iterdir()) == []
+
+class FakeProcess:
+    """Proceso simulado: registra el comando y si hubo que terminarlo"""
+    started = []
+
+    def __init__(self, cmd, **kwargs):
+        self.cmd = cmd
+        self.returncode = 0
+        self.terminated = False
+        FakeProcess.started.append(self)
+
+    def communicate(self):
+        return 'summary', ''
+
+    def wait(self, timeout=None):
+        # Los workers "se cuelgan" hasta recibir terminate()
+        if '--worker' in self.cmd and not self.terminated:
+            raise subprocess.TimeoutExpired(self.cmd, timeout)
+        return self.returncode
+
+    def terminate(self):
+        self.terminated = True
+
+@pytest.mark.regression
+@pytest.mark.performance
+class TestDistributedLocust:
+    """Orquestación master + workers locales"""
+
+    def test_master_and_workers_share_port_and_are_torn_down(self, monkeypatch):
+        FakeProcess.started = []
+        monkeypatch.setattr(run_load_test.subprocess, 'Popen', FakeProcess)
+        runner = run_load_test.LoadTestRunner(host="http://localhost:5000", workers=3)
+
+        cmd = runner._locust_command(10, 10, "5s", Path("reports/load/x"), user_classes=['HeavyUser'])
+        result = runner._run_locust(cmd, user_classes=['HeavyUser'])
+
+        master, *workers = FakeProcess.started
+        port = master.cmd[master.cmd.index('--master-bind-port') + 1]
+        assert master.cmd[master.cmd.index('--expect-workers') + 1] == '3'
+        assert len(workers) == 3
+        for worker in workers:
+            assert worker.cmd[worker.cmd.index('--master-port') + 1] == port
+            assert worker.cmd[-1] == 'HeavyUser'
+            assert worker.terminated
+        assert runner.worker_processes == []
+        assert result.returncode == 0 and result.stdout == 'summary'
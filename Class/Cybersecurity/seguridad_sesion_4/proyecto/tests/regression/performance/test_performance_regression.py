@@ -1,12 +1,133 @@
 """
 Performance regression tests: Detectan degradación de rendimiento
 Usan pytest-benchmark para medir y comparar tiempos de ejecución
+
+Cada componente optimizado tiene su clase: primero los tests de equivalencia
+con la implementación original y después un benchmark parametrizado por
+`mode` que mide baseline y versión nueva con el mismo trabajo.
 """
 
+import asyncio
+import csv
+import json
+import pickle
+import random
+import statistics
+import threading
+import time
+import tracemalloc
+from datetime import date, timedelta
+
 import pytest
+from scripts.scaling_benchmark import (
+    ScalingCase, complexity_class, default_cases, fit_exponent,
+    geometric_sizes, measure_scaling, write_csv
+)
+from src import app as app_module
 from src.data_processor import DataProcessor
-from src.report_generator import ReportGenerator
-import random
+from src.job_queue import JobQueue, QueueFullError
+from src.load_metrics import RequestAggregator
+from src.metrics import LatencyHistogram, RequestMetrics, ShardedCounter, _shard_for
+from src.post_store import InvalidCursorError, PostStore
+from src.report_generator import ReportGenerator, TrendAccumulator
+from src.search_index import NGramIndex
+from src.streaming_stats import StreamingStatistics, TDigest, exact_statistics
+from src.trace_replay import ReplaySchedule, TraceRecord, load_trace
+
+TOTAL_POSTS = 100_000
+SCALING_CASES = default_cases()
+
+
+@pytest.fixture
+def processor():
+    return DataProcessor()
+
+
+@pytest.fixture
+def generator():
+    return ReportGenerator()
+
+
+# --- Implementaciones originales usadas como referencia y baseline ---------
+
+def linear_scan(users, query, fields=('username',)):
+    """Búsqueda original de app.py: recorre todos los usuarios"""
+    query_lower = query.lower()
+    return [
+        user['id'] for user in users
+        if any(query_lower in (user.get(field) or '').lower() for field in fields)
+    ]
+
+
+def reference_report(generator, metrics):
+    """generate_performance_report original: una ordenación por percentil + median/stdev"""
+    return {
+        'metrics_count': len(metrics),
+        'min_value': round(min(metrics), 3),
+        'max_value': round(max(metrics), 3),
+        'mean': round(statistics.mean(metrics), 3),
+        'median': round(statistics.median(metrics), 3),
+        'std_dev': round(statistics.stdev(metrics) if len(metrics) > 1 else 0, 3),
+        'percentiles': {
+            'p90': round(generator._percentile(metrics, 90), 3),
+            'p95': round(generator._percentile(metrics, 95), 3),
+            'p99': round(generator._percentile(metrics, 99), 3)
+        },
+        'timestamp': generator.fixed_timestamp,
+        'report_version': '1.0'
+    }
+
+
+def reference_trend(daily_data, timestamp="2024-01-01T00:00:00Z"):
+    """generate_trend_analysis original: ordena y recorre todo en cada llamada"""
+    sorted_dates = sorted(daily_data.keys())
+    values = [daily_data[d] for d in sorted_dates]
+    if len(values) >= 2:
+        trend = 'increasing' if values[-1] > values[0] else 'decreasing' if values[-1] < values[0] else 'stable'
+        change_percent = round(((values[-1] - values[0]) / values[0]) * 100, 2) if values[0] != 0 else 0
+    else:
+        trend = 'insufficient_data'
+        change_percent = 0
+    return {
+        'date_range': {'start': sorted_dates[0], 'end': sorted_dates[-1], 'days': len(sorted_dates)},
+        'trend': trend,
+        'change_percent': change_percent,
+        'total_sum': sum(values),
+        'daily_average': round(sum(values) / len(values), 2),
+        'peak_day': {'date': sorted_dates[values.index(max(values))], 'value': max(values)},
+        'lowest_day': {'date': sorted_dates[values.index(min(values))], 'value': min(values)},
+        'timestamp': timestamp,
+        'report_version': '1.0'
+    }
+
+
+def quadratic_search(users):
+    """Búsqueda que accidentalmente compara todos contra todos"""
+    return sum(1 for a in users for b in users if a is b)
+
+
+# --- Generadores de datos ---------------------------------------------------
+
+def make_users(n, seed=1):
+    rng = random.Random(seed)
+    domains = ['gmail.com', 'company.com', 'university.edu', 'mail.org', 'example.net']
+    users = []
+    for i in range(n):
+        user = {'id': i, 'username': f'user{i}', 'is_active': rng.random() < 0.7}
+        roll = rng.random()
+        if roll < 0.9:
+            user['email'] = f'user{i}@{rng.choice(domains)}'
+        elif roll < 0.95:
+            user['email'] = 'broken-email'
+        users.append(user)
+    return users
+
+
+def daily_series(days, seed=11):
+    rng = random.Random(seed)
+    start = date(2020, 1, 1)
+    return {(start + timedelta(days=i)).isoformat(): rng.randint(0, 50) for i in range(days)}
+
 
 @pytest.mark.regression
 @pytest.mark.performance
@@ -27,14 +148,6 @@ class TestPerformanceRegression:
             users.append(user)
         return users
     
-    @pytest.fixture
-    def processor(self):
-        return DataProcessor()
-    
-    @pytest.fixture
-    def generator(self):
-        return ReportGenerator()
-    
     def test_user_processing_performance(self, benchmark, processor, large_user_dataset):
         """
         Benchmark: Procesamiento de usuarios debe mantenerse rápido
@@ -47,6 +160,51 @@ class TestPerformanceRegression:
         assert len(result) == 1000
         assert all('processed_at' in user for user in result)
     
+    @pytest.mark.parametrize('mode', ['row', 'batch', 'columnar'])
+    def test_user_batch_performance(self, benchmark, processor, large_user_dataset, mode, monkeypatch):
+        """
+        Benchmark: fila a fila vs por lotes (lista y columnas) con el mismo trabajo
+        Se anula la espera simulada de process_user_list para medir solo la transformación
+        """
+        monkeypatch.setattr('src.data_processor.time.sleep', lambda seconds: None)
+        if mode == 'row':
+            result = benchmark(processor.process_user_list, large_user_dataset)
+        elif mode == 'batch':
+            result = benchmark(processor.process_user_batch, large_user_dataset)
+        else:
+            columns = {
+                'id': [u['id'] for u in large_user_dataset],
+                'username': [u['username'] for u in large_user_dataset],
+                'email': [u['email'] for u in large_user_dataset],
+            }
+            result = benchmark(processor.process_user_batch, columns)
+        
+        assert len(result) == 1000
+        assert all('processed_at' in user for user in result)
+    
+    def test_user_batch_matches_row_path(self, processor):
+        """El modo por lotes (lista, columnas y streaming) produce lo mismo que el fila a fila"""
+        users = [
+            {'id': 1, 'username': 'alice', 'email': 'alice@gmail.com'},
+            {'id': 2, 'username': None, 'email': 'no-at-sign'},
+            {'id': 3, 'email': 'a@b@c.org'},
+            {'id': 4, 'username': 'dave'},
+        ]
+        strip = lambda rows: [{k: v for k, v in row.items() if k != 'processed_at'} for row in rows]
+        expected = strip(processor.process_user_list(users))
+        
+        columns = {
+            'id': [u.get('id') for u in users],
+            'username': [u.get('username') for u in users],
+            'email': [u.get('email', '') for u in users],
+        }
+        streamed = list(processor.process_user_batch(users, stream=True, chunk_size=3))
+        
+        assert strip(processor.process_user_batch(users)) == expected
+        assert strip(processor.process_user_batch(columns)) == expected
+        assert strip(streamed) == expected
+        assert len({row['processed_at'] for row in streamed}) == 1
+    
     def test_search_performance(self, benchmark, processor, large_user_dataset):
         """
         Benchmark: Búsqueda debe ser O(n) y mantenerse eficiente
@@ -104,4 +262,774 @@ class TestPerformanceRegression:
         # Verificar que ambos dan el mismo resultado
         assert slow_result == fast_result
         
-        # El benchmark detectará si slow_algorithm se hace más lento
\ No newline at end of file
+        # El benchmark detectará si slow_algorithm se hace más lento
+
+
+@pytest.mark.regression
+@pytest.mark.performance
+class TestSearchIndexPerformance:
+    """Índice de n-gramas de /api/search frente al recorrido lineal original"""
+
+    @pytest.fixture(scope="class")
+    def users(self):
+        """10k usuarios sintéticos con dominios variados"""
+        return [
+            {'id': i, 'username': f'user{i}', 'email': f'user{i}@example{i % 10}.com'}
+            for i in range(1, 10_001)
+        ]
+
+    @pytest.fixture(scope="class")
+    def index(self, users):
+        index = NGramIndex()
+        for user in users:
+            index.add(user['id'], user)
+        return index
+
+    @pytest.mark.parametrize("query", ['user1234', '99', 'example3', 'USER42', 'nomatch'])
+    def test_index_matches_linear_scan(self, users, index, query):
+        """El índice debe devolver exactamente lo mismo que el recorrido lineal"""
+        for fields in (('username',), ('email',), ('username', 'email')):
+            assert index.search(query, fields) == linear_scan(users, query, fields)
+
+    def test_incremental_add_is_searchable(self, index):
+        """Los usuarios añadidos después de construir el índice aparecen en búsquedas"""
+        index.add(99_999, {'username': 'late_signup', 'email': 'late@new.org'})
+
+        assert index.search('signup') == [99_999]
+        assert index.search('new.org', ['email']) == [99_999]
+
+    def test_unknown_field_rejected(self, index):
+        with pytest.raises(ValueError):
+            index.search('user', ['password'])
+
+    @pytest.mark.parametrize('mode', ['scan', 'index'])
+    def test_search_modes_performance(self, benchmark, users, index, mode):
+        """Benchmark: recorrido lineal O(total usuarios) vs índice (proporcional a candidatos)"""
+        if mode == 'scan':
+            result = benchmark(linear_scan, users, 'user1234')
+        else:
+            result = benchmark(index.search, 'user1234')
+        assert result == [1234]
+
+
+@pytest.mark.regression
+@pytest.mark.performance
+class TestPostStorePerformance:
+    """Paginación de /api/posts por offset y por cursor sobre un almacén grande"""
+
+    @pytest.fixture(scope="class")
+    def posts(self):
+        return [{'id': i, 'title': f'Post {i}'} for i in range(1, TOTAL_POSTS + 1)]
+
+    @pytest.fixture(scope="class")
+    def store(self, posts):
+        store = PostStore()
+        for post in posts:
+            store.add(post)
+        return store
+
+    def test_offset_slice_matches_list_semantics(self, store, posts):
+        """slice() debe comportarse igual que list(posts_db.values())[start:end]"""
+        for start, end in [(0, 10), (99_990, 100_000), (99_995, 100_005), (-10, 0)]:
+            assert store.slice(start, end) == posts[start:end]
+
+    def test_cursor_walk_covers_all_posts(self, store, posts):
+        """Recorrer con next_cursor devuelve todos los posts, en orden, sin repetir"""
+        seen = []
+        cursor = None
+        while True:
+            page, cursor = store.page_after(cursor, 1000)
+            seen.extend(post['id'] for post in page)
+            if cursor is None:
+                break
+
+        assert seen == [post['id'] for post in posts]
+
+    def test_invalid_cursor_rejected(self, store):
+        for bad in ['%%%', PostStore.encode_cursor(TOTAL_POSTS + 1), 'Zm9vOjE']:
+            with pytest.raises(InvalidCursorError):
+                store.page_after(bad, 10)
+
+    @pytest.mark.parametrize('mode', ['full_copy', 'offset', 'cursor'])
+    def test_deep_page_performance(self, benchmark, posts, store, mode):
+        """Benchmark: página profunda copiando todos los posts (original) vs offset vs cursor"""
+        if mode == 'full_copy':
+            posts_db = {post['id']: post for post in posts}
+            page = benchmark(lambda: list(posts_db.values())[99_990:100_000])
+        elif mode == 'offset':
+            page = benchmark(store.slice, 99_990, 100_000)
+        else:
+            page, next_cursor = benchmark(store.page_after, PostStore.encode_cursor(99_990), 10)
+            assert next_cursor is None
+        assert [post['id'] for post in page] == list(range(99_991, 100_001))
+
+
+@pytest.mark.regression
+@pytest.mark.performance
+class TestRequestMetricsPerformance:
+    """Contador por shards e histogramas de latencia estilo HDR usados por /api/stats"""
+
+    def test_sharded_counter_is_exact_under_threads(self):
+        """Ningún incremento se pierde con varios hilos escribiendo a la vez"""
+        counter = ShardedCounter(num_shards=4)
+
+        def worker():
+            for _ in range(10_000):
+                counter.increment()
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert counter.value() == 80_000
+        assert all(shard.count for shard in counter._shards)
+
+    def test_threads_are_spread_across_shards(self):
+        """Hilos vivos a la vez caen en shards distintos (no todos en el 0)"""
+        barrier = threading.Barrier(8)
+        shards = []
+
+        def worker():
+            barrier.wait()
+            shards.append(_shard_for(8))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(shards) == list(range(8))
+
+    def test_histogram_percentiles_within_relative_error(self):
+        """Los percentiles del histograma deben estar a <2% del valor exacto"""
+        rng = random.Random(42)
+        values = [int(rng.lognormvariate(11, 1)) for _ in range(50_000)]
+        histogram = LatencyHistogram(sub_bucket_bits=7)
+        for value in values:
+            histogram.record(value)
+
+        exact = sorted(values)
+        for p, estimate in zip([50, 95, 99], histogram.percentiles([50, 95, 99])):
+            expected = exact[max(0, -(-p * len(exact) // 100) - 1)]
+            assert abs(estimate - expected) / expected < 0.02
+
+    def test_small_values_are_exact(self):
+        histogram = LatencyHistogram()
+        for value in [1, 2, 3, 4, 100]:
+            histogram.record(value)
+        assert histogram.percentiles([20, 60, 100]) == [1, 3, 100]
+
+    def test_snapshot_merges_all_shards(self):
+        """snapshot() agrega los histogramas de todos los hilos por endpoint"""
+        metrics = RequestMetrics(num_shards=4)
+
+        def worker(offset):
+            for i in range(1000):
+                metrics.record_latency('GET /health', 1000 + offset)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        snapshot = metrics.snapshot()
+        assert snapshot['GET /health']['count'] == 4000
+        assert 0.99 <= snapshot['GET /health']['p50_ms'] <= 1.01
+
+    @pytest.mark.parametrize('mode', ['global_lock', 'sharded'])
+    def test_counter_increment_performance(self, benchmark, mode):
+        """Benchmark: contador con lock global (implementación original) vs por shards"""
+        if mode == 'global_lock':
+            lock = threading.Lock()
+            state = {'count': 0}
+
+            def increment():
+                with lock:
+                    state['count'] += 1
+
+            benchmark(increment)
+        else:
+            benchmark(ShardedCounter().increment)
+
+    def test_request_hot_path_performance(self, benchmark):
+        """Benchmark: contar request + registrar latencia (camino caliente)"""
+        metrics = RequestMetrics()
+
+        def hot_path():
+            metrics.count_request()
+            metrics.record_latency('GET /api/users', 75_000)
+
+        benchmark(hot_path)
+        assert metrics.total_requests() > 0
+
+
+@pytest.mark.regression
+@pytest.mark.performance
+class TestAsyncAppPerformance:
+    """
+    Versión ASGI de la API frente a un hilo por request
+    Las esperas simuladas no deben bloquear: N requests concurrentes tardan
+    aproximadamente lo mismo que una sola
+    """
+
+    @pytest.fixture
+    def fire(self):
+        pytest.importorskip('starlette')
+        httpx = pytest.importorskip('httpx')
+        from src.async_app import asgi_app
+
+        if not app_module.users_db:
+            app_module.init_test_data()
+
+        async def requests(path, concurrency, method='GET', **kwargs):
+            transport = httpx.ASGITransport(app=asgi_app)
+            async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+                return await asyncio.gather(*[
+                    client.request(method, path, **kwargs) for _ in range(concurrency)
+                ])
+
+        return lambda path, concurrency, **kwargs: asyncio.run(requests(path, concurrency, **kwargs))
+
+    def test_concurrent_requests_do_not_serialise(self, fire):
+        """200 requests a /api/users (50-100ms cada una) en paralelo en un solo hilo"""
+        start = time.perf_counter()
+        responses = fire('/api/users', 200)
+        elapsed = time.perf_counter() - start
+
+        assert all(r.status_code == 200 for r in responses)
+        assert elapsed < 2.0  # En serie serían >= 10s
+
+    def test_shares_stores_with_flask_app(self, fire):
+        """Un usuario creado en la versión ASGI es visible en la versión Flask"""
+        username = f'async_user_{time.time_ns()}'
+        (created,) = fire('/api/users', 1, method='POST', json={'username': username})
+        assert created.status_code == 201
+        user_id = created.json()['id']
+
+        assert app_module.users_db[user_id]['username'] == username
+        assert app_module.find_users(username, ['username']) == [created.json()]
+
+    def test_error_semantics_match_flask(self, fire):
+        (missing,) = fire('/api/users/999999', 1)
+        (no_query,) = fire('/api/search', 1)
+        (bad_cursor,) = fire('/api/posts?cursor=bad', 1)
+
+        assert missing.status_code == 404
+        assert no_query.status_code == 400
+        assert bad_cursor.status_code == 400
+
+    def test_latency_recorded_per_route(self, fire):
+        fire('/health', 5)
+        (stats,) = fire('/api/stats', 1)
+
+        assert stats.json()['endpoints']['GET /health']['count'] >= 5
+
+
+@pytest.mark.regression
+@pytest.mark.performance
+class TestJobQueuePerformance:
+    """Cola de operaciones pesadas: encolar debe ser inmediato aunque haya trabajo pendiente"""
+
+    def test_jobs_complete_and_report_failures(self):
+        jobs = JobQueue(workers=2, max_pending=10)
+
+        def boom():
+            raise RuntimeError('boom')
+
+        ok = jobs.submit(lambda: {'value': 42})
+        failed = jobs.submit(boom)
+        assert jobs.join(timeout=5)
+
+        assert jobs.get(ok['id'])['status'] == 'completed'
+        assert jobs.get(ok['id'])['result'] == {'value': 42}
+        assert jobs.get(failed['id'])['status'] == 'failed'
+        assert jobs.get(failed['id'])['error'] == 'boom'
+        assert jobs.metrics()['completed'] == 1
+        assert jobs.metrics()['failed'] == 1
+
+    def test_full_queue_rejects_without_blocking(self):
+        """Con la cola llena submit() falla al instante (backpressure)"""
+        release = threading.Event()
+        jobs = JobQueue(workers=1, max_pending=2)
+
+        # 1 en ejecución + 2 en cola
+        for _ in range(3):
+            jobs.submit(release.wait)
+            time.sleep(0.05)
+
+        start = time.perf_counter()
+        with pytest.raises(QueueFullError):
+            jobs.submit(release.wait)
+        assert time.perf_counter() - start < 0.1
+
+        metrics = jobs.metrics()
+        assert metrics['queue_depth'] == 2
+        assert metrics['running'] == 1
+        assert metrics['rejected'] == 1
+
+        release.set()
+        assert jobs.join(timeout=5)
+
+    def test_retention_evicts_oldest_finished_jobs(self):
+        jobs = JobQueue(workers=1, max_pending=10, retention=3)
+        submitted = [jobs.submit(lambda: None)['id'] for _ in range(6)]
+        assert jobs.join(timeout=5)
+
+        assert [jobs.get(job_id) is not None for job_id in submitted] == [False] * 3 + [True] * 3
+
+    def test_endpoint_returns_202_and_job_is_pollable(self, monkeypatch):
+        monkeypatch.setattr(app_module, 'run_heavy_operation', lambda: {'status': 'completed'})
+        client = app_module.app.test_client()
+
+        response = client.post('/api/heavy-operation')
+        assert response.status_code == 202
+        job_id = response.get_json()['id']
+        assert response.headers['Location'] == f'/api/jobs/{job_id}'
+
+        assert app_module.heavy_jobs.join(timeout=5)
+        status = client.get(f'/api/jobs/{job_id}').get_json()
+        assert status['status'] == 'completed'
+        assert client.get('/api/jobs/unknown').status_code == 404
+        assert 'queue_depth' in client.get('/api/stats').get_json()['job_queue']
+
+    def test_submit_latency_with_backlog(self, benchmark):
+        """Benchmark: encolar con 4 workers ocupados sigue siendo O(1)"""
+        release = threading.Event()
+        jobs = JobQueue(workers=4, max_pending=1_000_000)
+        for _ in range(4):
+            jobs.submit(release.wait)
+
+        benchmark(jobs.submit, lambda: None)
+        release.set()
+
+
+@pytest.mark.regression
+@pytest.mark.performance
+class TestStreamingStatisticsPerformance:
+    """Estadísticas en una pasada: precisión, combinación entre workers y coste"""
+
+    @pytest.fixture(scope="class")
+    def numbers(self):
+        rng = random.Random(7)
+        return [rng.uniform(0, 1000) for _ in range(100_000)]
+
+    def test_streaming_matches_exact_statistics(self, processor, numbers):
+        exact = processor.calculate_statistics(numbers)
+        streaming = processor.calculate_statistics_streaming(iter(numbers))
+
+        assert streaming['count'] == exact['count']
+        assert streaming['min'] == exact['min']
+        assert streaming['max'] == exact['max']
+        assert streaming['sum'] == pytest.approx(exact['sum'], rel=1e-9)
+        assert streaming['mean'] == pytest.approx(exact['mean'], rel=1e-9)
+        # Mediana aproximada: error < 0.5% del rango
+        assert abs(streaming['median'] - exact['median']) < 5
+
+    def test_small_inputs_are_exact(self, processor):
+        for values in ([5.0], [3.0, 1.0, 2.0], [4.0, 1.0, 3.0, 2.0]):
+            assert processor.calculate_statistics_streaming(values) == pytest.approx(
+                exact_statistics(values))
+
+    def test_merge_across_workers(self, numbers):
+        """Combinar 4 acumuladores (serializados como entre procesos) equivale a uno solo"""
+        single = StreamingStatistics().update_many(numbers)
+
+        parts = [StreamingStatistics().update_many(numbers[i::4]) for i in range(4)]
+        merged = StreamingStatistics()
+        for part in parts:
+            merged.merge(pickle.loads(pickle.dumps(part)))
+
+        assert merged.count == single.count
+        assert merged.mean == pytest.approx(single.mean, rel=1e-9)
+        assert merged.variance == pytest.approx(single.variance, rel=1e-9)
+        assert merged.quantile(0.5) == pytest.approx(single.quantile(0.5), abs=5)
+        assert merged.quantile(0.99) == pytest.approx(990, abs=5)
+
+    def test_chunked_input_and_numpy_exact_mode(self, processor, numbers):
+        np = pytest.importorskip('numpy')
+        chunks = (np.asarray(numbers[i:i + 10_000]) for i in range(0, len(numbers), 10_000))
+
+        streaming = StreamingStatistics().consume(chunks)
+        exact = processor.calculate_statistics(np.asarray(numbers))
+
+        assert exact['median'] == pytest.approx(processor.calculate_statistics(numbers)['median'])
+        assert streaming.variance == pytest.approx(np.var(numbers, ddof=1), rel=1e-9)
+
+    def test_numpy_input_keeps_list_keys_and_types(self, processor):
+        """Un array da el mismo dict (claves y tipos de Python) que la lista equivalente"""
+        np = pytest.importorskip('numpy')
+        for values in ([3, 1, 2], [4, 1, 3, 2], [0.5, 2.5, 1.0], [2 ** 62, 2 ** 62]):
+            expected = processor.calculate_statistics(values)
+            result = processor.calculate_statistics(np.asarray(values))
+
+            assert result == expected
+            assert [type(v) for v in result.values()] == [type(v) for v in expected.values()]
+        assert processor.calculate_statistics(np.array([])) == {}
+
+    def test_digest_memory_is_bounded(self):
+        digest = TDigest(compression=100)
+
+        def values():
+            for _ in range(200_000):
+                assert len(digest._buffer) <= digest._buffer_limit
+                yield random.random()
+
+        digest.update_many(values())
+        assert len(digest) < 200
+
+    def test_generators_are_consumed_in_chunks(self, processor):
+        """Un generador no se materializa entero: la memoria pico no crece con n"""
+        tracemalloc.start()
+        result = processor.calculate_statistics_streaming(float(i) for i in range(300_000))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert result['count'] == 300_000
+        assert result['sum'] == sum(range(300_000))
+        assert peak < 2 * 1024 * 1024  # una lista de 300k floats ocupa ~9MB
+
+    def test_empty_input_returns_empty_dict(self, processor):
+        assert processor.calculate_statistics_streaming([]) == {}
+
+    @pytest.mark.parametrize('mode', ['sorted', 'streaming'])
+    def test_statistics_modes_performance(self, benchmark, processor, numbers, mode):
+        """Benchmark: estadísticas exactas (ordenando) vs una sola pasada"""
+        data = numbers[:10_000]
+        if mode == 'sorted':
+            result = benchmark(processor.calculate_statistics, data)
+        else:
+            result = benchmark(processor.calculate_statistics_streaming, data)
+        assert result['count'] == 10_000
+
+
+@pytest.mark.regression
+@pytest.mark.performance
+class TestPerformanceReportPerformance:
+    """generate_performance_report: el modo exacto no cambia resultados; el sketch escala"""
+
+    @pytest.fixture(scope="class")
+    def metrics(self):
+        rng = random.Random(3)
+        return [rng.lognormvariate(-2, 0.5) for _ in range(50_000)]
+
+    @pytest.mark.parametrize('size', [1, 2, 3, 10, 11, 1000])
+    def test_exact_mode_matches_reference(self, generator, metrics, size):
+        data = metrics[:size]
+        assert generator.generate_performance_report(data) == reference_report(generator, data)
+
+    def test_exact_mode_accepts_generators(self, generator, metrics):
+        data = metrics[:1000]
+        assert generator.generate_performance_report(x for x in data) == reference_report(generator, data)
+        assert generator.generate_performance_report(iter([]))['error'] == 'No metrics provided'
+
+    def test_sketch_mode_close_to_exact(self, generator, metrics):
+        exact = generator.generate_performance_report(metrics)
+        sketch = generator.generate_performance_report(iter(metrics), sketch=True)
+
+        assert sketch['metrics_count'] == exact['metrics_count']
+        assert sketch['mean'] == exact['mean']
+        assert sketch['std_dev'] == pytest.approx(exact['std_dev'], abs=0.001)
+        for key in ('p90', 'p95', 'p99'):
+            assert sketch['percentiles'][key] == pytest.approx(exact['percentiles'][key], rel=0.02)
+
+    def test_sketch_mode_accepts_merged_accumulators(self, generator, metrics):
+        shards = [StreamingStatistics().update_many(metrics[i::3]) for i in range(3)]
+        merged = StreamingStatistics()
+        for shard in shards:
+            merged.merge(shard)
+
+        report = generator.generate_performance_report(merged)
+        assert report['metrics_count'] == len(metrics)
+        assert generator.generate_performance_report([], sketch=True)['error'] == 'No metrics provided'
+
+    @pytest.mark.parametrize('mode', ['reference', 'exact'])
+    def test_report_modes_performance(self, benchmark, generator, metrics, mode):
+        """Benchmark: cuatro ordenaciones (3 percentiles + mediana) vs una compartida"""
+        data = metrics[:10_000]
+        if mode == 'reference':
+            result = benchmark(reference_report, generator, data)
+        else:
+            result = benchmark(generator.generate_performance_report, data)
+        assert result['metrics_count'] == 10_000
+
+
+@pytest.mark.regression
+@pytest.mark.performance
+class TestTrendAccumulatorPerformance:
+    """TrendAccumulator: mismo reporte que el cálculo completo, coste O(1) por actualización"""
+
+    def test_in_order_updates_match_reference(self):
+        data = daily_series(400)
+        accumulator = TrendAccumulator()
+        seen = {}
+        for day, value in data.items():
+            accumulator.add(day, value)
+            seen[day] = value
+            assert accumulator.report() == reference_trend(seen)
+
+    def test_out_of_order_and_corrections_match_reference(self):
+        data = daily_series(200)
+        items = list(data.items())
+        random.Random(5).shuffle(items)
+        accumulator = TrendAccumulator().extend(items)
+        assert accumulator.report() == reference_trend(data)
+
+        # Corregir el pico y un día intermedio
+        peak = accumulator.report()['peak_day']['date']
+        for day, value in [(peak, -1), (items[0][0], 99)]:
+            accumulator.add(day, value)
+            data[day] = value
+            assert accumulator.report() == reference_trend(data)
+
+    def test_rolling_averages(self):
+        data = daily_series(60)
+        accumulator = TrendAccumulator(windows=(7, 30)).extend(data.items())
+        values = [data[d] for d in sorted(data)]
+
+        assert accumulator.rolling_averages() == {
+            'last_7_days': round(sum(values[-7:]) / 7, 2),
+            'last_30_days': round(sum(values[-30:]) / 30, 2),
+        }
+
+        # Un día atrasado dentro de la ventana obliga a recalcularla
+        backfill = '2020-02-26'
+        accumulator.add(backfill, 1000)
+        data[backfill] = 1000
+        values = [data[d] for d in sorted(data)]
+        assert accumulator.rolling_averages()['last_7_days'] == round(sum(values[-7:]) / 7, 2)
+
+    def test_generator_uses_accumulator(self):
+        generator = ReportGenerator(fixed_timestamp="2025-05-05T00:00:00Z")
+        data = daily_series(30)
+        assert generator.generate_trend_analysis(data) == reference_trend(data, "2025-05-05T00:00:00Z")
+        assert generator.generate_trend_analysis({}) == {
+            'error': 'No data provided', 'timestamp': "2025-05-05T00:00:00Z"}
+
+    @pytest.mark.parametrize('mode', ['recompute', 'incremental'])
+    def test_trend_update_performance(self, benchmark, mode):
+        """Benchmark: recalcular todo sobre años de datos diarios vs añadir un día en O(1)"""
+        data = daily_series(3650)
+        if mode == 'recompute':
+            result = benchmark(reference_trend, data)
+        else:
+            accumulator = TrendAccumulator().extend(data.items())
+            next_day = iter(
+                (date(2030, 1, 1) + timedelta(days=i)).isoformat() for i in range(10_000_000))
+            result = benchmark(lambda: accumulator.add(next(next_day), 10).report())
+        assert result['trend'] in ('increasing', 'decreasing', 'stable')
+
+
+@pytest.mark.regression
+@pytest.mark.performance
+class TestShardedReportsPerformance:
+    """generate_user_summary repartido en procesos: mismo reporte que el modo serie"""
+
+    @pytest.fixture(scope="class")
+    def users(self):
+        return make_users(20_000)
+
+    @pytest.fixture
+    def users_jsonl(self, tmp_path, users):
+        path = tmp_path / 'users.jsonl'
+        path.write_text(''.join(json.dumps(user) + '\n' for user in users))
+        return path
+
+    @pytest.mark.parametrize('workers', [1, 3])
+    def test_sharded_list_matches_serial(self, generator, users, workers):
+        expected = generator.generate_user_summary(users)
+        assert generator.generate_user_summary_sharded(users, workers=workers) == expected
+
+    @pytest.mark.parametrize('workers', [1, 4])
+    def test_sharded_jsonl_matches_serial(self, generator, users, users_jsonl, workers):
+        expected = generator.generate_user_summary(users)
+        assert generator.generate_user_summary_sharded(users_jsonl, workers=workers) == expected
+
+    def test_domain_ties_keep_first_appearance_order(self, generator, tmp_path):
+        """Con empates el orden debe ser el de primera aparición (como sorted estable)"""
+        users = [{'email': f'u{i}@{domain}'} for i, domain in enumerate(
+            ['d.com', 'c.com', 'b.com', 'a.com', 'a.com', 'b.com', 'c.com', 'd.com'])]
+        path = tmp_path / 'ties.jsonl'
+        path.write_text('\n'.join(json.dumps(user) for user in users) + '\n')
+
+        expected = generator.generate_user_summary(users)
+        assert [d['domain'] for d in expected['top_email_domains']] == ['d.com', 'c.com', 'b.com']
+        assert generator.generate_user_summary_sharded(users, workers=4) == expected
+        assert generator.generate_user_summary_sharded(path, workers=4) == expected
+
+    def test_empty_sources(self, generator, tmp_path):
+        empty = tmp_path / 'empty.jsonl'
+        empty.write_text('')
+        expected = generator.generate_user_summary([])
+
+        assert generator.generate_user_summary_sharded([], workers=2) == expected
+        assert generator.generate_user_summary_sharded(empty, workers=2) == expected
+
+    @pytest.mark.parametrize('mode', ['serial', 'sharded_jsonl'])
+    def test_user_summary_modes_performance(self, benchmark, generator, users, users_jsonl, mode):
+        """Benchmark: una pasada en serie vs JSONL en 2 procesos (incluye arranque del pool)"""
+        if mode == 'serial':
+            result = benchmark(generator.generate_user_summary, users)
+        else:
+            result = benchmark.pedantic(generator.generate_user_summary_sharded,
+                                        args=[users_jsonl], kwargs={'workers': 2},
+                                        iterations=1, rounds=3)
+        assert result['total_users'] == 20_000
+
+
+@pytest.mark.regression
+@pytest.mark.performance
+class TestScalingPerformance:
+    """Complejidad empírica: cada función debe conservar su clase al crecer n"""
+
+    def test_fit_recovers_known_exponents(self):
+        sizes = geometric_sizes(100, 5)
+        for k, expected in [(0, 'O(1)'), (1, 'O(n)'), (2, 'O(n^2)'), (3, 'O(n^3)')]:
+            exponent, r_squared = fit_exponent(sizes, [2e-6 * n ** k for n in sizes])
+            assert exponent == pytest.approx(k)
+            assert r_squared == pytest.approx(1.0)
+            assert complexity_class(exponent) == expected
+
+    def test_detects_linear_function_becoming_quadratic(self):
+        case = ScalingCase('search_users', quadratic_search, lambda n: list(range(n)),
+                           geometric_sizes(50, 4), 'O(n)')
+        result = measure_scaling(case, repeats=3)
+        assert result.fitted_class == 'O(n^2)'
+        assert not result.ok
+
+    def test_csv_is_long_format(self, tmp_path):
+        case = ScalingCase('optimized_algorithm', len, lambda n: list(range(n)),
+                           geometric_sizes(10, 3), 'O(1)')
+        path = write_csv([measure_scaling(case, repeats=1)], tmp_path / 'scaling.csv')
+
+        with open(path) as f:
+            rows = list(csv.DictReader(f))
+        assert [int(row['n']) for row in rows] == [10, 20, 40]
+        assert {row['case'] for row in rows} == {'optimized_algorithm'}
+        assert all(float(row['seconds']) > 0 for row in rows)
+
+    @pytest.mark.slow
+    @pytest.mark.parametrize('case', SCALING_CASES, ids=[case.name for case in SCALING_CASES])
+    def test_complexity_class_is_stable(self, case):
+        """La clase ajustada debe coincidir con la esperada para cada función"""
+        result = measure_scaling(case, repeats=3)
+        assert result.ok, (
+            f"{case.name}: fitted {result.fitted_class} (k={result.exponent:.2f}), "
+            f"expected {case.expected}"
+        )
+
+
+@pytest.mark.regression
+@pytest.mark.performance
+class TestRequestAggregatorPerformance:
+    """Listener de Locust: agregación en memoria barata y escritura al fichero por lotes"""
+
+    def test_counters_and_percentiles(self, tmp_path):
+        aggregator = RequestAggregator(tmp_path / 'requests.jsonl', flush_interval=3600)
+        for ms in range(1, 1001):
+            aggregator.record('GET /health', ms)
+        aggregator.record('GET /api/slow', 1500)
+        aggregator.record('POST /api/users', 20, exception=RuntimeError('boom'))
+
+        snapshot = aggregator.snapshot()
+        health = snapshot['GET /health']
+        assert health['requests'] == 1000 and health['failures'] == 0
+        # Error relativo del histograma HDR < 1/64
+        for p in (50, 90, 95, 99):
+            assert health[f'p{p}'] == pytest.approx(p * 10, rel=1 / 64)
+        assert health['max'] == pytest.approx(1000)
+
+        assert snapshot['GET /api/slow']['slow'] == 1
+        assert snapshot['POST /api/users']['failures'] == 1
+        assert snapshot['Aggregated']['requests'] == 1002
+        assert 'GET /health' in aggregator.percentile_table()
+
+    def test_flushes_in_batches(self, tmp_path):
+        path = tmp_path / 'requests.jsonl'
+        aggregator = RequestAggregator(path, flush_interval=3600, max_buffered=3)
+
+        aggregator.record('GET /api/slow', 2000)
+        aggregator.record('GET /health', 5)
+        aggregator.record('GET /api/slow', 2500)
+        assert not path.exists()
+
+        aggregator.record('GET /api/users', 10, exception=ConnectionError('refused'))
+        events = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [e['type'] for e in events] == ['slow', 'slow', 'failure', 'snapshot']
+        assert events[-1]['endpoints']['Aggregated']['requests'] == 4
+        assert aggregator.events == []
+
+    def test_record_overhead(self, benchmark, tmp_path):
+        """Benchmark: coste por request del listener (sin I/O)"""
+        aggregator = RequestAggregator(tmp_path / 'requests.jsonl', flush_interval=3600)
+        names = [f'GET /api/endpoint{i}' for i in range(10)]
+        samples = [(random.choice(names), random.uniform(1, 500)) for _ in range(10_000)]
+
+        def record_all():
+            for name, ms in samples:
+                aggregator.record(name, ms)
+
+        benchmark(record_all)
+        assert not (tmp_path / 'requests.jsonl').exists()
+
+
+@pytest.mark.regression
+@pytest.mark.performance
+class TestTraceReplayPerformance:
+    """Reproducción de trazas (open-loop): parseo, reloj escalado y planificación de envíos"""
+
+    def test_load_jsonl_sorts_and_normalises(self, tmp_path):
+        path = tmp_path / 'trace.jsonl'
+        path.write_text('\n'.join(json.dumps(row) for row in [
+            {'timestamp': 1700000002.5, 'endpoint': '/api/search?q=user', 'params': {'fields': 'email'}},
+            {'timestamp': 1700000000.0, 'method': 'post', 'endpoint': '/api/users',
+             'body': {'username': 'a', 'email': 'a@x.com'}},
+            {'timestamp': '2023-11-14T22:13:21Z', 'endpoint': '/health'},
+        ]) + '\n')
+
+        trace = load_trace(path)
+        assert [r.path for r in trace] == ['/api/users', '/health', '/api/search']
+        assert [r.offset for r in trace] == pytest.approx([0.0, 1.0, 2.5])
+        assert trace[0].method == 'POST' and trace[0].body == {'username': 'a', 'email': 'a@x.com'}
+        assert trace[2].params == {'q': 'user', 'fields': 'email'}
+
+    def test_load_csv_with_query_string_params(self, tmp_path):
+        path = tmp_path / 'trace.csv'
+        path.write_text("timestamp,method,endpoint,params\n"
+                        "10.0,GET,/api/posts,page=2&per_page=5\n"
+                        "10.2,,/api/search,{\"q\": \"demo\"}\n")
+        trace = load_trace(path)
+        assert trace[0] == TraceRecord(0.0, 'GET', '/api/posts', {'page': '2', 'per_page': '5'})
+        assert trace[1].method == 'GET' and trace[1].params == {'q': 'demo'}
+        assert trace[1].offset == pytest.approx(0.2)
+
+    def test_schedule_scales_time_and_tracks_lag(self):
+        records = [TraceRecord(t, 'GET', '/health') for t in (0.0, 0.0, 1.0, 4.0)]
+        schedule = ReplaySchedule(records, speed=2.0)
+
+        assert schedule.duration == pytest.approx(2.0)
+        assert schedule.peak_rate(window=1.0) == 3  # 0, 0 y 0.5 en el mismo segundo
+        assert [schedule.next()[0] for _ in range(4)] == [0.0, 0.0, 0.5, 2.0]
+        assert schedule.next() is None and schedule.remaining == 0
+
+        for lag in (0.0, 0.01, 0.2):
+            schedule.record_dispatch(lag)
+        assert (schedule.dispatched, schedule.late, schedule.max_lag) == (3, 1, 0.2)
+
+        with pytest.raises(ValueError):
+            ReplaySchedule(records, speed=0)
+
+    def test_load_large_trace_performance(self, benchmark, tmp_path):
+        """Benchmark: cargar y ordenar una traza de 100k requests"""
+        path = tmp_path / 'trace.jsonl'
+        with open(path, 'w') as f:
+            for i in range(100_000):
+                f.write(json.dumps({'timestamp': 1700000000 + (i * 7919 % 100_000) / 100,
+                                    'endpoint': f'/api/search?q=user{i % 50}'}) + '\n')
+
+        trace = benchmark.pedantic(load_trace, args=[path], iterations=1, rounds=3)
+        assert len(trace) == 100_000
+        assert all(a.offset <= b.offset for a, b in zip(trace, trace[1:]))
@@ -3,11 +3,14 @@ Sesión 5: Depuración y análisis de código
 Ejemplo práctico de debugging, logging estructurado y profiling
 """
 
+import bisect
 import logging
+import sys
 import time
 import cProfile
 import pstats
 import tracemalloc
+from collections import OrderedDict
 from contextlib import contextmanager
 from datetime import datetime
 from typing import List, Dict, Any
@@ -87,9 +90,13 @@ logger = StructuredLogger("debug_example")
 class BuggyCalculator:
     """Calculadora con bugs intencionales para debugging"""
     
-    def __init__(self):
+    def __init__(self, cache_bytes: int = 16 * 1024 * 1024):
         self.history = []
-        self.cache = {}
+        # LRU de factoriales limitado en bytes; _cached_n (ordenada) localiza el punto de partida
+        self.cache = OrderedDict()
+        self.cache_bytes = cache_bytes
+        self._cache_used = 0
+        self._cached_n = []
     
     def divide(self, a: float, b: float) -> float:
         """División con bug intencional"""
@@ -109,23 +116,51 @@ class BuggyCalculator:
             return None
     
     def factorial(self, n: int) -> int:
-        """Factorial con implementación ineficiente"""
+        """
+        Factorial iterativo a partir del mayor factorial ya cacheado por debajo de n
+        Antes era recursivo: con n negativo no terminaba nunca y con n grande
+        agotaba la pila (RecursionError)
+        """
         logger.debug("Calculating factorial", n=n)
         
+        if isinstance(n, bool) or not isinstance(n, int):
+            raise TypeError(f"Factorial requires an integer, got {type(n).__name__}")
+        if n < 0:
+            raise ValueError("Factorial is not defined for negative numbers")
+        
         if n in self.cache:
             logger.debug("Using cached result", n=n)
+            self.cache.move_to_end(n)
             return self.cache[n]
         
-        # BUG: Implementación O(n!) muy ineficiente
-        if n == 0 or n == 1:
-            result = 1
-        else:
-            result = n * self.factorial(n - 1)
+        pos = bisect.bisect_left(self._cached_n, n)
+        start = self._cached_n[pos - 1] if pos else 0
+        result = 1
+        if start:
+            self.cache.move_to_end(start)
+            result = self.cache[start]
+        for i in range(start + 1, n + 1):
+            result *= i
         
-        self.cache[n] = result
-        logger.info("Factorial calculated", n=n, result=result)
+        self._remember(n, result)
+        # Los enteros de más de 4300 dígitos no se pueden pasar a texto: se registra su tamaño
+        logger.info("Factorial calculated", n=n,
+                    result=result if result.bit_length() <= 64 else f"<{result.bit_length()} bits>")
         return result
     
+    def _remember(self, n: int, value: int) -> None:
+        """Guarda n! y expulsa los menos usados hasta caber en cache_bytes"""
+        size = sys.getsizeof(value)
+        if size > self.cache_bytes:
+            return
+        while self._cache_used + size > self.cache_bytes:
+            old_n, old_value = self.cache.popitem(last=False)
+            self._cache_used -= sys.getsizeof(old_value)
+            del self._cached_n[bisect.bisect_left(self._cached_n, old_n)]
+        self.cache[n] = value
+        self._cache_used += size
+        bisect.insort(self._cached_n, n)
+    
     @profile  # Memory profiling decorator
     def memory_intensive_operation(self, size: int) -> List[int]:
         """Operación que consume mucha memoria"""